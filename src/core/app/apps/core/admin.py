@@ -1,7 +1,19 @@
 from django import forms
 from django.contrib import admin
-
-from .models import Column, Database, Report, ReportColumn, Table
+from django.db.models import Q
+
+from .models import (
+    Column,
+    ColumnStatistics,
+    Database,
+    Report,
+    ReportArtifact,
+    ReportColumn,
+    ReportPack,
+    ReportPackItem,
+    ReportSchedule,
+    Table,
+)
 
 
 class ReportAdminForm(forms.ModelForm):
@@ -45,7 +57,8 @@ class ColumnInline(admin.TabularInline):
 class TableAdmin(admin.ModelAdmin):
     list_display = ["table_name", "schema_name", "database", "table_type", "row_count", "is_active", "updated_at"]
     list_filter = ["database", "schema_name", "table_type", "is_active"]
-    search_fields = ["table_name", "schema_name", "description"]
+    # Trigram indexed, see Table.Meta.indexes
+    search_fields = ["table_name", "schema_name"]
     readonly_fields = ["created_at", "updated_at"]
     inlines = [ColumnInline]
 
@@ -60,14 +73,31 @@ class ColumnAdmin(admin.ModelAdmin):
         "is_nullable",
         "is_primary_key",
         "is_foreign_key",
+        "foreign_table",
+        "is_indexed",
+        "is_active",
+    ]
+    list_filter = [
+        "table__database",
+        "data_type",
+        "is_nullable",
+        "is_primary_key",
+        "is_foreign_key",
+        "is_indexed",
         "is_active",
     ]
-    list_filter = ["table__database", "data_type", "is_nullable", "is_primary_key", "is_foreign_key", "is_active"]
-    search_fields = ["column_name", "table__table_name", "description"]
+    search_fields = ["column_name"]
+    search_help_text = "Nombre de la columna o de su tabla"
     readonly_fields = ["created_at", "updated_at"]
 
     def get_search_results(self, request, queryset, search_term):
-        queryset, use_distinct = super().get_search_results(request, queryset, search_term)
+        use_distinct = False
+        search_term = search_term.strip()
+        if search_term:
+            # The tables are resolved first: each condition uses an index (trigram on the column name,
+            # the table and column key), an OR across the join would read every column
+            table_ids = list(Table.objects.filter(table_name__icontains=search_term).values_list("pk", flat=True))
+            queryset = queryset.filter(Q(column_name__icontains=search_term) | Q(table_id__in=table_ids))
 
         # Filtrar por tabla si se proporciona en los parámetros
         table_id = request.GET.get("table__id__exact")
@@ -77,10 +107,25 @@ class ColumnAdmin(admin.ModelAdmin):
         return queryset, use_distinct
 
 
+@admin.register(ColumnStatistics)
+class ColumnStatisticsAdmin(admin.ModelAdmin):
+    list_display = ["column", "null_frac", "n_distinct", "avg_width", "correlation", "collected_at"]
+    list_filter = ["column__table__database", "column__table"]
+    search_fields = ["column__column_name", "column__table__table_name"]
+    list_select_related = ["column", "column__table"]
+
+    # Recolectadas por sync_database_metadata --stats
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
 class ReportColumnInline(admin.TabularInline):
     model = ReportColumn
     extra = 1
-    fields = ["column", "order", "display_name", "is_visible"]
+    fields = ["column", "order", "display_name", "is_visible", "pivot_role"]
     ordering = ["order"]
     autocomplete_fields = ["column"]
 
@@ -126,3 +171,40 @@ class ReportColumnAdmin(admin.ModelAdmin):
     search_fields = ["report__name", "column__column_name", "display_name"]
     ordering = ["report", "order"]
     autocomplete_fields = ["report", "column"]
+
+
+class ReportPackItemInline(admin.TabularInline):
+    model = ReportPackItem
+    extra = 1
+    fields = ["report", "order"]
+    ordering = ["order"]
+    autocomplete_fields = ["report"]
+
+
+@admin.register(ReportPack)
+class ReportPackAdmin(admin.ModelAdmin):
+    list_display = ["name", "is_active", "created_at", "updated_at"]
+    list_filter = ["is_active", "created_at"]
+    search_fields = ["name", "description"]
+    readonly_fields = ["created_at", "updated_at"]
+    inlines = [ReportPackItemInline]
+
+
+@admin.register(ReportSchedule)
+class ReportScheduleAdmin(admin.ModelAdmin):
+    list_display = ["report", "date_range", "crontab", "generate_pdf", "generate_csv", "retention_days", "is_active"]
+    list_filter = ["date_range", "is_active", "report__table__database"]
+    search_fields = ["report__name"]
+    readonly_fields = ["periodic_task", "created_at", "updated_at"]
+    autocomplete_fields = ["report"]
+
+
+@admin.register(ReportArtifact)
+class ReportArtifactAdmin(admin.ModelAdmin):
+    list_display = ["filename", "report", "format", "start_date", "end_date", "total_count", "created_at", "expires_at"]
+    list_filter = ["format", "report", "created_at"]
+    search_fields = ["filename", "report__name"]
+    readonly_fields = [field.name for field in ReportArtifact._meta.fields]
+
+    def has_add_permission(self, request):
+        return False
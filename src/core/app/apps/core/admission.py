@@ -0,0 +1,213 @@
+"""
+Admission control for report executions.
+
+A Redis semaphore caps how many report queries run at once, globally and per
+report. Executions that do not get a slot wait in a queue ordered by how many
+executions their owner (user or session) already has in the system, so one
+user launching many reports cannot starve everybody else.
+
+Slots are leases: a process that dies while holding one frees it when the
+lease expires. Waiters keep a heartbeat key alive while polling; dead waiters
+are dropped from the head of the queue.
+"""
+
+import asyncio
+import time
+import weakref
+
+import redis
+import redis.asyncio
+from django.conf import settings
+
+from apps.core.async_db import is_serving_loop
+from apps.core.exceptions import ReportBudgetExceeded
+
+POLL_INTERVAL = 0.2
+HEARTBEAT_TTL = 5
+
+# KEYS: holders, waiters, owners
+# ARGV: token, owner, now, limit, lease_expires_at, waiter_prefix
+ACQUIRE_SCRIPT = """
+local holders, waiters, owners = KEYS[1], KEYS[2], KEYS[3]
+local token, owner = ARGV[1], ARGV[2]
+local now, limit, lease = tonumber(ARGV[3]), tonumber(ARGV[4]), tonumber(ARGV[5])
+local waiter_prefix = ARGV[6]
+
+-- Expired leases free their slot and their owner's share
+for _, expired in ipairs(redis.call('ZRANGEBYSCORE', holders, '-inf', now)) do
+    redis.call('ZREM', holders, expired)
+    local expired_owner = redis.call('HGET', owners, expired)
+    if expired_owner then
+        redis.call('HINCRBY', owners, 'count:' .. expired_owner, -1)
+        redis.call('HDEL', owners, expired)
+    end
+end
+
+-- First attempt: enqueue with a priority based on the owner's executions
+if not redis.call('ZSCORE', waiters, token) then
+    local share = tonumber(redis.call('HINCRBY', owners, 'count:' .. owner, 1)) - 1
+    redis.call('HSET', owners, token, owner)
+    redis.call('ZADD', waiters, share * 1e13 + now * 1000, token)
+end
+
+-- Drop dead waiters in front of the queue
+local free = limit - redis.call('ZCARD', holders)
+for _, waiting in ipairs(redis.call('ZRANGE', waiters, 0, math.max(free, 1) - 1)) do
+    if waiting ~= token and redis.call('EXISTS', waiter_prefix .. waiting) == 0 then
+        redis.call('ZREM', waiters, waiting)
+        local waiting_owner = redis.call('HGET', owners, waiting)
+        if waiting_owner then
+            redis.call('HINCRBY', owners, 'count:' .. waiting_owner, -1)
+            redis.call('HDEL', owners, waiting)
+        end
+    end
+end
+
+local rank = redis.call('ZRANK', waiters, token)
+if free > 0 and rank < free then
+    redis.call('ZREM', waiters, token)
+    redis.call('ZADD', holders, lease, token)
+    return 1
+end
+return 0
+"""
+
+# KEYS: holders, waiters, owners
+# ARGV: token
+RELEASE_SCRIPT = """
+local removed = redis.call('ZREM', KEYS[1], ARGV[1]) + redis.call('ZREM', KEYS[2], ARGV[1])
+local owner = redis.call('HGET', KEYS[3], ARGV[1])
+if owner then
+    redis.call('HINCRBY', KEYS[3], 'count:' .. owner, -1)
+    redis.call('HDEL', KEYS[3], ARGV[1])
+end
+return removed
+"""
+
+_client = None
+# ASGI event loop -> async client, its connections belong to the loop that opened them
+_async_clients = weakref.WeakKeyDictionary()
+
+
+def get_client():
+    global _client
+    if _client is None:
+        _client = redis.Redis.from_url(settings.REDIS_URL)
+    return _client
+
+
+def get_async_client():
+    """
+    Returns the async client of the ASGI event loop
+
+    Other loops are short lived (see ``async_db``), they get a new client the
+    caller must close.
+    """
+    if not is_serving_loop():
+        return redis.asyncio.Redis.from_url(settings.REDIS_URL)
+    loop = asyncio.get_running_loop()
+    if loop not in _async_clients:
+        _async_clients[loop] = redis.asyncio.Redis.from_url(settings.REDIS_URL)
+    return _async_clients[loop]
+
+
+class ExecutionSlot:
+    """
+    One slot of a named Redis semaphore
+
+    Usable as a context manager, both sync and async::
+
+        async with ExecutionSlot("global", limit=8, token=token, owner="user-1", lease=60):
+            ...
+    """
+
+    def __init__(self, scope, limit, token, owner, lease, timeout=None):
+        self.limit = limit
+        self.token = token
+        self.owner = owner
+        self.lease = lease
+        self.timeout = settings.REPORT_ADMISSION_TIMEOUT if timeout is None else timeout
+        prefix = f"report:admission:{scope}"
+        self.keys = [f"{prefix}:holders", f"{prefix}:waiters", f"{prefix}:owners"]
+        self.waiter_prefix = f"{prefix}:waiter:"
+        self.async_client = None
+
+    def _acquire_args(self):
+        now = time.time()
+        return [self.token, self.owner, now, self.limit, now + self.lease, self.waiter_prefix]
+
+    def _timeout_error(self):
+        return ReportBudgetExceeded(
+            f"Hay demasiados reportes en ejecución. Se esperó {self.timeout} segundos sin obtener un turno, "
+            "intente de nuevo en unos minutos o reduzca el rango de fechas."
+        )
+
+    def acquire(self):
+        client = get_client()
+        deadline = time.monotonic() + self.timeout
+        while True:
+            client.set(f"{self.waiter_prefix}{self.token}", 1, ex=HEARTBEAT_TTL)
+            if client.eval(ACQUIRE_SCRIPT, len(self.keys), *self.keys, *self._acquire_args()):
+                return self
+            if time.monotonic() >= deadline:
+                self.release()
+                raise self._timeout_error()
+            time.sleep(POLL_INTERVAL)
+
+    def release(self):
+        client = get_client()
+        client.eval(RELEASE_SCRIPT, len(self.keys), *self.keys, self.token)
+        client.delete(f"{self.waiter_prefix}{self.token}")
+
+    async def aacquire(self):
+        self.async_client = client = get_async_client()
+        deadline = time.monotonic() + self.timeout
+        try:
+            while True:
+                await client.set(f"{self.waiter_prefix}{self.token}", 1, ex=HEARTBEAT_TTL)
+                if await client.eval(ACQUIRE_SCRIPT, len(self.keys), *self.keys, *self._acquire_args()):
+                    return self
+                if time.monotonic() >= deadline:
+                    raise self._timeout_error()
+                await asyncio.sleep(POLL_INTERVAL)
+        except BaseException:
+            # Timed out or cancelled (client disconnected) while queued
+            await self.arelease()
+            raise
+
+    async def arelease(self):
+        client = self.async_client or get_async_client()
+        try:
+            await client.eval(RELEASE_SCRIPT, len(self.keys), *self.keys, self.token)
+            await client.delete(f"{self.waiter_prefix}{self.token}")
+        finally:
+            if not is_serving_loop():
+                self.async_client = None
+                await client.aclose()
+
+    def __enter__(self):
+        return self.acquire()
+
+    def __exit__(self, *exc_info):
+        self.release()
+
+    async def __aenter__(self):
+        return await self.aacquire()
+
+    async def __aexit__(self, *exc_info):
+        await self.arelease()
+
+
+def get_slots(plan, token, owner):
+    """
+    Returns the semaphore slots a report execution must hold: the report's own
+    concurrency cap (when configured) and the global one
+    """
+    budget = plan.get_budget()
+    lease = budget["statement_timeout"] + 30
+    slots = []
+    if budget["max_concurrency"]:
+        slots.append(ExecutionSlot(f"report-{plan.id}", budget["max_concurrency"], token, owner, lease))
+    if settings.REPORT_MAX_CONCURRENT_EXECUTIONS:
+        slots.append(ExecutionSlot("global", settings.REPORT_MAX_CONCURRENT_EXECUTIONS, token, owner, lease))
+    return slots
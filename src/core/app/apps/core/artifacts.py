@@ -0,0 +1,124 @@
+"""
+Pre-generated report files.
+
+Scheduled runs (see ``apps.core.tasks``) execute reports off-peak and store
+the rendered PDF/CSV as ``ReportArtifact``. Export views serve a stored file
+instead of executing the report again when the request asks for the same
+report, format and date range, and the report configuration has not changed
+since the file was built.
+
+Only closed date ranges (ending before today) are served from artifacts, data
+of the current day keeps changing.
+"""
+
+import logging
+from datetime import date, timedelta
+
+from asgiref.sync import sync_to_async
+from django.utils import timezone
+
+from apps.core import metrics
+from apps.core.models import ReportArtifact
+
+logger = logging.getLogger(__name__)
+
+
+def find_artifact(plan, format, start_date, end_date):
+    """
+    Returns the newest valid artifact of a report execution, or None
+
+    Args:
+        plan: ReportPlan of the requested report
+        format: ReportArtifact.Format
+        start_date: Start date filter (string YYYY-MM-DD)
+        end_date: End date filter (string YYYY-MM-DD)
+    """
+    try:
+        start_date, end_date = date.fromisoformat(start_date), date.fromisoformat(end_date)
+    except (TypeError, ValueError):
+        return None
+    if end_date >= date.today():
+        return None
+
+    return (
+        ReportArtifact.objects.filter(
+            report_id=plan.id,
+            format=format,
+            start_date=start_date,
+            end_date=end_date,
+            plan_fingerprint=plan.fingerprint,
+            expires_at__gt=timezone.now(),
+        )
+        .order_by("-created_at")
+        .first()
+    )
+
+
+def read_artifact(artifact):
+    """Returns the content of an artifact, or None if its file is gone"""
+    try:
+        with artifact.file.open("rb") as file:
+            content = file.read()
+    except FileNotFoundError:
+        logger.warning("File of report artifact %s is missing", artifact.pk)
+        return None
+
+    metrics.incr(metrics.REPORT_ARTIFACT_SERVED)
+    return content
+
+
+async def aget_artifact_content(plan, format, start_date, end_date):
+    """
+    Returns ``(filename, content)`` of a valid artifact of a report execution, or None
+
+    Async views use it before executing the report.
+    """
+
+    def get_content():
+        artifact = find_artifact(plan, format, start_date, end_date)
+        if artifact is None:
+            return None
+        content = read_artifact(artifact)
+        return None if content is None else (artifact.filename, content)
+
+    return await sync_to_async(get_content)()
+
+
+def store_artifact(plan, format, start_date, end_date, file, total_count, retention_days, schedule=None):
+    """
+    Stores a rendered report file as an artifact
+
+    Args:
+        plan: ReportPlan the file was built from
+        format: ReportArtifact.Format
+        start_date: Start date of the data (date)
+        end_date: End date of the data (date)
+        file: The rendered File
+        total_count: Total number of rows of the result
+        retention_days: Days the artifact is kept
+        schedule: ReportSchedule that produced it, if any
+    """
+    artifact = ReportArtifact(
+        report_id=plan.id,
+        schedule=schedule,
+        format=format,
+        start_date=start_date,
+        end_date=end_date,
+        plan_fingerprint=plan.fingerprint,
+        filename=file.name,
+        total_count=total_count,
+        expires_at=timezone.now() + timedelta(days=retention_days),
+    )
+    artifact.file.save(file.name, file, save=False)
+    artifact.save()
+    return artifact
+
+
+def purge_expired_artifacts():
+    """Deletes the expired artifacts and their files, returns how many were deleted"""
+    deleted = 0
+    for artifact in ReportArtifact.objects.filter(expires_at__lte=timezone.now()).iterator():
+        # The file is deleted by the post_delete signal
+        artifact.delete()
+        deleted += 1
+    return deleted
@@ -0,0 +1,167 @@
+"""
+Async psycopg connections for the report databases.
+
+Django's ORM connections are synchronous, so async views read report data
+through ``async_connection`` instead, configured from ``settings.DATABASES``.
+Under ASGI (daphne) a process serves every request from a single event loop,
+which keeps one connection pool per alias; ``serve_async_pools`` wraps the ASGI
+application to mark that loop and close its pools on lifespan shutdown.
+
+Any other loop is short lived: under WSGI, Celery or a management command
+``async_to_sync`` runs each call in a new loop. A pool cannot be used from a
+loop other than the one that opened it, and its workers would keep that loop
+(and its connections) alive, so there each use opens and closes a connection.
+"""
+
+import asyncio
+import weakref
+from contextlib import asynccontextmanager
+
+from django.conf import settings
+from django.db import connections
+from psycopg.conninfo import make_conninfo
+
+# Django specific keys of DATABASES[alias]["OPTIONS"] that libpq does not understand
+DJANGO_ONLY_OPTIONS = {"pool", "server_side_binding", "isolation_level", "assume_role", "prepare_threshold"}
+
+# Event loop of the ASGI server -> (pools by alias, lock)
+_loops = weakref.WeakKeyDictionary()
+
+
+def _get_loop_pools():
+    """Returns the pools of the running event loop and the lock that guards their opening, None off ASGI"""
+    return _loops.get(asyncio.get_running_loop())
+
+
+def is_serving_loop():
+    """Whether the running event loop is the long lived loop of the ASGI server"""
+    return _get_loop_pools() is not None
+
+
+def get_conninfo(alias):
+    """Builds a libpq connection string from the settings of a connection alias"""
+    settings_dict = settings.DATABASES[alias]
+    options = {key: value for key, value in settings_dict.get("OPTIONS", {}).items() if key not in DJANGO_ONLY_OPTIONS}
+    params = {
+        "dbname": settings_dict.get("NAME"),
+        "user": settings_dict.get("USER"),
+        "password": settings_dict.get("PASSWORD"),
+        "host": settings_dict.get("HOST"),
+        "port": settings_dict.get("PORT"),
+        **options,
+    }
+    return make_conninfo(**{key: value for key, value in params.items() if value})
+
+
+def _get_connection_kwargs(alias):
+    return {
+        "autocommit": True,
+        "prepare_threshold": settings.DATABASES[alias].get("OPTIONS", {}).get("prepare_threshold", 5),
+    }
+
+
+def _get_configure(alias):
+    timezone_name = connections[alias].timezone_name
+
+    async def configure(connection):
+        await connection.execute("SELECT set_config('TimeZone', %s, false)", [timezone_name])
+
+    return configure
+
+
+async def get_async_pool(alias):
+    """
+    Returns the open async connection pool of a connection alias, on the ASGI loop
+
+    Connections use autocommit and the same time zone as Django's connection for
+    the alias, so date filters behave exactly like the synchronous path. Session
+    settings changed by an execution are reset when the connection returns.
+    """
+    pools, lock = _get_loop_pools()
+    pool = pools.get(alias)
+    if pool is not None:
+        return pool
+
+    from psycopg_pool import AsyncConnectionPool
+
+    async with lock:
+        if alias not in pools:
+            configure = _get_configure(alias)
+
+            async def reset(connection):
+                # Drop per-execution settings (budgets, application_name) before reuse
+                await connection.execute("RESET ALL")
+                await configure(connection)
+
+            pool = AsyncConnectionPool(
+                conninfo=get_conninfo(alias),
+                min_size=settings.REPORT_ASYNC_POOL_MIN_SIZE,
+                max_size=settings.REPORT_ASYNC_POOL_MAX_SIZE,
+                kwargs=_get_connection_kwargs(alias),
+                configure=configure,
+                reset=reset,
+                name=f"report-async-{alias}",
+                open=False,
+            )
+            await pool.open()
+            pools[alias] = pool
+
+    return pools[alias]
+
+
+@asynccontextmanager
+async def async_connection(alias):
+    """
+    Yields an async connection of a connection alias
+
+    From the pool of the ASGI loop, elsewhere a new connection closed on exit.
+    """
+    if is_serving_loop():
+        pool = await get_async_pool(alias)
+        async with pool.connection() as connection:
+            yield connection
+        return
+
+    from psycopg import AsyncConnection
+
+    async with await AsyncConnection.connect(get_conninfo(alias), **_get_connection_kwargs(alias)) as connection:
+        await _get_configure(alias)(connection)
+        yield connection
+
+
+async def close_async_pools():
+    """Closes every async pool opened by the running event loop"""
+    loop_pools = _get_loop_pools()
+    if loop_pools is None:
+        return
+    pools, _ = loop_pools
+    while pools:
+        _, pool = pools.popitem()
+        await pool.close()
+
+
+def serve_async_pools(application):
+    """
+    Wraps an ASGI application so its event loop keeps the async pools
+
+    Answers the lifespan protocol itself: pools are closed on shutdown.
+    """
+
+    async def wrapper(scope, receive, send):
+        loop = asyncio.get_running_loop()
+        if loop not in _loops:
+            _loops[loop] = ({}, asyncio.Lock())
+
+        if scope["type"] != "lifespan":
+            return await application(scope, receive, send)
+
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await close_async_pools()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    return wrapper
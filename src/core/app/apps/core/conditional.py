@@ -0,0 +1,108 @@
+"""
+HTTP conditional requests for report pages.
+
+Pages get an ETag built from the state they are rendered from, so a browser
+re-opening a page with the same parameters receives ``304 Not Modified``
+without the report query running or the template being rendered.
+
+- Config and catalog lists: the latest ``updated_at`` and the number of rows
+  of the models they list (deletions change the count).
+- Report results: the configuration version of the compiled plan (bumped on
+  every change of the report, so it covers ``Report.updated_at``) and the data
+  watermark of the report table (see ``apps.core.watermarks``).
+
+Responses are ``private, no-cache``: the browser keeps them but revalidates
+every time, and HTMX requests get the cached body on a 304 transparently.
+"""
+
+import hashlib
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import quote_etag
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition
+from django.views.decorators.vary import vary_on_headers
+
+# Headers that select the template variant (full page, partial or fragment)
+VARY_HEADERS = ("HX-Request", "HX-Target")
+
+
+def is_cacheable(request):
+    """Only plain reads without pending messages, a message must never be lost in a 304"""
+    return request.method in ("GET", "HEAD") and not len(get_messages(request))
+
+
+def make_etag(request, *parts):
+    """
+    Builds the ETag of a page from the state it is rendered from
+
+    The URL, the variant headers and the CSRF cookie are part of it: the page
+    embeds a CSRF token that must match the browser's cookie.
+    """
+    key = [
+        request.get_full_path(),
+        *(request.headers.get(header, "") for header in VARY_HEADERS),
+        request.COOKIES.get(settings.CSRF_COOKIE_NAME, ""),
+        *(str(part) for part in parts),
+    ]
+    return hashlib.sha256("|".join(key).encode()).hexdigest()[:32]
+
+
+def get_list_state(*querysets):
+    """Returns (last_modified, counts) of the rows listed by a page"""
+    last_modified, counts = None, []
+    for queryset in querysets:
+        state = queryset.aggregate(last_modified=Max("updated_at"), count=Count("pk"))
+        counts.append(state["count"])
+        if state["last_modified"] and (last_modified is None or state["last_modified"] > last_modified):
+            last_modified = state["last_modified"]
+    return last_modified, counts
+
+
+def conditional_page(compute):
+    """
+    Decorator of sync views answering 304 when the state of the page did not change
+
+    Args:
+        compute: Function of the request returning (last_modified, parts), computed once per request
+    """
+
+    def get_state(request):
+        if not hasattr(request, "_page_state"):
+            request._page_state = compute(request) if is_cacheable(request) else None
+        return request._page_state
+
+    def etag(request):
+        state = get_state(request)
+        return make_etag(request, *state) if state else None
+
+    def last_modified(request):
+        state = get_state(request)
+        return state[0] if state else None
+
+    def decorator(view):
+        view = condition(etag_func=etag, last_modified_func=last_modified)(view)
+        view = vary_on_headers(*VARY_HEADERS)(view)
+        return cache_control(private=True, no_cache=True)(view)
+
+    return decorator
+
+
+async def aget_not_modified(request, etag):
+    """Returns the 304 response when the browser already has this ETag, None otherwise"""
+    if not await sync_to_async(is_cacheable)(request):
+        return None
+    response = get_conditional_response(request, etag=quote_etag(etag))
+    if response is not None:
+        set_validators(response, etag)
+    return response
+
+
+def set_validators(response, etag):
+    response["ETag"] = quote_etag(etag)
+    patch_cache_control(response, private=True, no_cache=True)
+    patch_vary_headers(response, VARY_HEADERS)
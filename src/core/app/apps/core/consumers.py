@@ -0,0 +1,88 @@
+import logging
+from datetime import datetime
+from urllib.parse import parse_qs
+
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+from django.conf import settings
+
+from apps.core.live import fetch_new_rows, get_watermark, group_name, poller, to_json_values
+from apps.core.plans import aget_report_plan
+
+logger = logging.getLogger(__name__)
+
+# Close codes sent to the browser
+CLOSE_NOT_FOUND = 4404
+CLOSE_NOT_SUPPORTED = 4400
+
+
+class ReportLiveConsumer(AsyncJsonWebsocketConsumer):
+    """
+    Streams the new rows of a report to a viewer in live mode
+
+    The viewer may send ``?after=<ISO timestamp>`` (its last seen row) to catch
+    up after a reconnection. Without it, only rows arriving from now on are sent.
+    """
+
+    plan = None
+
+    async def connect(self):
+        from apps.core.models import Report
+
+        try:
+            self.plan = await aget_report_plan(self.scope["url_route"]["kwargs"]["report_id"])
+        except Report.DoesNotExist:
+            await self.close(code=CLOSE_NOT_FOUND)
+            return
+        if not self.plan.supports_live:
+            self.plan = None
+            await self.close(code=CLOSE_NOT_SUPPORTED)
+            return
+
+        await self.accept()
+        await self.channel_layer.group_add(group_name(self.plan.id), self.channel_name)
+        poller.subscribe(self.plan)
+
+        query = parse_qs(self.scope["query_string"].decode())
+        try:
+            after = datetime.fromisoformat(query["after"][0])
+        except (KeyError, ValueError):
+            after = None
+
+        if after:
+            self.last_seen = after
+            columns, rows, watermarks = await fetch_new_rows(self.plan, after, settings.REPORT_LIVE_MAX_ROWS)
+            await self.send_rows(columns, to_json_values(rows), [value.isoformat() for value in watermarks])
+        else:
+            self.last_seen = await get_watermark(self.plan)
+            await self.send_json({"type": "watermark", "watermark": self.last_seen and self.last_seen.isoformat()})
+
+    async def disconnect(self, code):
+        if self.plan is None:
+            return
+        await self.channel_layer.group_discard(group_name(self.plan.id), self.channel_name)
+        poller.unsubscribe(self.plan)
+
+    async def live_rows(self, event):
+        """New rows found by the watermark poller of the report's table"""
+        await self.send_rows(event["columns"], event["rows"], event["watermarks"], event["truncated"])
+
+    async def send_rows(self, columns, rows, watermarks, truncated=False):
+        # Skip what this viewer has already seen (catch up, retried ticks)
+        fresh = [
+            (row, watermark)
+            for row, watermark in zip(rows, watermarks)
+            if self.last_seen is None or datetime.fromisoformat(watermark) > self.last_seen
+        ]
+        if not fresh:
+            return
+
+        self.last_seen = datetime.fromisoformat(fresh[-1][1])
+        await self.send_json(
+            {
+                "type": "rows",
+                "columns": columns,
+                "rows": [row for row, _ in fresh],
+                "watermark": fresh[-1][1],
+                "truncated": truncated,
+            }
+        )
@@ -0,0 +1,6 @@
+class ReportQueryCancelled(Exception):
+    """Raised when a report query was cancelled because a newer request superseded it"""
+
+
+class ReportBudgetExceeded(Exception):
+    """Raised when a report execution exceeds one of its resource budgets"""
@@ -0,0 +1,186 @@
+"""
+Rendering of report results to downloadable files.
+
+Shared by the PDF view, report packs and any other export of a report
+execution, so every path produces exactly the same document.
+"""
+
+import csv
+import io
+import logging
+import math
+import zipfile
+from datetime import datetime
+
+from asgiref.sync import sync_to_async
+from django.core.files import File
+
+from apps.core import profiling
+from apps.utils.pdf_utils import PDFUtils
+
+logger = logging.getLogger(__name__)
+
+
+def get_company_data():
+    """
+    Returns the data of the default company for the PDF header
+
+    Raises:
+        Exception: If there is no default company
+    """
+    from apps.company.models import Company
+
+    company = Company.objects.filter(is_default=True).order_by("-updated_at").first()
+    if company is None:
+        raise Exception("Debe crear una compañía predeterminada.")
+    return company.to_dict_for_pdf()
+
+
+def get_filename(plan, extension):
+    return f"{plan.name.lower().replace(' ', '_')}.{extension}"
+
+
+def get_volume_filename(plan, number, volumes):
+    # Zero padded so the volumes sort in order
+    width = len(str(volumes))
+    return f"{plan.name.lower().replace(' ', '_')}_volumen_{number:0{width}d}_de_{volumes}.pdf"
+
+
+def render_pdf(plan, columns, rows, total_count, company_data, start_date, end_date, volume=None):
+    """
+    Renders the result of a report execution as a PDF
+
+    Args:
+        plan: ReportPlan of the executed report
+        columns: Column names of the result
+        rows: Result rows
+        total_count: Total number of rows of the result
+        company_data: Company data for the header, see ``get_company_data``
+        start_date: Start date filter (string YYYY-MM-DD)
+        end_date: End date filter (string YYYY-MM-DD)
+        volume: (number, volumes, first row offset) when the rows are one volume of the result
+
+    Returns:
+        File: The PDF file
+    """
+    from apps.core.models import Report
+
+    # Convert dates for display
+    start_date_obj = datetime.fromisoformat(start_date).date()
+    end_date_obj = datetime.fromisoformat(end_date).date()
+
+    context = {
+        "title": plan.name,
+        "start_date": start_date_obj.strftime("%d/%m/%Y"),
+        "end_date": end_date_obj.strftime("%d/%m/%Y"),
+        "total_regs": total_count,
+    }
+    filename, first_index = get_filename(plan, "pdf"), 1
+    if volume is not None:
+        number, volumes, offset = volume
+        first_index = offset + 1
+        context.update(volume=number, volumes=volumes, first_reg=first_index, last_reg=offset + len(rows))
+        filename = get_volume_filename(plan, number, volumes)
+
+    with profiling.span("pdf"):
+        return PDFUtils(
+            company=company_data,
+            template="report_generic.html",
+            is_landscape=plan.orientation == Report.Orientation.HORIZONTAL,
+            context=context,
+        ).gen_with_rows(
+            filename=filename,
+            columns=columns,
+            rows=rows,
+            columns_number=plan.get_numeric_columns(columns),
+            first_index=first_index,
+        )
+
+
+def render_csv(plan, columns, rows):
+    """
+    Renders the result of a report execution as a CSV (UTF-8 with BOM, so it opens in Excel)
+
+    Returns:
+        File: The CSV file
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    writer.writerows(rows)
+    return File(io.BytesIO(buffer.getvalue().encode("utf-8-sig")), name=get_filename(plan, "csv"))
+
+
+def get_volume_count(total_count, rows_per_volume):
+    """Number of PDF volumes of a result, 1 when it is not split"""
+    if not rows_per_volume or total_count <= rows_per_volume:
+        return 1
+    return math.ceil(total_count / rows_per_volume)
+
+
+class ZipStream(io.RawIOBase):
+    """Write-only stream collecting the output of a ``ZipFile`` until it is drained"""
+
+    def __init__(self):
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self):
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+async def astream_pdf_volumes(plan, first_volume, company_data, start_date, end_date, owner, rows_per_volume):
+    """
+    Renders a result in PDF volumes of ``rows_per_volume`` rows and yields them as a ZIP
+
+    Each volume is fetched right before it is rendered, continuing where the
+    previous one ended (see ``ReportPlan.aexecute_volume``), and is sent as soon
+    as it is ready, so memory holds one volume whatever the size of the report
+    and no connection is held while wkhtmltopdf runs. The status of a streamed
+    response cannot change anymore: a volume that fails ends the ZIP with
+    ``errores.txt``, like the report packs.
+
+    Args:
+        plan: ReportPlan of the report
+        first_volume: (columns, rows, total_count, cursor) of the first volume, already executed
+        owner: Identifies the requester (user or session) for fair admission
+
+    Yields:
+        bytes: Chunks of the ZIP file
+    """
+    columns, rows, total_count, cursor = first_volume
+    volumes = get_volume_count(total_count, rows_per_volume)
+    stream = ZipStream()
+
+    with zipfile.ZipFile(stream, "w", zipfile.ZIP_DEFLATED) as archive:
+        for number in range(1, volumes + 1):
+            offset = (number - 1) * rows_per_volume
+            try:
+                if number > 1:
+                    columns, rows, _, cursor = await plan.aexecute_volume(
+                        rows_per_volume, start_date, end_date, owner=owner, cursor=cursor
+                    )
+                if not rows:
+                    # Rows deleted since the count, there is nothing left to render
+                    break
+                pdf = await sync_to_async(render_pdf, thread_sensitive=False)(
+                    plan, columns, rows, total_count, company_data, start_date, end_date, (number, volumes, offset)
+                )
+            except Exception as e:
+                logger.info("Error generating volume %s of %s of report %s: %s", number, volumes, plan.id, e)
+                archive.writestr("errores.txt", f"Volumen {number} de {volumes}: {e}")
+                break
+
+            archive.writestr(pdf.name, pdf.read())
+            yield stream.drain()
+
+    # Central directory, written when the archive is closed
+    yield stream.drain()
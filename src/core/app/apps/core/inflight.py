@@ -0,0 +1,84 @@
+"""
+Registry of in-flight report queries.
+
+Every async report execution tags its backend with a unique
+``application_name`` and registers ``(alias, pid, token)`` under an
+execution key (user or session + report + view). A newer execution for the
+same key cancels the previous backend with ``pg_cancel_backend``. Matching the
+application name protects against cancelling a pooled connection that has
+already moved on to another query. A backend between two statements has no
+query to cancel, so executions check ``is_current`` before each statement.
+"""
+
+import logging
+import uuid
+
+from django.core.cache import cache
+
+from apps.core import metrics
+
+logger = logging.getLogger(__name__)
+
+# In-flight entries expire on their own if a process dies mid query
+INFLIGHT_TIMEOUT = 60 * 60
+
+CANCEL_QUERY = """
+    SELECT pg_cancel_backend(pid)
+    FROM pg_stat_activity
+    WHERE pid = %s AND application_name = %s AND state = 'active'
+"""
+
+
+def new_token():
+    return uuid.uuid4().hex
+
+
+def application_name(token):
+    return f"report:{token}"
+
+
+def _cache_key(execution_key):
+    return f"report:inflight:{execution_key}"
+
+
+async def register(execution_key, alias, pid, token):
+    """
+    Registers a running query and cancels the one it supersedes
+
+    Returns:
+        bool: True if a previous query for the same key was cancelled
+    """
+    key = _cache_key(execution_key)
+    previous = await cache.aget(key)
+    await cache.aset(key, {"alias": alias, "pid": pid, "token": token}, INFLIGHT_TIMEOUT)
+
+    if previous and previous["token"] != token:
+        return await cancel(previous)
+    return False
+
+
+async def is_current(execution_key, token):
+    """Returns True if the query identified by token is still the latest for its key"""
+    entry = await cache.aget(_cache_key(execution_key))
+    return entry is not None and entry["token"] == token
+
+
+async def unregister(execution_key, token):
+    """Removes the registry entry, unless a newer query already replaced it"""
+    if await is_current(execution_key, token):
+        await cache.adelete(_cache_key(execution_key))
+
+
+async def cancel(entry):
+    """Cancels the backend of a registry entry, returns True if a query was cancelled"""
+    from apps.core.async_db import async_connection
+
+    async with async_connection(entry["alias"]) as connection:
+        cursor = await connection.execute(CANCEL_QUERY, [entry["pid"], application_name(entry["token"])])
+        row = await cursor.fetchone()
+        cancelled = bool(row and row[0])
+
+    if cancelled:
+        logger.info("Cancelled superseded report query (alias: %s, pid: %s)", entry["alias"], entry["pid"])
+        await metrics.aincr(metrics.REPORT_CANCELLED_SUPERSEDED)
+    return cancelled
@@ -0,0 +1,171 @@
+"""
+Join planning for reports with columns of related tables.
+
+A report reads its own table and can include columns of the tables its
+foreign keys reference, directly or through other referenced tables up to
+``REPORT_JOIN_MAX_DEPTH`` keys away. The paths come from the synchronized
+metadata (``Column.foreign_table`` and ``foreign_column``, see
+``sync_database_metadata``):
+
+- Only many-to-one keys are followed and they are joined with LEFT JOIN, so a
+  join never adds nor removes rows of the report table. Date filters, counts
+  and pagination on the report table give the same rows with or without joins.
+- Each table is reached through its shortest path. Among paths of the same
+  length the one through indexed keys wins, then the first key in column order.
+- Only the tables holding a selected column, and the tables on their path,
+  are joined.
+
+The report table is aliased ``t`` and the joined tables ``j1``, ``j2``... in
+the order they are needed. Reports of a single table keep unqualified column
+names, their SQL does not change.
+"""
+
+from collections import defaultdict
+from dataclasses import dataclass
+
+from django.conf import settings
+from psycopg import sql
+
+from apps.core.plans import as_string, identifier
+
+BASE_ALIAS = "t"
+
+
+@dataclass(frozen=True)
+class JoinStep:
+    """A foreign key followed from a table to the table it references"""
+
+    column_name: str
+    table: object
+    target_column: str
+
+
+def get_join_paths(table, max_depth=None):
+    """
+    Returns the tables reachable from a table through its foreign keys
+
+    Args:
+        table: ``Table`` the paths start from
+        max_depth: Keys followed at most, ``REPORT_JOIN_MAX_DEPTH`` by default
+
+    Returns:
+        dict: {table id: (Table, tuple of JoinStep)}, the table itself with an empty path
+    """
+    from apps.core.models import Column, Table
+
+    if max_depth is None:
+        max_depth = settings.REPORT_JOIN_MAX_DEPTH
+
+    paths = {table.pk: (table, ())}
+    if max_depth <= 0:
+        return paths
+
+    # Only the keys of the tables reached so far and the tables they reference are loaded, level by level
+    frontier = [table]
+    for _ in range(max_depth):
+        keys = defaultdict(list)
+        key_columns = Column.objects.filter(
+            table_id__in=[source.pk for source in frontier],
+            is_active=True,
+            is_foreign_key=True,
+            foreign_table__isnull=False,
+        ).order_by("-is_indexed", "ordinal_position")
+        for column in key_columns:
+            keys[column.table_id].append(column)
+        if not keys:
+            break
+
+        tables = {
+            (candidate.schema_name, candidate.table_name): candidate
+            for candidate in Table.objects.filter(
+                database_id=table.database_id,
+                is_active=True,
+                table_name__in={key.foreign_table for source_keys in keys.values() for key in source_keys},
+            ).select_related("database")
+        }
+        # Keys synchronized before the referenced column was recorded point to the primary key
+        primary_keys = {}
+        for column in Column.objects.filter(table__in=tables.values(), is_active=True, is_primary_key=True).order_by(
+            "ordinal_position"
+        ):
+            primary_keys.setdefault(column.table_id, column.column_name)
+
+        next_frontier = []
+        for source in frontier:
+            for key in keys[source.pk]:
+                target = tables.get((key.foreign_schema or source.schema_name, key.foreign_table))
+                if target is None or target.pk in paths:
+                    continue
+                target_column = key.foreign_column or primary_keys.get(target.pk)
+                if not target_column:
+                    continue
+                paths[target.pk] = (target, (*paths[source.pk][1], JoinStep(key.column_name, target, target_column)))
+                next_frontier.append(target)
+        frontier = next_frontier
+    return paths
+
+
+def get_reachable_tables(table, max_depth=None):
+    """Returns the tables a report of a table can include columns from, the table first"""
+    return [target for target, _ in get_join_paths(table, max_depth).values()]
+
+
+class JoinPlanner:
+    """
+    Resolves the column references of a report and the joins they need
+
+    Args:
+        table: Report ``Table``
+        columns: ``Column`` instances the report reads
+    """
+
+    def __init__(self, table, columns, max_depth=None):
+        self.table = table
+        needs_joins = any(column.table_id != table.pk for column in columns)
+        self.paths = get_join_paths(table, max_depth) if needs_joins else {table.pk: (table, ())}
+        self.qualified = any(column.table_id != table.pk and column.table_id in self.paths for column in columns)
+        self.aliases = {table.pk: BASE_ALIAS}
+        self.joins = []
+        self.joined_tables = []
+
+    def is_reachable(self, column):
+        return column.table_id in self.paths
+
+    def is_base(self, column):
+        return column.table_id == self.table.pk
+
+    def ref(self, column):
+        """Returns the composed reference of a column, joining its table when needed"""
+        if not self.qualified:
+            return identifier(column.column_name)
+        return identifier(self._join(column.table_id), column.column_name)
+
+    def _join(self, table_id):
+        alias = BASE_ALIAS
+        for step in self.paths[table_id][1]:
+            if step.table.pk not in self.aliases:
+                target_alias = f"j{len(self.joins) + 1}"
+                self.joins.append(
+                    sql.SQL(" LEFT JOIN {} AS {} ON {} = {}").format(
+                        identifier(step.table.schema_name, step.table.table_name),
+                        identifier(target_alias),
+                        identifier(alias, step.column_name),
+                        identifier(target_alias, step.target_column),
+                    )
+                )
+                self.aliases[step.table.pk] = target_alias
+                self.joined_tables.append(step.table)
+            alias = self.aliases[step.table.pk]
+        return alias
+
+    @property
+    def base_sql(self):
+        """The report table, with its alias when columns are qualified"""
+        table_sql = identifier(self.table.schema_name, self.table.table_name)
+        if not self.qualified:
+            return as_string(table_sql)
+        return as_string(sql.SQL("{} AS {}").format(table_sql, identifier(BASE_ALIAS)))
+
+    @property
+    def join_sql(self):
+        return as_string(sql.Composed(self.joins))
@@ -0,0 +1,220 @@
+"""
+Live tail of reports.
+
+Viewers of a report in live mode receive only the rows newer than what they
+have already seen, pushed through the channel layer. New rows are detected
+per source (database alias, table and timestamp column) by a single
+watermark poller: every ASGI process with viewers of a source runs a poller
+task, but only the one holding the source lock in Redis queries the
+database. Each tick costs one ``max(timestamp)`` query, plus one query per
+watched report when the watermark moved, however many viewers there are.
+
+When ``REPORT_LIVE_USE_NOTIFY`` is enabled the poller also listens to
+``NOTIFY`` events sent by a trigger on the table (see the
+``install_live_notify_trigger`` command) and only polls when the table
+changed, with a slower fallback poll.
+
+Rows committed late with a timestamp older than the watermark are not
+streamed, viewers see them on the next full execution of the report.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import time
+import uuid
+from collections import Counter
+from datetime import datetime
+
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+
+from apps.core.admission import get_async_client
+from apps.core.async_db import async_connection, get_conninfo
+from apps.core.plans import aget_report_plan
+
+logger = logging.getLogger(__name__)
+
+
+def get_source_key(plan):
+    """Identifies the table and timestamp column a live report is watching"""
+    source = f"{plan.db_alias}|{plan.from_sql}|{plan.date_column}"
+    return hashlib.sha1(source.encode()).hexdigest()[:16]
+
+
+def group_name(report_id):
+    return f"report-live-{report_id}"
+
+
+def to_json_values(rows):
+    """Converts rows to JSON types (dates, decimals...), the channel layer only carries those"""
+    return json.loads(json.dumps([list(row) for row in rows], cls=DjangoJSONEncoder))
+
+
+async def get_watermark(plan):
+    """Returns the newest timestamp of the table of a live report"""
+    async with async_connection(plan.db_alias) as connection:
+        # Empty params so the escaped '%' of identifiers is unescaped like in every other query
+        cursor = await connection.execute(f"SELECT max({plan.date_column}) FROM {plan.from_sql}", {})
+        return (await cursor.fetchone())[0]
+
+
+async def fetch_new_rows(plan, after, limit):
+    """
+    Returns the rows of a live report newer than a watermark, oldest first
+
+    Returns:
+        tuple: (columns, rows, watermarks), the watermark of every row apart
+    """
+    query, params = plan.build_live(after, limit)
+    async with async_connection(plan.db_alias) as connection:
+        cursor = await connection.execute(query, params)
+        columns = [column.name for column in cursor.description[:-1]]
+        rows = await cursor.fetchall()
+    return columns, [row[:-1] for row in rows], [row[-1] for row in rows]
+
+
+class WatermarkPoller:
+    """Registry of the live viewers of this process and their source pollers"""
+
+    def __init__(self):
+        self._viewers = {}
+        self._tasks = {}
+        self._token = uuid.uuid4().hex
+
+    def subscribe(self, plan):
+        key = get_source_key(plan)
+        self._viewers.setdefault(key, Counter())[plan.id] += 1
+        task = self._tasks.get(key)
+        if task is None or task.done():
+            self._tasks[key] = asyncio.create_task(self._run(key, plan))
+
+    def unsubscribe(self, plan):
+        key = get_source_key(plan)
+        viewers = self._viewers.get(key)
+        if viewers is None:
+            return
+        viewers[plan.id] -= 1
+        if viewers[plan.id] <= 0:
+            del viewers[plan.id]
+        if not viewers:
+            # The poller task stops at its next tick
+            del self._viewers[key]
+
+    def _keys(self, key):
+        prefix = f"report:live:{key}"
+        return f"{prefix}:lock", f"{prefix}:watermark", f"{prefix}:reports"
+
+    async def _hold_lock(self, client, lock_key, ttl):
+        """Takes or renews the poller lock of a source, returns True if this process holds it"""
+        if await client.set(lock_key, self._token, nx=True, px=ttl):
+            return True
+        if await client.get(lock_key) == self._token.encode():
+            await client.pexpire(lock_key, ttl)
+            return True
+        return False
+
+    async def _run(self, key, plan):
+        interval = settings.REPORT_LIVE_POLL_INTERVAL
+        ttl = int(interval * 3 * 1000)
+        lock_key, watermark_key, reports_key = self._keys(key)
+        client = get_async_client()
+        listener = None
+        last_poll = 0
+
+        try:
+            while self._viewers.get(key):
+                try:
+                    # Announce the reports watched from this process, the lock holder may be another one
+                    now = time.time()
+                    await client.zadd(reports_key, {str(report_id): now for report_id in self._viewers[key]})
+
+                    if not await self._hold_lock(client, lock_key, ttl):
+                        await asyncio.sleep(interval)
+                        continue
+
+                    changed = True
+                    if settings.REPORT_LIVE_USE_NOTIFY:
+                        if listener is None:
+                            listener = await self._listen(plan)
+                        changed = await self._wait_notify(listener, plan, interval)
+                        changed = changed or time.monotonic() - last_poll >= settings.REPORT_LIVE_NOTIFY_FALLBACK
+                    else:
+                        await asyncio.sleep(interval)
+
+                    if changed:
+                        last_poll = time.monotonic()
+                        await self._poll(client, plan, watermark_key, reports_key, ttl / 1000)
+                except Exception:
+                    # Keep streaming to the viewers, the next tick starts over
+                    logger.exception("Live poll of %s failed", plan.from_sql)
+                    if listener is not None:
+                        await listener.close()
+                        listener = None
+                    await asyncio.sleep(interval)
+        finally:
+            if listener is not None:
+                await listener.close()
+            if await client.get(lock_key) == self._token.encode():
+                await client.delete(lock_key)
+            if self._tasks.get(key) is asyncio.current_task():
+                del self._tasks[key]
+
+    async def _listen(self, plan):
+        import psycopg
+
+        listener = await psycopg.AsyncConnection.connect(get_conninfo(plan.db_alias), autocommit=True)
+        await listener.execute(f"LISTEN {settings.REPORT_LIVE_NOTIFY_CHANNEL}")
+        return listener
+
+    async def _wait_notify(self, listener, plan, timeout):
+        """Waits up to timeout for a change notification of the table of the source"""
+        table = plan.from_sql.replace("%%", "%")
+        changed = False
+        async for notify in listener.notifies(timeout=timeout):
+            changed = changed or notify.payload == table
+        return changed
+
+    async def _poll(self, client, plan, watermark_key, reports_key, ttl):
+        watermark = await get_watermark(plan)
+        if watermark is None:
+            return
+
+        previous = await client.get(watermark_key)
+        if previous is None:
+            await client.set(watermark_key, watermark.isoformat())
+            return
+        previous = datetime.fromisoformat(previous.decode())
+        if watermark <= previous:
+            return
+
+        # Reports watched from any process, announcements older than the lock ttl are gone
+        now = time.time()
+        await client.zremrangebyscore(reports_key, "-inf", now - ttl)
+        channel_layer = get_channel_layer()
+        limit = settings.REPORT_LIVE_MAX_ROWS
+        for report_id in await client.zrange(reports_key, 0, -1):
+            report_plan = await aget_report_plan(report_id.decode())
+            if not report_plan.supports_live or get_source_key(report_plan) != get_source_key(plan):
+                continue
+
+            columns, rows, watermarks = await fetch_new_rows(report_plan, previous, limit)
+            if rows:
+                await channel_layer.group_send(
+                    group_name(report_plan.id),
+                    {
+                        "type": "live.rows",
+                        "columns": columns,
+                        "rows": to_json_values(rows),
+                        "watermarks": [value.isoformat() for value in watermarks],
+                        "truncated": len(rows) >= limit,
+                    },
+                )
+
+        # Only moves once the new rows were sent, a failed tick sends them again
+        await client.set(watermark_key, watermark.isoformat())
+
+
+poller = WatermarkPoller()
@@ -0,0 +1,178 @@
+"""
+Comando de Django que recomienda (y opcionalmente crea) los índices que usan los reportes.
+- Índices GIN de trigramas (pg_trgm) en las columnas de texto que recorre la
+  búsqueda dentro de los resultados, para que ILIKE '%texto%' no lea toda la tabla.
+- Índices B-tree en la columna de fecha que filtra cada reporte.
+Sin --create solo muestra las sentencias. Con --create las ejecuta con
+CREATE INDEX CONCURRENTLY, sin bloquear las escrituras de las tablas.
+"""
+
+import hashlib
+import re
+from dataclasses import dataclass
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, connections
+from psycopg import sql
+
+from apps.core.models import Report, Table
+
+BTREE = "btree"
+TRIGRAM = "trigram"
+
+# PostgreSQL truncates longer identifiers
+MAX_NAME_LENGTH = 63
+
+SIMPLE_IDENTIFIER = re.compile(r"[a-z_][a-z0-9_$]*")
+
+
+@dataclass(frozen=True)
+class IndexAdvice:
+    """An index a report filters with"""
+
+    db_alias: str
+    schema_name: str
+    table_name: str
+    column_name: str
+    method: str
+
+    @property
+    def name(self):
+        suffix = "trgm" if self.method == TRIGRAM else "idx"
+        name = re.sub(r"\W", "_", f"report_{self.table_name}_{self.column_name}_{suffix}".lower())
+        if len(name) <= MAX_NAME_LENGTH:
+            return name
+        digest = hashlib.sha1(name.encode()).hexdigest()[:8]
+        return f"{name[: MAX_NAME_LENGTH - 9]}_{digest}"
+
+    def build(self):
+        """Returns the CREATE INDEX statement, composed"""
+        names = {
+            "name": sql.Identifier(self.name),
+            "table": sql.Identifier(self.schema_name, self.table_name),
+            "column": sql.Identifier(self.column_name),
+        }
+        if self.method == TRIGRAM:
+            statement = "CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {table} USING gin ({column} gin_trgm_ops)"
+        else:
+            statement = "CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {table} ({column})"
+        return sql.SQL(statement).format(**names)
+
+    def exists_in(self, indexdefs):
+        """Whether one of the index definitions (pg_indexes.indexdef) of the table already serves it"""
+        column = self.column_name
+        if not SIMPLE_IDENTIFIER.fullmatch(column):
+            column = '"' + column.replace('"', '""') + '"'
+        if self.method == TRIGRAM:
+            return any(
+                f"{column} gin_trgm_ops" in indexdef or f"{column} gist_trgm_ops" in indexdef for indexdef in indexdefs
+            )
+        # A B-tree serves the range filter when the column leads it
+        leading = re.compile(rf"USING btree \({re.escape(column)}[ ,)]")
+        return any(leading.search(indexdef) for indexdef in indexdefs)
+
+
+def get_report_indexes(report):
+    """Returns the indexes the filters and the search of a report use"""
+    report_columns = [
+        rc for rc in report.report_columns.filter(is_visible=True).select_related("column__table") if rc.column.is_active
+    ]
+    db_alias = report.table.database.alias
+
+    def advice(column, method):
+        return IndexAdvice(db_alias, column.table.schema_name, column.table.table_name, column.column_name, method)
+
+    # Same date column as the compiled plan: a timestamp, of the report table when there is one
+    timestamps = [rc.column for rc in report_columns if rc.column.data_type.lower().startswith("timestamp")]
+    date_column = min(timestamps, key=lambda column: column.table_id != report.table_id, default=None)
+    if date_column:
+        yield advice(date_column, BTREE)
+    for rc in report_columns:
+        if rc.column.is_searchable:
+            yield advice(rc.column, TRIGRAM)
+
+
+class Command(BaseCommand):
+    help = "Recomienda y crea los índices (fecha y búsqueda con pg_trgm) que usan los reportes"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--report", type=int, action="append", default=[], help="Id del reporte (se puede repetir, default: todos)"
+        )
+        parser.add_argument(
+            "--min-rows",
+            type=int,
+            default=10000,
+            help="Omitir tablas con menos filas sincronizadas, se recorren rápido sin índice (default: 10000)",
+        )
+        parser.add_argument(
+            "--create", default=False, action="store_true", help="Crear los índices (CREATE INDEX CONCURRENTLY)"
+        )
+
+    def handle(self, *args, **options):
+        reports = Report.objects.filter(is_active=True).select_related("table__database")
+        if options["report"]:
+            reports = reports.filter(pk__in=options["report"])
+
+        advised = {}
+        for report in reports:
+            for index in get_report_indexes(report):
+                advised.setdefault(index, []).append(report.name)
+        if not advised:
+            self.stdout.write(self.style.WARNING("⚠️  No hay reportes con columnas de fecha o de texto"))
+            return
+
+        small_tables = self._get_small_tables(options["min_rows"])
+        failures = 0
+        for db_alias in sorted({index.db_alias for index in advised}):
+            connection = connections[db_alias]
+            if connection.vendor != "postgresql":
+                raise CommandError(f"❌ {db_alias}: los índices de búsqueda requieren PostgreSQL")
+
+            self.stdout.write(self.style.SUCCESS(f"\n🔍 Base de datos: {db_alias}"))
+            with connection.cursor() as cursor:
+                missing = []
+                for index in sorted((index for index in advised if index.db_alias == db_alias), key=repr):
+                    if (db_alias, index.schema_name, index.table_name) in small_tables:
+                        continue
+                    cursor.execute(
+                        "SELECT indexdef FROM pg_indexes WHERE schemaname = %s AND tablename = %s",
+                        [index.schema_name, index.table_name],
+                    )
+                    if index.exists_in([row[0] for row in cursor.fetchall()]):
+                        continue
+                    missing.append(index)
+
+                if not missing:
+                    self.stdout.write("✅ Los reportes ya tienen sus índices")
+                    continue
+
+                if options["create"] and any(index.method == TRIGRAM for index in missing):
+                    try:
+                        cursor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+                    except DatabaseError as e:
+                        raise CommandError(f"❌ No se pudo instalar la extensión pg_trgm: {e}") from None
+
+                for index in missing:
+                    statement = index.build().as_string(cursor.connection)
+                    self.stdout.write(f"-- {', '.join(advised[index])}\n{statement};")
+                    if not options["create"]:
+                        continue
+                    try:
+                        cursor.execute(statement)
+                        self.stdout.write(self.style.SUCCESS(f"✅ Índice creado: {index.name}"))
+                    except DatabaseError as e:
+                        # A failed concurrent build leaves an invalid index behind, IF NOT EXISTS would keep it
+                        failures += 1
+                        self.stdout.write(
+                            self.style.ERROR(f"❌ {index.name}: {e} (elimínelo con DROP INDEX CONCURRENTLY y reintente)")
+                        )
+
+        if not options["create"]:
+            self.stdout.write("\nℹ️  Ejecute con --create para crear los índices (requiere la extensión pg_trgm)")
+        if failures:
+            raise CommandError(f"❌ {failures} índices no se pudieron crear")
+
+    def _get_small_tables(self, min_rows):
+        small = Table.objects.filter(row_count__lt=min_rows).select_related("database")
+        return {(table.database.alias, table.schema_name, table.table_name) for table in small}
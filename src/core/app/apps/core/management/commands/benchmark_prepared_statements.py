@@ -0,0 +1,114 @@
+"""
+Comando de Django para medir el ahorro de las sentencias preparadas de un reporte.
+Recorre las páginas de un reporte ejecutando la consulta con los valores
+interpolados en el texto (analizada y planificada en cada página) y como
+sentencia preparada con parámetros, y muestra el tiempo de planificación medido
+por Postgres y cuántas ejecuciones reutilizaron el plan genérico.
+"""
+
+import statistics
+import time
+
+import psycopg
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.core.async_db import get_conninfo
+from apps.core.models import Report
+from apps.core.plans import get_report_plan
+
+
+class Command(BaseCommand):
+    help = "Compara la ejecución paginada de un reporte con y sin sentencias preparadas"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--report-id", type=int, required=True, help="ID del reporte a ejecutar")
+        parser.add_argument("--start-date", type=str, default=None, help="Fecha inicial (YYYY-MM-DD)")
+        parser.add_argument("--end-date", type=str, default=None, help="Fecha final (YYYY-MM-DD)")
+        parser.add_argument("--pages", type=int, default=50, help="Número de páginas a recorrer")
+        parser.add_argument("--page-size", type=int, default=10, help="Filas por página")
+        parser.add_argument(
+            "--plan-cache-mode",
+            choices=["auto", "force_generic_plan", "force_custom_plan"],
+            default="auto",
+            help="plan_cache_mode de Postgres para la sentencia preparada",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            plan = get_report_plan(options["report_id"])
+        except Report.DoesNotExist as e:
+            raise CommandError(f"El reporte {options['report_id']} no existe") from e
+
+        pages = []
+        for page in range(options["pages"]):
+            query, _, params = plan.build(
+                options["start_date"], options["end_date"], options["page_size"], page * options["page_size"]
+            )
+            if not query:
+                raise CommandError("El reporte no tiene columnas visibles")
+            pages.append((query, params))
+
+        self.stdout.write(self.style.SUCCESS(f"🚀 {plan.name}: {len(pages)} páginas de {options['page_size']} filas"))
+
+        conninfo = get_conninfo(plan.db_alias)
+
+        # Values interpolated in the text: every page is a new statement, parsed and planned again
+        with psycopg.connect(conninfo, autocommit=True, cursor_factory=psycopg.ClientCursor) as connection:
+            with connection.cursor() as cursor:
+                literal_pages = [cursor.mogrify(query, params) for query, params in pages]
+                literal_times = self._run(cursor, [(query, None) for query in literal_pages], prepare=False)
+                literal_planning = [self._planning_time(cursor, query) for query in literal_pages]
+
+        # Bound parameters on a prepared statement: parsed once, planned once when the generic plan is used
+        with psycopg.connect(conninfo, autocommit=True, prepare_threshold=0) as connection:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT set_config('plan_cache_mode', %s, false)", [options["plan_cache_mode"]])
+                prepared_times = self._run(cursor, pages, prepare=True)
+                generic_plans, custom_plans = self._plan_counts(cursor)
+
+        self._write_times("Sin preparar", literal_times)
+        self._write_times("Preparada", prepared_times)
+
+        planning = statistics.fmean(literal_planning)
+        self.stdout.write(f"🧠 Planificación sin preparar: {planning:.2f}ms por página")
+        if generic_plans is not None:
+            self.stdout.write(f"♻️  Sentencia preparada: {generic_plans} planes genéricos, {custom_plans} personalizados")
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"✅ Planificación ahorrada: ~{planning * generic_plans:.1f}ms en {len(pages)} páginas"
+                )
+            )
+
+    def _run(self, cursor, pages, prepare):
+        times = []
+        for query, params in pages:
+            started = time.perf_counter()
+            cursor.execute(query, params, prepare=prepare)
+            cursor.fetchall()
+            times.append((time.perf_counter() - started) * 1000)
+        return times
+
+    def _planning_time(self, cursor, query):
+        cursor.execute(f"EXPLAIN (SUMMARY, FORMAT JSON) {query}")
+        return cursor.fetchone()[0][0]["Planning Time"]
+
+    def _plan_counts(self, cursor):
+        """Generic and custom plans used by the page statement, the most executed one (PostgreSQL 14+)"""
+        if cursor.connection.info.server_version < 140000:
+            return None, None
+        cursor.execute(
+            """
+            SELECT generic_plans, custom_plans FROM pg_prepared_statements
+            ORDER BY generic_plans + custom_plans DESC LIMIT 1
+            """,
+            prepare=False,
+        )
+        return cursor.fetchone() or (None, None)
+
+    def _write_times(self, label, times):
+        summary = f"{label}: total={sum(times):.0f}ms media={statistics.mean(times):.2f}ms"
+        # Percentiles need at least two pages
+        if len(times) >= 2:
+            percentiles = statistics.quantiles(times, n=100)
+            summary += f" p50={percentiles[49]:.2f}ms p95={percentiles[94]:.2f}ms"
+        self.stdout.write(summary)
@@ -0,0 +1,251 @@
+"""
+Comando de Django para medir el rendimiento del flujo de reportes.
+Mide la ejecución de un reporte (sin intervalo y en cada intervalo), las
+consultas de conteo, la generación del PDF, la sincronización de metadatos y
+las vistas principales, y escribe los resultados en JSON para compararlos
+entre versiones (por ejemplo sobre los datos de generate_synthetic_data).
+"""
+
+import json
+import platform
+import statistics
+import subprocess
+import time
+from datetime import date, datetime, timedelta
+from io import StringIO
+
+import django
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import Client
+from django.urls import reverse
+
+from apps.core.exports import get_company_data, render_pdf
+from apps.core.management.commands.generate_synthetic_data import INTERVAL_REPORT_NAME, PLAIN_REPORT_NAME
+from apps.core.models import Report
+from apps.core.plans import compile_plan
+
+
+def summarize(timings):
+    """Returns the statistics of a list of timings in seconds, in milliseconds"""
+    ordered = sorted(timings)
+    p95 = ordered[min(len(ordered) - 1, round(0.95 * (len(ordered) - 1)))]
+    return {
+        "runs": len(ordered),
+        "min_ms": round(ordered[0] * 1000, 3),
+        "median_ms": round(statistics.median(ordered) * 1000, 3),
+        "p95_ms": round(p95 * 1000, 3),
+        "mean_ms": round(statistics.fmean(ordered) * 1000, 3),
+        "max_ms": round(ordered[-1] * 1000, 3),
+    }
+
+
+def get_git_commit():
+    try:
+        result = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, timeout=5)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return result.stdout.strip() or None
+
+
+class Command(BaseCommand):
+    help = "Mide la ejecución de reportes, conteos, PDF, sincronización y vistas, y emite los resultados en JSON"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--report-id",
+            type=int,
+            action="append",
+            default=None,
+            help="ID de un reporte a medir (se puede repetir). Por defecto, los reportes sintéticos",
+        )
+        parser.add_argument("--start-date", type=str, default=None, help="Fecha inicial (YYYY-MM-DD)")
+        parser.add_argument("--end-date", type=str, default=None, help="Fecha final (YYYY-MM-DD)")
+        parser.add_argument("--repeat", type=int, default=5, help="Repeticiones de cada medición")
+        parser.add_argument("--page-size", type=int, default=10, help="Filas por página")
+        parser.add_argument("--pdf-rows", type=int, default=1000, help="Filas del PDF medido")
+        parser.add_argument("--output", type=str, default=None, help="Archivo JSON de salida (por defecto stdout)")
+        parser.add_argument("--skip-pdf", default=False, action="store_true", help="No medir la generación de PDF")
+        parser.add_argument("--skip-sync", default=False, action="store_true", help="No medir la sincronización")
+        parser.add_argument("--skip-views", default=False, action="store_true", help="No medir las vistas")
+
+    def handle(self, *args, **options):
+        reports = self._get_reports(options["report_id"])
+        end_date = options["end_date"] or date.today().isoformat()
+        start_date = options["start_date"] or (date.fromisoformat(end_date) - timedelta(days=30)).isoformat()
+        self.repeat = max(1, options["repeat"])
+
+        results = {
+            "meta": {
+                "created_at": datetime.now().isoformat(timespec="seconds"),
+                "git_commit": get_git_commit(),
+                "python": platform.python_version(),
+                "django": django.get_version(),
+                "repeat": self.repeat,
+                "start_date": start_date,
+                "end_date": end_date,
+                "page_size": options["page_size"],
+            },
+            "benchmarks": [],
+        }
+
+        for report in reports:
+            self.stderr.write(f"📊 Midiendo {report.name} (id {report.pk})")
+            results["benchmarks"] += self._bench_report(report, start_date, end_date, options)
+
+        if not options["skip_sync"]:
+            db_alias = reports[0].table.database.alias
+            self.stderr.write(f"🔄 Midiendo sincronización de metadatos ({db_alias})")
+            results["benchmarks"].append(
+                self._measure(
+                    "sync_database_metadata",
+                    {"database": db_alias},
+                    lambda: call_command("sync_database_metadata", database=db_alias, stdout=StringIO()),
+                )
+            )
+
+        if not options["skip_views"]:
+            self.stderr.write("🌐 Midiendo vistas")
+            results["benchmarks"] += self._bench_views(reports[0], start_date, end_date, options["page_size"])
+
+        output = json.dumps(results, indent=2, ensure_ascii=False)
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as file:
+                file.write(output)
+            self.stderr.write(self.style.SUCCESS(f"✅ Resultados guardados en {options['output']}"))
+        else:
+            self.stdout.write(output)
+
+    def _get_reports(self, report_ids):
+        queryset = Report.objects.select_related("table__database")
+        if report_ids:
+            reports = list(queryset.filter(pk__in=report_ids))
+            missing = set(report_ids) - {report.pk for report in reports}
+            if missing:
+                raise CommandError(f"Los reportes {sorted(missing)} no existen")
+        else:
+            reports = list(queryset.filter(name__in=[PLAIN_REPORT_NAME, INTERVAL_REPORT_NAME]))
+            if not reports:
+                raise CommandError(
+                    "Indique --report-id o genere los reportes con generate_synthetic_data --create-reports"
+                )
+        return reports
+
+    def _measure(self, name, params, function):
+        """Runs a function once to warm up and then ``repeat`` times, returns the result entry"""
+        entry = {"name": name, "params": params}
+        try:
+            function()
+            timings = []
+            for _ in range(self.repeat):
+                started = time.perf_counter()
+                function()
+                timings.append(time.perf_counter() - started)
+        except Exception as e:
+            self.stderr.write(self.style.WARNING(f"  ⚠️  {name}: {e}"))
+            entry["error"] = str(e)
+            return entry
+        entry.update(summarize(timings))
+        self.stderr.write(f"  ⏱️  {name}: mediana {entry['median_ms']} ms, p95 {entry['p95_ms']} ms")
+        return entry
+
+    def _bench_report(self, report, start_date, end_date, options):
+        page_size = options["page_size"]
+        base = {"report_id": report.pk, "start_date": start_date, "end_date": end_date}
+        benchmarks = [
+            self._measure(
+                "execute_query",
+                {**base, "interval": report.interval, "limit": page_size},
+                lambda: report.get_plan().execute(
+                    limit=page_size, offset=0, start_date=start_date, end_date=end_date, owner="benchmark"
+                ),
+            )
+        ]
+
+        # Every interval over the same columns, compiled in memory without touching the report
+        configured_interval = report.interval
+        try:
+            for interval in Report.Interval.values:
+                report.interval = interval
+                plan = compile_plan(report, "benchmark")
+                interval_params = {**base, "interval": interval, "limit": page_size}
+                benchmarks.append(
+                    self._measure(
+                        "execute_interval",
+                        interval_params,
+                        lambda plan=plan: plan.execute(
+                            limit=page_size, offset=0, start_date=start_date, end_date=end_date, owner="benchmark"
+                        ),
+                    )
+                )
+                benchmarks.append(
+                    self._measure(
+                        "count_query", interval_params, lambda plan=plan: self._count(plan, start_date, end_date)
+                    )
+                )
+        finally:
+            report.interval = configured_interval
+
+        if not options["skip_pdf"]:
+            benchmarks.append(self._bench_pdf(report, start_date, end_date, options["pdf_rows"]))
+        return benchmarks
+
+    def _count(self, plan, start_date, end_date):
+        _, count_query, params = plan.build(start_date, end_date)
+        if count_query is None:
+            raise CommandError("El reporte no tiene columnas visibles")
+        with connections[plan.get_read_alias()].cursor() as cursor:
+            cursor.execute(count_query, params)
+            return cursor.fetchone()[0]
+
+    def _bench_pdf(self, report, start_date, end_date, pdf_rows):
+        """Times ``PDFUtils.gen_with_rows`` alone, over rows fetched once"""
+        plan = report.get_plan()
+        params = {"report_id": report.pk, "start_date": start_date, "end_date": end_date}
+        try:
+            company_data = get_company_data()
+            columns, rows, total_count = plan.execute(limit=pdf_rows, start_date=start_date, end_date=end_date)
+        except Exception as e:
+            self.stderr.write(self.style.WARNING(f"  ⚠️  PDFUtils.gen_with_rows: {e}"))
+            return {"name": "PDFUtils.gen_with_rows", "params": params, "error": str(e)}
+
+        params["rows"] = len(rows)
+        return self._measure(
+            "PDFUtils.gen_with_rows",
+            params,
+            lambda: render_pdf(plan, columns, rows, total_count, company_data, start_date, end_date),
+        )
+
+    def _bench_views(self, report, start_date, end_date, page_size):
+        host = next((host for host in settings.ALLOWED_HOSTS if host != "*"), "localhost").lstrip(".")
+        client = Client(HTTP_HOST=host)
+        query = {"report_id": report.pk, "start_date": start_date, "end_date": end_date}
+        views = [
+            ("dashboard", {}),
+            ("report", {}),
+            ("config-report", {}),
+            ("report-execute", {**query, "page": 1, "page_size": page_size}),
+            ("report-generate-csv", query),
+        ]
+
+        benchmarks = []
+        for url_name, params in views:
+            url = reverse(url_name)
+            benchmarks.append(
+                self._measure(
+                    f"view:{url_name}",
+                    params,
+                    lambda url=url, params=params: self._get(client, url, params),
+                )
+            )
+        return benchmarks
+
+    def _get(self, client, url, params):
+        response = client.get(url, params, headers={"HX-Request": "true"})
+        if response.status_code >= 400:
+            raise CommandError(f"{url} respondió {response.status_code}")
+        if response.streaming:
+            b"".join(response.streaming_content)
+        return response
@@ -0,0 +1,239 @@
+"""
+Comando de Django para generar datos sintéticos en la base de reportes.
+Crea en un esquema propio las tablas del esquema de ejemplo (clientes, productos,
+ventas y detalle_ventas) con el volumen indicado, generando las filas dentro de
+PostgreSQL con generate_series. Opcionalmente sincroniza los metadatos y crea
+reportes de prueba para el comando benchmark_reports.
+"""
+
+import time
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from psycopg import sql
+
+from apps.core.models import Column, Report, ReportColumn, Table
+
+SIZES = {"10k": 10_000, "1m": 1_000_000, "10m": 10_000_000}
+
+# Report names created with --create-reports, benchmark_reports looks for them
+PLAIN_REPORT_NAME = "Sintético ventas"
+INTERVAL_REPORT_NAME = "Sintético ventas por intervalo"
+
+CREATE_TABLES = """
+CREATE TABLE {schema}.clientes (
+    id SERIAL PRIMARY KEY,
+    codigo VARCHAR(20) UNIQUE NOT NULL,
+    nombre VARCHAR(200) NOT NULL,
+    email VARCHAR(100),
+    telefono VARCHAR(20),
+    ciudad VARCHAR(100),
+    pais VARCHAR(100) DEFAULT 'Colombia',
+    fecha_registro TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    activo BOOLEAN DEFAULT TRUE
+);
+
+CREATE TABLE {schema}.productos (
+    id SERIAL PRIMARY KEY,
+    codigo VARCHAR(50) UNIQUE NOT NULL,
+    nombre VARCHAR(200) NOT NULL,
+    categoria VARCHAR(100),
+    precio_unitario NUMERIC(15, 2) NOT NULL,
+    stock INTEGER DEFAULT 0,
+    activo BOOLEAN DEFAULT TRUE
+);
+
+CREATE TABLE {schema}.ventas (
+    id SERIAL PRIMARY KEY,
+    numero_factura VARCHAR(50) NOT NULL,
+    cliente_id INTEGER REFERENCES {schema}.clientes(id),
+    fecha_venta TIMESTAMP NOT NULL,
+    subtotal NUMERIC(15, 2) NOT NULL DEFAULT 0,
+    impuesto NUMERIC(15, 2) NOT NULL DEFAULT 0,
+    total NUMERIC(15, 2) NOT NULL DEFAULT 0,
+    estado VARCHAR(50) DEFAULT 'completada'
+);
+
+CREATE TABLE {schema}.detalle_ventas (
+    id SERIAL PRIMARY KEY,
+    venta_id INTEGER REFERENCES {schema}.ventas(id) ON DELETE CASCADE,
+    producto_id INTEGER REFERENCES {schema}.productos(id),
+    cantidad INTEGER NOT NULL,
+    precio_unitario NUMERIC(15, 2) NOT NULL,
+    subtotal NUMERIC(15, 2) NOT NULL,
+    impuesto NUMERIC(15, 2) NOT NULL DEFAULT 0,
+    total NUMERIC(15, 2) NOT NULL
+);
+"""
+
+INSERT_CLIENTES = """
+INSERT INTO {schema}.clientes (codigo, nombre, email, telefono, ciudad, fecha_registro)
+SELECT
+    'CLI' || lpad(n::text, 8, '0'),
+    'Cliente ' || n,
+    'cliente' || n || '@ejemplo.com',
+    '300' || lpad((random() * 9999999)::int::text, 7, '0'),
+    (ARRAY['Bogotá', 'Medellín', 'Cali', 'Barranquilla', 'Cartagena', 'Bucaramanga', 'Pereira'])[1 + n % 7],
+    now() - random() * INTERVAL '3 years'
+FROM generate_series(1, %(rows)s) AS n
+"""
+
+INSERT_PRODUCTOS = """
+INSERT INTO {schema}.productos (codigo, nombre, categoria, precio_unitario, stock)
+SELECT
+    'PROD' || lpad(n::text, 8, '0'),
+    'Producto ' || n,
+    (ARRAY['Tecnología', 'Muebles', 'Papelería', 'Alimentos', 'Aseo'])[1 + n % 5],
+    round((1000 + random() * 2000000)::numeric, 2),
+    (random() * 500)::int
+FROM generate_series(1, %(rows)s) AS n
+"""
+
+INSERT_VENTAS = """
+INSERT INTO {schema}.ventas (numero_factura, cliente_id, fecha_venta, subtotal, impuesto, total, estado)
+SELECT
+    'FAC-' || lpad(n::text, 10, '0'),
+    1 + (random() * (%(clientes)s - 1))::int,
+    now() - random() * make_interval(days => %(days)s),
+    subtotal,
+    round(subtotal * 0.19, 2),
+    round(subtotal * 1.19, 2),
+    (ARRAY['completada', 'completada', 'completada', 'pendiente', 'anulada'])[1 + n % 5]
+FROM (
+    SELECT n, round((10000 + random() * 5000000)::numeric, 2) AS subtotal
+    FROM generate_series(1, %(rows)s) AS n
+) AS generated
+"""
+
+INSERT_DETALLE = """
+INSERT INTO {schema}.detalle_ventas
+    (venta_id, producto_id, cantidad, precio_unitario, subtotal, impuesto, total)
+SELECT
+    venta_id,
+    producto_id,
+    cantidad,
+    precio,
+    precio * cantidad,
+    round(precio * cantidad * 0.19, 2),
+    round(precio * cantidad * 1.19, 2)
+FROM (
+    SELECT
+        1 + (n - 1) / %(per_sale)s AS venta_id,
+        1 + (random() * (%(productos)s - 1))::int AS producto_id,
+        1 + (random() * 9)::int AS cantidad,
+        round((1000 + random() * 500000)::numeric, 2) AS precio
+    FROM generate_series(1, %(rows)s * %(per_sale)s) AS n
+) AS generated
+"""
+
+CREATE_INDEXES = """
+CREATE INDEX ON {schema}.ventas (fecha_venta);
+CREATE INDEX ON {schema}.ventas (cliente_id);
+CREATE INDEX ON {schema}.detalle_ventas (venta_id);
+CREATE INDEX ON {schema}.detalle_ventas (producto_id);
+CREATE INDEX ON {schema}.clientes (ciudad);
+"""
+
+
+class Command(BaseCommand):
+    help = "Genera datos sintéticos (clientes, productos, ventas, detalle_ventas) para pruebas de rendimiento"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--size", choices=SIZES.keys(), default="10k", help="Filas de ventas: 10k, 1m o 10m")
+        parser.add_argument("--rows", type=int, default=None, help="Filas de ventas exactas (ignora --size)")
+        parser.add_argument("--database", type=str, default="report", help="Alias de la base de datos")
+        parser.add_argument("--schema", type=str, default="sintetico", help="Esquema donde se crean las tablas")
+        parser.add_argument("--days", type=int, default=90, help="Días hacia atrás que cubren las ventas")
+        parser.add_argument("--details-per-sale", type=int, default=3, help="Filas de detalle por venta")
+        parser.add_argument("--seed", type=float, default=0.42, help="Semilla (-1 a 1) para datos repetibles")
+        parser.add_argument(
+            "--create-reports",
+            default=False,
+            action="store_true",
+            help="Sincronizar metadatos y crear los reportes de prueba sobre las tablas generadas",
+        )
+
+    def handle(self, *args, **options):
+        rows = options["rows"] or SIZES[options["size"]]
+        if rows < 1:
+            raise CommandError("El número de filas debe ser mayor que cero")
+
+        schema = sql.Identifier(options["schema"])
+        params = {
+            "rows": rows,
+            "clientes": max(100, rows // 100),
+            "productos": max(50, rows // 1000),
+            "days": options["days"],
+            "per_sale": options["details_per_sale"],
+        }
+
+        self.stdout.write(self.style.SUCCESS(f"🧪 Generando {rows} ventas en {options['database']}.{options['schema']}"))
+
+        connection = connections[options["database"]]
+        with connection.cursor() as cursor:
+            # A new schema each time, so sizes can be switched without leftovers
+            self._execute(cursor, "DROP SCHEMA IF EXISTS {schema} CASCADE", schema)
+            self._execute(cursor, "CREATE SCHEMA {schema}", schema)
+            self._execute(cursor, CREATE_TABLES, schema)
+            cursor.execute("SELECT setseed(%s)", [options["seed"]])
+
+            steps = [
+                ("clientes", INSERT_CLIENTES, {"rows": params["clientes"]}),
+                ("productos", INSERT_PRODUCTOS, {"rows": params["productos"]}),
+                ("ventas", INSERT_VENTAS, params),
+                ("detalle_ventas", INSERT_DETALLE, params),
+            ]
+            for table_name, query, query_params in steps:
+                started = time.perf_counter()
+                self._execute(cursor, query, schema, query_params)
+                self.stdout.write(f"  ✅ {table_name}: {cursor.rowcount} filas en {time.perf_counter() - started:.1f}s")
+
+            self.stdout.write("📇 Creando índices y actualizando estadísticas...")
+            self._execute(cursor, CREATE_INDEXES, schema)
+            self._execute(
+                cursor, "ANALYZE {schema}.clientes, {schema}.productos, {schema}.ventas, {schema}.detalle_ventas", schema
+            )
+
+        if options["create_reports"]:
+            self._create_reports(options["database"], options["schema"])
+
+        self.stdout.write(self.style.SUCCESS("✅ Datos sintéticos generados"))
+
+    def _execute(self, cursor, query, schema, params=None):
+        cursor.execute(sql.SQL(query).format(schema=schema).as_string(cursor.connection), params)
+
+    def _create_reports(self, db_alias, schema_name):
+        self.stdout.write("🔄 Sincronizando metadatos...")
+        call_command("sync_database_metadata", database=db_alias, stdout=StringIO())
+
+        table = Table.objects.get(database__alias=db_alias, schema_name=schema_name, table_name="ventas")
+        columns = {column.column_name: column for column in Column.objects.filter(table=table)}
+
+        reports = [
+            (PLAIN_REPORT_NAME, Report.Interval.ALL),
+            (INTERVAL_REPORT_NAME, Report.Interval.FIFTEEN),
+        ]
+        for name, interval in reports:
+            report, _ = Report.objects.update_or_create(
+                name=name, defaults={"table": table, "interval": interval, "order": Report.Order.DESC}
+            )
+            report.report_columns.all().delete()
+            report_columns = [
+                ("fecha_venta", "Fecha", ReportColumn.FormatColumn.DATETIME, ReportColumn.AggregateFunction.NONE),
+                ("numero_factura", "Factura", ReportColumn.FormatColumn.TEXT, ReportColumn.AggregateFunction.COUNT),
+                ("subtotal", "Subtotal", ReportColumn.FormatColumn.CURRENCY, ReportColumn.AggregateFunction.SUM),
+                ("total", "Total", ReportColumn.FormatColumn.CURRENCY, ReportColumn.AggregateFunction.SUM),
+                ("estado", "Estado", ReportColumn.FormatColumn.TEXT, ReportColumn.AggregateFunction.NONE),
+            ]
+            for order, (column_name, display_name, format, aggregate) in enumerate(report_columns, start=1):
+                report.report_columns.create(
+                    column=columns[column_name],
+                    order=order,
+                    display_name=display_name,
+                    format=format,
+                    aggregate=aggregate,
+                    order_by=column_name == "fecha_venta",
+                )
+            self.stdout.write(f"  📊 Reporte listo: {name} (id {report.pk})")
@@ -0,0 +1,66 @@
+"""
+Comando de Django para instalar el trigger de notificaciones del modo en vivo.
+Crea en una tabla de la base de reportes un trigger que envía NOTIFY cuando se
+insertan filas, para que el poller del modo en vivo solo consulte la tabla
+cuando cambió (REPORT_LIVE_USE_NOTIFY=True).
+"""
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from psycopg import sql
+
+FUNCTION_NAME = "report_live_notify"
+TRIGGER_NAME = "report_live_notify"
+
+# The payload is the quoted table name, as it appears in the compiled report plans
+CREATE_FUNCTION = """
+CREATE OR REPLACE FUNCTION {function}() RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_notify(
+        {channel},
+        '"' || replace(TG_TABLE_SCHEMA, '"', '""') || '"."' || replace(TG_TABLE_NAME, '"', '""') || '"'
+    );
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql
+"""
+
+# Statement level: one notification per INSERT, however many rows it writes
+CREATE_TRIGGER = """
+CREATE TRIGGER {trigger} AFTER INSERT ON {table}
+FOR EACH STATEMENT EXECUTE FUNCTION {function}()
+"""
+
+
+class Command(BaseCommand):
+    help = "Instala (o elimina) el trigger NOTIFY del modo en vivo en una tabla de reportes"
+
+    def add_arguments(self, parser):
+        parser.add_argument("table", type=str, help="Tabla a observar (esquema.tabla)")
+        parser.add_argument("--database", type=str, default="report", help="Alias de la base de datos")
+        parser.add_argument("--drop", default=False, action="store_true", help="Eliminar el trigger")
+
+    def handle(self, *args, **options):
+        schema_name, _, table_name = options["table"].rpartition(".")
+        if not table_name:
+            raise CommandError("Indique la tabla como esquema.tabla")
+        table = sql.Identifier(schema_name or "public", table_name)
+        names = {
+            "function": sql.Identifier(FUNCTION_NAME),
+            "trigger": sql.Identifier(TRIGGER_NAME),
+            "table": table,
+            "channel": sql.Literal(settings.REPORT_LIVE_NOTIFY_CHANNEL),
+        }
+
+        with connections[options["database"]].cursor() as cursor:
+            connection = cursor.connection
+            cursor.execute(sql.SQL("DROP TRIGGER IF EXISTS {trigger} ON {table}").format(**names).as_string(connection))
+            if options["drop"]:
+                self.stdout.write(self.style.SUCCESS(f"🗑️  Trigger eliminado de {options['table']}"))
+                return
+
+            cursor.execute(sql.SQL(CREATE_FUNCTION).format(**names).as_string(connection))
+            cursor.execute(sql.SQL(CREATE_TRIGGER).format(**names).as_string(connection))
+
+        self.stdout.write(self.style.SUCCESS(f"✅ Trigger instalado en {options['table']}"))
@@ -0,0 +1,244 @@
+"""
+Comando de Django para probar la carga del servidor de reportes.
+Por defecto lanza solicitudes concurrentes a un reporte lento mientras mide la
+latencia de una página liviana (dashboard), para comparar el servidor ASGI con WSGI.
+Con --flows cada usuario virtual recorre el flujo de una persona real: dashboard,
+lista de reportes, ejecución, paginación, cambio de tamaño de página y PDF.
+En ambos casos muestra por endpoint las latencias p50/p95/p99, el rendimiento y
+la tasa de errores, y puede fallar si se superan los umbrales (para usar antes de desplegar).
+"""
+
+import json
+import random
+import statistics
+import threading
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+import requests
+from django.core.management.base import BaseCommand, CommandError
+
+# (endpoint, path, query) of every step, {report_id} and the dates are filled in per user
+FLOW = [
+    ("dashboard", "/dashboard/", {}),
+    ("report_list", "/reports/", {}),
+    ("execute", "/reports-execute/", {"page": 1, "page_size": 10}),
+    ("paginate", "/reports-execute/", {"page": 2, "page_size": 10}),
+    ("paginate", "/reports-execute/", {"page": 3, "page_size": 10}),
+    ("page_size", "/reports-execute/", {"page": 1, "page_size": 50}),
+    ("pdf", "/reports-generate-pdf/", {}),
+]
+
+
+def percentile(ordered, percent):
+    """Nearest-rank percentile of an ordered list"""
+    index = max(0, min(len(ordered) - 1, round(percent / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+class Command(BaseCommand):
+    help = "Prueba de carga: reportes lentos concurrentes o flujos de usuario, con p50/p95/p99 y errores por endpoint"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--base-url", type=str, default="http://localhost:8000", help="URL base del servidor")
+        parser.add_argument(
+            "--report-id", type=int, action="append", required=True, help="ID de un reporte (se puede repetir)"
+        )
+        parser.add_argument("--start-date", type=str, default=None, help="Fecha inicial (YYYY-MM-DD)")
+        parser.add_argument("--end-date", type=str, default=None, help="Fecha final (YYYY-MM-DD)")
+        parser.add_argument("--timeout", type=float, default=300, help="Tiempo máximo por solicitud (segundos)")
+        parser.add_argument("--output", type=str, default=None, help="Archivo JSON con los resultados")
+        parser.add_argument(
+            "--max-error-rate", type=float, default=None, help="Fallar si la tasa de errores supera este valor (0-1)"
+        )
+        parser.add_argument("--max-p95", type=float, default=None, help="Fallar si algún p95 supera estos ms")
+
+        # Reportes concurrentes (por defecto)
+        parser.add_argument("--concurrency", type=int, default=20, help="Solicitudes de reporte simultáneas")
+        parser.add_argument("--requests", type=int, default=100, help="Total de solicitudes de reporte")
+        parser.add_argument(
+            "--probe-path", type=str, default="/dashboard/", help="Página liviana medida durante la carga"
+        )
+        parser.add_argument("--probe-interval", type=float, default=0.5, help="Segundos entre mediciones livianas")
+
+        # Flujos de usuario
+        parser.add_argument("--flows", default=False, action="store_true", help="Recorrer el flujo de un usuario")
+        parser.add_argument("--users", type=int, default=10, help="Usuarios virtuales simultáneos")
+        parser.add_argument("--iterations", type=int, default=5, help="Flujos completos por usuario")
+        parser.add_argument("--duration", type=float, default=None, help="Segundos de prueba (ignora --iterations)")
+        parser.add_argument("--ramp-up", type=float, default=0, help="Segundos para iniciar a todos los usuarios")
+        parser.add_argument("--think-time", type=float, default=0.5, help="Pausa media entre pasos (segundos)")
+        parser.add_argument("--skip-pdf", default=False, action="store_true", help="No generar PDF en el flujo")
+        parser.add_argument("--seed", type=int, default=None, help="Semilla para repetir las pausas y reportes")
+
+    def handle(self, *args, **options):
+        self.base_url = options["base_url"].rstrip("/")
+        self.timeout = options["timeout"]
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(list)
+        self.lock = threading.Lock()
+
+        started = time.perf_counter()
+        if options["flows"]:
+            self._run_flows(options)
+        else:
+            self._run_concurrency(options)
+        total_time = time.perf_counter() - started
+
+        results = self._summarize(total_time)
+        self._write_results(results, total_time)
+
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as file:
+                json.dump(results, file, indent=2, ensure_ascii=False)
+            self.stdout.write(f"💾 Resultados guardados en {options['output']}")
+
+        self._check_thresholds(results, options["max_error_rate"], options["max_p95"])
+
+    def _timed_get(self, session, endpoint, path, query=None):
+        """Requests a path and records its latency and error under the endpoint"""
+        started = time.perf_counter()
+        try:
+            response = session.get(f"{self.base_url}{path}", params=query, timeout=self.timeout)
+            # Read the whole body, a PDF is only done when it is downloaded
+            response.content
+            error = response.status_code if response.status_code >= 400 else None
+        except requests.RequestException as e:
+            error = type(e).__name__
+        elapsed = time.perf_counter() - started
+
+        with self.lock:
+            self.latencies[endpoint].append(elapsed)
+            if error is not None:
+                self.errors[endpoint].append(error)
+
+    def _new_session(self):
+        session = requests.Session()
+        session.headers["HX-Request"] = "true"
+        return session
+
+    def _run_concurrency(self, options):
+        """Concurrent slow reports, while a light page is probed"""
+        report_ids = options["report_id"]
+        dates = {key: options[key] for key in ("start_date", "end_date") if options[key]}
+        done = threading.Event()
+
+        def run_report(number):
+            query = {"report_id": report_ids[number % len(report_ids)], "page": 1, "page_size": 10, **dates}
+            # A new connection per request, as independent clients
+            with self._new_session() as session:
+                self._timed_get(session, "execute", "/reports-execute/", query)
+
+        def run_probe():
+            probe_session = self._new_session()
+            while not done.is_set():
+                self._timed_get(probe_session, "probe", options["probe_path"])
+                done.wait(options["probe_interval"])
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"🚀 {options['requests']} solicitudes a {self.base_url}/reports-execute/ "
+                f"con concurrencia {options['concurrency']}"
+            )
+        )
+
+        probe = threading.Thread(target=run_probe, daemon=True)
+        probe.start()
+        with ThreadPoolExecutor(max_workers=options["concurrency"]) as executor:
+            list(executor.map(run_report, range(options["requests"])))
+        done.set()
+        probe.join()
+
+    def _run_flows(self, options):
+        """Virtual users walking the flow of a person"""
+        end_date = options["end_date"] or date.today().isoformat()
+        start_date = options["start_date"] or (date.fromisoformat(end_date) - timedelta(days=7)).isoformat()
+        flow = [step for step in FLOW if not (options["skip_pdf"] and step[0] == "pdf")]
+        rng = random.Random(options["seed"])
+        deadline = time.monotonic() + options["duration"] if options["duration"] else None
+
+        def run_user(user):
+            # Each user keeps its own session, like a browser
+            session = self._new_session()
+            with self.lock:
+                user_rng = random.Random(rng.random())
+            if options["ramp_up"]:
+                time.sleep(options["ramp_up"] * user / options["users"])
+
+            iteration = 0
+            while time.monotonic() < deadline if deadline else iteration < options["iterations"]:
+                iteration += 1
+                report_id = user_rng.choice(options["report_id"])
+                for endpoint, path, query in flow:
+                    if path not in ("/dashboard/", "/reports/"):
+                        query = {**query, "report_id": report_id, "start_date": start_date, "end_date": end_date}
+                    self._timed_get(session, endpoint, path, query)
+                    if options["think_time"]:
+                        time.sleep(user_rng.expovariate(1 / options["think_time"]))
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"🚀 {options['users']} usuarios contra {self.base_url} "
+                + (f"durante {options['duration']}s" if deadline else f"con {options['iterations']} flujos cada uno")
+            )
+        )
+
+        with ThreadPoolExecutor(max_workers=options["users"]) as executor:
+            list(executor.map(run_user, range(options["users"])))
+
+    def _summarize(self, total_time):
+        endpoints = {}
+        for endpoint, values in self.latencies.items():
+            ordered = sorted(values)
+            errors = self.errors[endpoint]
+            endpoints[endpoint] = {
+                "requests": len(ordered),
+                "errors": len(errors),
+                "error_rate": round(len(errors) / len(ordered), 4),
+                "error_types": {str(key): value for key, value in Counter(errors).items()},
+                "throughput_rps": round(len(ordered) / total_time, 3),
+                "mean_ms": round(statistics.fmean(ordered) * 1000, 1),
+                "p50_ms": round(percentile(ordered, 50) * 1000, 1),
+                "p95_ms": round(percentile(ordered, 95) * 1000, 1),
+                "p99_ms": round(percentile(ordered, 99) * 1000, 1),
+            }
+
+        total_requests = sum(result["requests"] for result in endpoints.values())
+        total_errors = sum(result["errors"] for result in endpoints.values())
+        return {
+            "total_time_s": round(total_time, 3),
+            "requests": total_requests,
+            "errors": total_errors,
+            "error_rate": round(total_errors / total_requests, 4) if total_requests else 0,
+            "throughput_rps": round(total_requests / total_time, 3),
+            "endpoints": endpoints,
+        }
+
+    def _write_results(self, results, total_time):
+        self.stdout.write(f"⏱️  Tiempo total: {total_time:.2f}s")
+        self.stdout.write(
+            f"📈 {results['requests']} solicitudes, {results['throughput_rps']:.2f} solicitudes/s, "
+            f"{results['error_rate'] * 100:.1f}% errores"
+        )
+        self.stdout.write(f"{'Endpoint':<12} {'n':>6} {'req/s':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'errores':>8}")
+        for endpoint, result in results["endpoints"].items():
+            self.stdout.write(
+                f"{endpoint:<12} {result['requests']:>6} {result['throughput_rps']:>8.2f} "
+                f"{result['p50_ms']:>6.0f}ms {result['p95_ms']:>6.0f}ms {result['p99_ms']:>6.0f}ms "
+                f"{result['error_rate'] * 100:>7.1f}%"
+            )
+
+    def _check_thresholds(self, results, max_error_rate, max_p95):
+        failures = []
+        if max_error_rate is not None and results["error_rate"] > max_error_rate:
+            failures.append(f"tasa de errores {results['error_rate'] * 100:.1f}% > {max_error_rate * 100:.1f}%")
+        if max_p95 is not None:
+            failures += [
+                f"p95 de {endpoint} {result['p95_ms']:.0f}ms > {max_p95:.0f}ms"
+                for endpoint, result in results["endpoints"].items()
+                if result["p95_ms"] > max_p95
+            ]
+        if failures:
+            raise CommandError("❌ " + "; ".join(failures))
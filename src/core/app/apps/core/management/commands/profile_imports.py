@@ -0,0 +1,163 @@
+"""
+Comando de Django para medir el costo de arranque de los procesos.
+Importa cada módulo en un intérprete nuevo (como lo hace un worker de
+gunicorn o de Celery al iniciar) y muestra el tiempo de django.setup(), el
+tiempo de importación, la memoria residente (RSS) y los paquetes más pesados
+según `python -X importtime`.
+"""
+
+import json
+import re
+import statistics
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Entry points of the web, ASGI and Celery processes and of the most used commands
+DEFAULT_MODULES = [
+    "report.wsgi",
+    "report.asgi",
+    "report.celery",
+    "apps.core.views",
+    "apps.core.tasks",
+    "apps.core.management.commands.sync_database_metadata",
+]
+
+# Runs in the fresh interpreter: argv[1] is the module, prints one JSON line
+PROBE = """
+import importlib, json, sys, time
+
+def rss():
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    import resource
+    # Peak instead of current memory, kilobytes on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+started = time.perf_counter()
+base_rss = rss()
+import django
+django.setup()
+setup = time.perf_counter()
+setup_rss = rss()
+importlib.import_module(sys.argv[1])
+done = time.perf_counter()
+print(json.dumps({
+    "setup_ms": (setup - started) * 1000,
+    "import_ms": (done - setup) * 1000,
+    "base_rss": base_rss,
+    "setup_rss": setup_rss,
+    "rss": rss(),
+}))
+"""
+
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| ( *)(\S+)$")
+
+
+def parse_importtime(output):
+    """
+    Parses the ``-X importtime`` output
+
+    Returns:
+        tuple: (loaded module names, {top-level module: cumulative ms})
+    """
+    modules, top_level = set(), {}
+    for line in output.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        _, cumulative, indent, name = match.groups()
+        modules.add(name)
+        # Without indentation: imported directly, its time includes everything it pulled in
+        if not indent:
+            top_level[name] = int(cumulative) / 1000
+    return modules, top_level
+
+
+def to_mb(size):
+    return round(size / (1024 * 1024), 1)
+
+
+class Command(BaseCommand):
+    help = "Mide el tiempo de importación y la memoria (RSS) de los módulos de arranque de los procesos"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "modules", nargs="*", default=None, help="Módulos a medir (default: web, ASGI, Celery y vistas)"
+        )
+        parser.add_argument("--repeat", type=int, default=3, help="Intérpretes por módulo, se reporta la mediana")
+        parser.add_argument("--top", type=int, default=10, help="Paquetes más pesados a mostrar por módulo")
+        parser.add_argument(
+            "--forbid",
+            type=str,
+            action="append",
+            default=[],
+            help="Fallar si algún módulo carga este paquete al iniciar (se puede repetir, ej. pandas)",
+        )
+        parser.add_argument("--output", type=str, default=None, help="Archivo JSON con los resultados")
+
+    def handle(self, *args, **options):
+        modules = options["modules"] or DEFAULT_MODULES
+        self.stdout.write(self.style.SUCCESS(f"🚀 Midiendo el arranque de {len(modules)} módulos"))
+
+        results = [self._profile(module, options["repeat"], options["top"]) for module in modules]
+
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as file:
+                json.dump(results, file, indent=2)
+            self.stdout.write(f"💾 Resultados guardados en {options['output']}")
+
+        failures = [
+            f"{result['module']} carga {package}"
+            for result in results
+            for package in options["forbid"]
+            if package in result["loaded"]
+        ]
+        if failures:
+            raise CommandError("❌ " + "; ".join(failures))
+
+    def _profile(self, module, repeat, top):
+        runs, loaded, heaviest = [], set(), {}
+        for _ in range(repeat):
+            completed = subprocess.run(
+                [sys.executable, "-X", "importtime", "-c", PROBE, module],
+                capture_output=True,
+                text=True,
+                cwd=settings.BASE_DIR,
+            )
+            if completed.returncode != 0:
+                raise CommandError(f"❌ No se pudo importar {module}:\n{completed.stderr[-2000:]}")
+            runs.append(json.loads(completed.stdout.strip().splitlines()[-1]))
+            loaded, heaviest = parse_importtime(completed.stderr)
+
+        result = {
+            "module": module,
+            "setup_ms": round(statistics.median(run["setup_ms"] for run in runs), 1),
+            "import_ms": round(statistics.median(run["import_ms"] for run in runs), 1),
+            "base_rss_mb": to_mb(statistics.median(run["base_rss"] for run in runs)),
+            "setup_rss_mb": to_mb(statistics.median(run["setup_rss"] for run in runs)),
+            "rss_mb": to_mb(statistics.median(run["rss"] for run in runs)),
+            "modules": len(loaded),
+            "heaviest": [
+                {"module": name, "ms": round(ms, 1)}
+                for name, ms in sorted(heaviest.items(), key=lambda item: item[1], reverse=True)[:top]
+            ],
+            "loaded": sorted(loaded),
+        }
+
+        self.stdout.write(
+            f"\n📦 {module}: django.setup() {result['setup_ms']} ms, importación {result['import_ms']} ms, "
+            f"RSS {result['rss_mb']} MB (+{round(result['rss_mb'] - result['setup_rss_mb'], 1)} MB), "
+            f"{result['modules']} módulos"
+        )
+        for item in result["heaviest"]:
+            self.stdout.write(f"    {item['ms']:>9.1f} ms  {item['module']}")
+        return result
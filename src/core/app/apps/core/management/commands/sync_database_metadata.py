@@ -1,12 +1,16 @@
 """
 Comando de Django para sincronizar metadatos de la base de datos.
 Lee todas las tablas y columnas de la base de datos y las almacena en los modelos.
+Con --stats guarda además las estadísticas del planificador (pg_stats) de cada
+columna, sin recorrer las tablas.
 """
 
 from django.core.management.base import BaseCommand
 from django.db import connections
 
-from apps.core.models import Column, Database, Table
+from apps.core.models import Column, ColumnStatistics, Database, Table
+from apps.core.routers import report_router
+from apps.core.signals import batch_table_invalidation
 
 
 class Command(BaseCommand):
@@ -25,10 +29,17 @@ class Command(BaseCommand):
             action="store_true",
             help="Eliminar todos los datos existentes antes de sincronizar",
         )
+        parser.add_argument(
+            "--stats",
+            default=False,
+            action="store_true",
+            help="Recolectar las estadísticas de las columnas desde pg_stats (solo PostgreSQL, ejecute ANALYZE antes)",
+        )
 
     def handle(self, *args, **options):
         db_alias = options["database"]
         clear_data = options["clear"]
+        self.collect_stats = options["stats"]
 
         self.stdout.write(
             self.style.SUCCESS(f"🔄 Iniciando sincronización de metadatos para la base de datos: {db_alias}")
@@ -37,9 +48,10 @@ class Command(BaseCommand):
         # Si se solicita, limpiar datos existentes
         if clear_data:
             self.stdout.write(self.style.WARNING("⚠️  Eliminando datos existentes..."))
-            Column.objects.all().delete()
-            Table.objects.all().delete()
-            Database.objects.all().delete()
+            with batch_table_invalidation():
+                Column.objects.all().delete()
+                Table.objects.all().delete()
+                Database.objects.all().delete()
             self.stdout.write(self.style.SUCCESS("✅ Datos eliminados"))
 
         # Obtener o crear el registro de la base de datos
@@ -58,23 +70,28 @@ class Command(BaseCommand):
         else:
             self.stdout.write(self.style.SUCCESS(f"ℹ️  Base de datos encontrada: {database.name}"))
 
-        # Obtener conexión a la base de datos
-        conn = connections[db_alias]
+        # Obtener conexión a la base de datos (réplica si está disponible)
+        read_alias = report_router.db_for_report(db_alias)
+        if read_alias != db_alias:
+            self.stdout.write(f"🔀 Leyendo metadatos desde la réplica: {read_alias}")
+        conn = connections[read_alias]
 
         # Detectar el tipo de base de datos
         db_vendor = conn.vendor
         self.stdout.write(f"🔍 Tipo de base de datos: {db_vendor}")
 
-        if db_vendor == "postgresql":
-            self._sync_postgresql(database, conn)
-        elif db_vendor == "mysql":
-            self._sync_mysql(database, conn)
-        elif db_vendor == "sqlite":
-            self._sync_sqlite(database, conn)
-        else:
+        syncs = {"postgresql": self._sync_postgresql, "mysql": self._sync_mysql, "sqlite": self._sync_sqlite}
+        if db_vendor not in syncs:
             self.stdout.write(self.style.ERROR(f"❌ Base de datos no soportada: {db_vendor}"))
             return
 
+        # Los planes de los reportes de cada tabla se invalidan una sola vez, al final
+        with batch_table_invalidation():
+            syncs[db_vendor](database, conn)
+
+        if self.collect_stats and db_vendor != "postgresql":
+            self.stdout.write(self.style.WARNING("⚠️  Las estadísticas de columnas solo están disponibles en PostgreSQL"))
+
         self.stdout.write(self.style.SUCCESS("✅ Sincronización completada exitosamente"))
 
     def _sync_postgresql(self, database, conn):
@@ -148,27 +165,44 @@ class Command(BaseCommand):
 
                 primary_keys = {row[0] for row in cursor.fetchall()}
 
-                # Obtener llaves foráneas
+                # Obtener llaves foráneas, cada columna con la columna que referencia en su misma posición.
+                # Solo las llaves de una columna guardan su referencia: unir por una parte de una llave
+                # compuesta multiplicaría las filas del reporte
                 cursor.execute(
                     """
-                    SELECT 
-                        kcu.column_name,
-                        ccu.table_name AS foreign_table_name
-                    FROM information_schema.table_constraints AS tc 
-                    JOIN information_schema.key_column_usage AS kcu
-                        ON tc.constraint_name = kcu.constraint_name
-                        AND tc.table_schema = kcu.table_schema
-                    JOIN information_schema.constraint_column_usage AS ccu
-                        ON ccu.constraint_name = tc.constraint_name
-                        AND ccu.table_schema = tc.table_schema
-                    WHERE tc.constraint_type = 'FOREIGN KEY'
-                        AND tc.table_schema = %s
-                        AND tc.table_name = %s
+                    SELECT
+                        a.attname,
+                        CASE WHEN cardinality(c.conkey) = 1 THEN ft.relname END AS foreign_table_name,
+                        CASE WHEN cardinality(c.conkey) = 1 THEN fn.nspname END AS foreign_table_schema,
+                        CASE WHEN cardinality(c.conkey) = 1 THEN fa.attname END AS foreign_column_name
+                    FROM pg_constraint c
+                    CROSS JOIN LATERAL unnest(c.conkey, c.confkey) AS k(attnum, foreign_attnum)
+                    JOIN pg_attribute a ON a.attrelid = c.conrelid AND a.attnum = k.attnum
+                    JOIN pg_attribute fa ON fa.attrelid = c.confrelid AND fa.attnum = k.foreign_attnum
+                    JOIN pg_class ft ON ft.oid = c.confrelid
+                    JOIN pg_namespace fn ON fn.oid = ft.relnamespace
+                    WHERE c.contype = 'f'
+                        AND c.conrelid = format('%%I.%%I', %s::text, %s::text)::regclass
+                    ORDER BY cardinality(c.conkey) DESC, c.conname DESC
+                """,
+                    [schema_name, table_name],
+                )
+
+                # Las llaves de una columna van al final y prevalecen sobre las compuestas
+                foreign_keys = {row[0]: row[1:] for row in cursor.fetchall()}
+
+                # Columnas que encabezan un índice, el planificador de joins prefiere esas llaves
+                cursor.execute(
+                    """
+                    SELECT DISTINCT a.attname
+                    FROM pg_index i
+                    JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = i.indkey[0]
+                    WHERE i.indrelid = format('%%I.%%I', %s::text, %s::text)::regclass
                 """,
                     [schema_name, table_name],
                 )
 
-                foreign_keys = {row[0]: row[1] for row in cursor.fetchall()}
+                indexed_columns = {row[0] for row in cursor.fetchall()}
 
                 # Crear o actualizar columnas
                 for col_data in columns_data:
@@ -182,6 +216,7 @@ class Command(BaseCommand):
                         is_nullable,
                         column_default,
                     ) = col_data
+                    foreign_table, foreign_schema, foreign_column = foreign_keys.get(column_name, (None, None, None))
 
                     Column.objects.update_or_create(
                         table=table,
@@ -196,13 +231,75 @@ class Command(BaseCommand):
                             "column_default": column_default,
                             "is_primary_key": column_name in primary_keys,
                             "is_foreign_key": column_name in foreign_keys,
-                            "foreign_table": foreign_keys.get(column_name),
+                            "foreign_table": foreign_table,
+                            "foreign_schema": foreign_schema,
+                            "foreign_column": foreign_column,
+                            "is_indexed": column_name in indexed_columns,
                             "is_active": True,
                         },
                     )
 
                 self.stdout.write(f"    💾 {len(columns_data)} columnas sincronizadas")
 
+                if self.collect_stats:
+                    self._sync_postgresql_stats(table, cursor)
+
+    def _sync_postgresql_stats(self, table, cursor):
+        """Guarda las estadísticas de pg_stats de las columnas de una tabla y su número estimado de filas"""
+        # reltuples es -1 si la tabla nunca fue analizada
+        cursor.execute(
+            """
+            SELECT c.reltuples::bigint
+            FROM pg_class c
+            JOIN pg_namespace n ON n.oid = c.relnamespace
+            WHERE n.nspname = %s AND c.relname = %s
+        """,
+            [table.schema_name, table.table_name],
+        )
+        row = cursor.fetchone()
+        row_count = row[0] if row and row[0] >= 0 else None
+        if row_count != table.row_count:
+            Table.objects.filter(pk=table.pk).update(row_count=row_count)
+
+        # Los arreglos anyarray se leen como texto, el tipo de los valores no importa aquí
+        cursor.execute(
+            """
+            SELECT
+                attname,
+                null_frac,
+                n_distinct,
+                avg_width,
+                correlation,
+                most_common_vals::text::text[],
+                most_common_freqs,
+                histogram_bounds::text::text[]
+            FROM pg_stats
+            WHERE schemaname = %s AND tablename = %s AND NOT inherited
+        """,
+            [table.schema_name, table.table_name],
+        )
+        stats_data = {row[0]: row[1:] for row in cursor.fetchall()}
+        if not stats_data:
+            self.stdout.write(self.style.WARNING("    ⚠️  Sin estadísticas, ejecute ANALYZE sobre la tabla"))
+            return
+
+        columns = table.columns.filter(column_name__in=stats_data)
+        for column in columns:
+            null_frac, n_distinct, avg_width, correlation, values, freqs, bounds = stats_data[column.column_name]
+            ColumnStatistics.objects.update_or_create(
+                column=column,
+                defaults={
+                    "null_frac": null_frac,
+                    "n_distinct": n_distinct,
+                    "avg_width": avg_width,
+                    "correlation": correlation,
+                    "most_common_values": _compact_values((values or [])[: ColumnStatistics.MAX_VALUES]),
+                    "most_common_freqs": list((freqs or [])[: ColumnStatistics.MAX_VALUES]),
+                    "histogram_bounds": _compact_values(_sample_bounds(bounds or [], ColumnStatistics.MAX_VALUES)),
+                },
+            )
+        self.stdout.write(f"    📈 Estadísticas de {len(columns)} columnas")
+
     def _sync_mysql(self, database, conn):
         """Sincroniza metadatos para MySQL"""
         self.stdout.write("📊 Sincronizando tablas y columnas de MySQL...")
@@ -348,3 +445,17 @@ class Command(BaseCommand):
                     )
 
                 self.stdout.write(f"    💾 {len(columns_data)} columnas sincronizadas")
+
+
+def _compact_values(values):
+    """Recorta los valores largos, las estadísticas solo guardan un resumen"""
+    limit = ColumnStatistics.MAX_VALUE_LENGTH
+    return [value if value is None or len(value) <= limit else value[:limit] for value in values]
+
+
+def _sample_bounds(bounds, buckets):
+    """Reduce el histograma a buckets + 1 límites equiespaciados, conservando el primero y el último"""
+    if len(bounds) <= buckets + 1:
+        return list(bounds)
+    step = (len(bounds) - 1) / buckets
+    return [bounds[round(i * step)] for i in range(buckets + 1)]
@@ -0,0 +1,56 @@
+"""
+Process-wide counters stored in the default cache (Redis).
+
+Counters never expire and are shared by every web and worker process, so they
+can be read from any instance through ``get_counters``.
+"""
+
+import logging
+
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "metrics:"
+
+# Known counters, listed so they are reported even before their first increment
+REPORT_CANCELLED_SUPERSEDED = "report.cancelled.superseded"
+REPORT_CANCELLED_DISCONNECTED = "report.cancelled.disconnected"
+REPORT_PLAN_COMPILED = "report.plan.compiled"
+REPORT_ARTIFACT_SERVED = "report.artifact.served"
+
+COUNTERS = [
+    REPORT_CANCELLED_SUPERSEDED,
+    REPORT_CANCELLED_DISCONNECTED,
+    REPORT_PLAN_COMPILED,
+    REPORT_ARTIFACT_SERVED,
+]
+
+
+def incr(name, amount=1):
+    """Increments a counter, creating it when missing"""
+    key = f"{KEY_PREFIX}{name}"
+    cache.add(key, 0, timeout=None)
+    try:
+        return cache.incr(key, amount)
+    except ValueError:
+        # Evicted between add and incr
+        cache.set(key, amount, timeout=None)
+        return amount
+
+
+async def aincr(name, amount=1):
+    """Async version of ``incr``"""
+    key = f"{KEY_PREFIX}{name}"
+    await cache.aadd(key, 0, timeout=None)
+    try:
+        return await cache.aincr(key, amount)
+    except ValueError:
+        await cache.aset(key, amount, timeout=None)
+        return amount
+
+
+def get_counters():
+    """Returns the current value of every known counter"""
+    values = cache.get_many([f"{KEY_PREFIX}{name}" for name in COUNTERS])
+    return {name: values.get(f"{KEY_PREFIX}{name}", 0) for name in COUNTERS}
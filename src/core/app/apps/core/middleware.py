@@ -0,0 +1,77 @@
+"""
+Middleware of the core app.
+"""
+
+import json
+import logging
+import random
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+from apps.core import profiling
+
+logger = logging.getLogger(__name__)
+
+
+class ProfilingMiddleware:
+    """
+    Profiles the SQL, template and PDF time of a request
+
+    A request is profiled when it sends the ``REQUEST_PROFILING_HEADER`` header
+    (if ``REQUEST_PROFILING_ALLOW_HEADER``) or is picked by
+    ``REQUEST_PROFILING_SAMPLE_RATE``. The profile is returned in the
+    ``Server-Timing`` header (shown by the browser dev tools) and logged as one
+    JSON line, with a warning when a statement repeats (N+1 queries).
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+        profiling.install_template_timing()
+
+    def should_profile(self, request):
+        if settings.REQUEST_PROFILING_ALLOW_HEADER and request.headers.get(settings.REQUEST_PROFILING_HEADER):
+            return True
+        rate = settings.REQUEST_PROFILING_SAMPLE_RATE
+        return rate > 0 and random.random() < rate
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self.should_profile(request):
+            return self.get_response(request)
+
+        with profiling.activate(profiling.Profile()) as profile:
+            response = self.get_response(request)
+        self.finish(request, response, profile)
+        return response
+
+    async def __acall__(self, request):
+        if not self.should_profile(request):
+            return await self.get_response(request)
+
+        with profiling.activate(profiling.Profile()) as profile:
+            response = await self.get_response(request)
+        self.finish(request, response, profile)
+        return response
+
+    def finish(self, request, response, profile):
+        response["Server-Timing"] = profile.server_timing()
+
+        data = profile.as_dict(settings.REQUEST_PROFILING_DUPLICATE_THRESHOLD)
+        data.update({"method": request.method, "path": request.path, "status": response.status_code})
+        logger.info("request profile %s", json.dumps(data, ensure_ascii=False))
+
+        for duplicate in data["duplicates"]:
+            logger.warning(
+                "Repeated query (%s times on %s) in %s: %s",
+                duplicate["count"],
+                duplicate["alias"],
+                request.path,
+                duplicate["sql"],
+            )
@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-19 00:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='report',
+            name='replica_max_lag',
+            field=models.PositiveIntegerField(blank=True, help_text='Retraso máximo de replicación aceptado para leer desde una réplica. Si se deja vacío, se usa el valor global.', null=True, verbose_name='Tolerancia de réplica (segundos)'),
+        ),
+    ]
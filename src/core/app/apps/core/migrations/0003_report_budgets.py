@@ -0,0 +1,33 @@
+# Generated by Django 5.2 on 2026-10-19 00:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_report_replica_max_lag'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='report',
+            name='max_concurrency',
+            field=models.PositiveIntegerField(blank=True, help_text='Máximo de ejecuciones simultáneas de este reporte. Si se deja vacío, no hay límite propio.', null=True, verbose_name='Ejecuciones simultáneas'),
+        ),
+        migrations.AddField(
+            model_name='report',
+            name='max_export_rows',
+            field=models.PositiveIntegerField(blank=True, help_text='Si se deja vacío, se usa el valor global.', null=True, verbose_name='Máximo de filas a exportar'),
+        ),
+        migrations.AddField(
+            model_name='report',
+            name='statement_timeout',
+            field=models.PositiveIntegerField(blank=True, help_text='Si se deja vacío, se usa el valor global.', null=True, verbose_name='Tiempo máximo de consulta (segundos)'),
+        ),
+        migrations.AddField(
+            model_name='report',
+            name='work_mem',
+            field=models.CharField(blank=True, default='', help_text='Por ejemplo 64MB. Si se deja vacío, se usa el valor global.', max_length=20, verbose_name='Memoria de trabajo (work_mem)'),
+        ),
+    ]
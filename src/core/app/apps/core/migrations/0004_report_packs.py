@@ -0,0 +1,50 @@
+# Generated by Django 5.2 on 2026-10-19 00:59
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_report_budgets'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReportPack',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('is_active', models.BooleanField(default=True, verbose_name='Activo')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Creado el')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Actualizado el')),
+                ('name', models.CharField(max_length=255, unique=True, verbose_name='Nombre del paquete')),
+                ('description', models.TextField(blank=True, null=True, verbose_name='Descripción')),
+            ],
+            options={
+                'verbose_name': 'Paquete de reportes',
+                'verbose_name_plural': 'Paquetes de reportes',
+                'ordering': ['name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ReportPackItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('order', models.PositiveIntegerField(default=0, verbose_name='Orden')),
+                ('pack', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='items', to='core.reportpack', verbose_name='Paquete')),
+                ('report', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pack_items', to='core.report', verbose_name='Reporte')),
+            ],
+            options={
+                'verbose_name': 'Reporte del paquete',
+                'verbose_name_plural': 'Reportes del paquete',
+                'ordering': ['pack', 'order'],
+                'unique_together': {('pack', 'report')},
+            },
+        ),
+        migrations.AddField(
+            model_name='reportpack',
+            name='reports',
+            field=models.ManyToManyField(related_name='packs', through='core.ReportPackItem', to='core.report', verbose_name='Reportes'),
+        ),
+    ]
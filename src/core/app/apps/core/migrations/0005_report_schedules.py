@@ -0,0 +1,59 @@
+# Generated by Django 5.2 on 2026-10-19 01:01
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_report_packs'),
+        ('django_celery_beat', '0019_alter_periodictasks_options'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReportSchedule',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('is_active', models.BooleanField(default=True, verbose_name='Activo')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Creado el')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Actualizado el')),
+                ('date_range', models.CharField(choices=[('yesterday', 'Ayer'), ('last_7_days', 'Últimos 7 días (hasta ayer)'), ('last_30_days', 'Últimos 30 días (hasta ayer)'), ('previous_month', 'Mes anterior')], default='yesterday', max_length=20, verbose_name='Rango de fechas')),
+                ('generate_pdf', models.BooleanField(default=True, verbose_name='Generar PDF')),
+                ('generate_csv', models.BooleanField(default=False, verbose_name='Generar CSV')),
+                ('retention_days', models.PositiveIntegerField(default=7, verbose_name='Días de retención')),
+                ('crontab', models.ForeignKey(help_text='Cuándo se genera, por ejemplo todos los días a las 02:00.', on_delete=django.db.models.deletion.PROTECT, to='django_celery_beat.crontabschedule', verbose_name='Horario')),
+                ('periodic_task', models.OneToOneField(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='report_schedule', to='django_celery_beat.periodictask', verbose_name='Tarea periódica')),
+                ('report', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='schedules', to='core.report', verbose_name='Reporte')),
+            ],
+            options={
+                'verbose_name': 'Programación de reporte',
+                'verbose_name_plural': 'Programaciones de reportes',
+                'ordering': ['report', 'crontab'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ReportArtifact',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('format', models.CharField(choices=[('pdf', 'PDF'), ('csv', 'CSV')], max_length=10, verbose_name='Formato')),
+                ('start_date', models.DateField(verbose_name='Fecha inicial')),
+                ('end_date', models.DateField(verbose_name='Fecha final')),
+                ('plan_fingerprint', models.CharField(help_text='Configuración del reporte con la que se generó, si cambia el archivo deja de servirse.', max_length=64, verbose_name='Huella del plan')),
+                ('file', models.FileField(upload_to='report_artifacts/%Y/%m/%d', verbose_name='Archivo')),
+                ('filename', models.CharField(max_length=255, verbose_name='Nombre del archivo')),
+                ('total_count', models.PositiveIntegerField(default=0, verbose_name='Número de registros')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Creado el')),
+                ('expires_at', models.DateTimeField(verbose_name='Expira el')),
+                ('report', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='artifacts', to='core.report', verbose_name='Reporte')),
+                ('schedule', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='artifacts', to='core.reportschedule', verbose_name='Programación')),
+            ],
+            options={
+                'verbose_name': 'Archivo pregenerado',
+                'verbose_name_plural': 'Archivos pregenerados',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['report', 'format', 'start_date', 'end_date'], name='core_report_report__32a2ac_idx')],
+            },
+        ),
+    ]
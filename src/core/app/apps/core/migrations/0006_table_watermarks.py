@@ -0,0 +1,23 @@
+# Generated by Django 5.2 on 2026-10-19 01:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_report_schedules'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='table',
+            name='watermark_column',
+            field=models.CharField(blank=True, default='', help_text='Columna (idealmente indexada) que crece con cada cambio, para la detección por columna de fecha.', max_length=255, verbose_name='Columna de fecha para cambios'),
+        ),
+        migrations.AddField(
+            model_name='table',
+            name='watermark_strategy',
+            field=models.CharField(choices=[('stats', 'Estadísticas de la tabla'), ('timestamp', 'Columna de fecha'), ('xmin', 'Versión de filas (tablas pequeñas)')], default='stats', help_text='Cómo se detecta que los datos cambiaron, para reutilizar resultados en caché. La versión de filas recorre la tabla completa, úsela solo en tablas pequeñas.', max_length=20, verbose_name='Detección de cambios'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2 on 2026-10-19 01:19
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_table_watermarks'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ColumnStatistics',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('null_frac', models.FloatField(verbose_name='Fracción de nulos')),
+                ('n_distinct', models.FloatField(help_text='Negativo: fracción de las filas (-1 es único). Positivo: número estimado de valores.', verbose_name='Valores distintos')),
+                ('avg_width', models.IntegerField(verbose_name='Ancho promedio (bytes)')),
+                ('correlation', models.FloatField(blank=True, help_text='Orden físico frente al orden de los valores, cercano a 1 o -1 si la columna es monótona.', null=True, verbose_name='Correlación')),
+                ('most_common_values', models.JSONField(blank=True, default=list, verbose_name='Valores más comunes')),
+                ('most_common_freqs', models.JSONField(blank=True, default=list, verbose_name='Frecuencias más comunes')),
+                ('histogram_bounds', models.JSONField(blank=True, default=list, verbose_name='Límites del histograma')),
+                ('collected_at', models.DateTimeField(auto_now=True, verbose_name='Recolectado el')),
+                ('column', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='statistics', to='core.column', verbose_name='Columna')),
+            ],
+            options={
+                'verbose_name': 'Estadísticas de columna',
+                'verbose_name_plural': 'Estadísticas de columnas',
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2 on 2026-10-19 01:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_column_statistics'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='report',
+            name='pivot_top',
+            field=models.PositiveSmallIntegerField(default=10, help_text='Valores más frecuentes de la dimensión de columnas que se muestran como columnas. El reporte es una tabla dinámica cuando tiene columnas con los roles fila, columna y valor.', verbose_name='Columnas de la tabla dinámica'),
+        ),
+        migrations.AddField(
+            model_name='reportcolumn',
+            name='pivot_role',
+            field=models.CharField(choices=[('none', 'Ninguno'), ('row', 'Fila'), ('column', 'Columna'), ('value', 'Valor')], default='none', help_text='Fila: agrupa las filas. Columna: sus valores son las columnas. Valor: se agrega con su función.', max_length=10, verbose_name='Rol en la tabla dinámica'),
+        ),
+    ]
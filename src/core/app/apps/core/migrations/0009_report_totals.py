@@ -0,0 +1,23 @@
+# Generated by Django 5.2 on 2026-10-19 01:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_report_pivot'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='report',
+            name='totals',
+            field=models.CharField(choices=[('none', 'Sin totales'), ('total', 'Total general'), ('subtotals', 'Subtotales por intervalo y total general')], default='none', help_text='Filas de totales de las columnas con función de agregación, calculadas en la misma consulta. Los subtotales aplican a reportes por intervalo.', max_length=10, verbose_name='Totales'),
+        ),
+        migrations.AlterField(
+            model_name='reportcolumn',
+            name='aggregate',
+            field=models.CharField(choices=[('none', 'Ninguna (Primer valor)'), ('sum', 'Suma'), ('avg', 'Promedio'), ('min', 'Mínimo'), ('max', 'Máximo'), ('count', 'Contar')], default='none', help_text='Función a aplicar cuando se agrupa por intervalos y en los totales', max_length=10, verbose_name='Función de agregación'),
+        ),
+    ]
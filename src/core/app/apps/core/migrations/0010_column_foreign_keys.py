@@ -0,0 +1,28 @@
+# Generated by Django 5.2 on 2026-10-19 01:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_report_totals'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='column',
+            name='foreign_column',
+            field=models.CharField(blank=True, max_length=255, null=True, verbose_name='Columna referenciada'),
+        ),
+        migrations.AddField(
+            model_name='column',
+            name='foreign_schema',
+            field=models.CharField(blank=True, max_length=255, null=True, verbose_name='Esquema referenciado'),
+        ),
+        migrations.AddField(
+            model_name='column',
+            name='is_indexed',
+            field=models.BooleanField(default=False, help_text='Es la primera columna de algún índice.', verbose_name='Indexada'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2 on 2026-10-19 01:42
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.operations
+import django.db.models.functions.text
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_column_foreign_keys'),
+    ]
+
+    operations = [
+        django.contrib.postgres.operations.TrigramExtension(),
+        migrations.AddIndex(
+            model_name='column',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('column_name'), name='gin_trgm_ops'), name='core_column_name_trgm'),
+        ),
+        migrations.AddIndex(
+            model_name='table',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('table_name'), name='gin_trgm_ops'), name='core_table_name_trgm'),
+        ),
+        migrations.AddIndex(
+            model_name='table',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('schema_name'), name='gin_trgm_ops'), name='core_table_schema_trgm'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2 on 2026-10-19 01:54
+
+import apps.core.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_catalog_search'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='report',
+            name='work_mem',
+            field=models.CharField(blank=True, default='', help_text='Por ejemplo 64MB. Si se deja vacío, se usa el valor global.', max_length=20, validators=[apps.core.models.validate_work_mem], verbose_name='Memoria de trabajo (work_mem)'),
+        ),
+    ]
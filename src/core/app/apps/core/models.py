@@ -1,6 +1,13 @@
+import json
 import logging
+import re
+from datetime import date, timedelta
 
+from django.conf import settings
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.core.exceptions import ValidationError
 from django.db import models
+from django.db.models.functions import Upper
 from django.utils.translation import gettext_lazy as _
 
 logger = logging.getLogger(__name__)
@@ -45,6 +52,11 @@ class Database(BaseModel):
 class Table(BaseModel):
     """Represents a table in the database"""
 
+    class WatermarkStrategy(models.TextChoices):
+        STATS = "stats", _("Estadísticas de la tabla")
+        TIMESTAMP = "timestamp", _("Columna de fecha")
+        XMIN = "xmin", _("Versión de filas (tablas pequeñas)")
+
     database = models.ForeignKey(
         Database, on_delete=models.CASCADE, related_name="tables", verbose_name=_("Base de datos")
     )
@@ -53,16 +65,46 @@ class Table(BaseModel):
     table_type = models.CharField(max_length=50, verbose_name=_("Tipo de tabla"), default="BASE TABLE")
     description = models.TextField(blank=True, null=True, verbose_name=_("Descripción"))
     row_count = models.BigIntegerField(null=True, blank=True, verbose_name=_("Número de filas"))
+    watermark_strategy = models.CharField(
+        max_length=20,
+        choices=WatermarkStrategy.choices,
+        default=WatermarkStrategy.STATS,
+        verbose_name=_("Detección de cambios"),
+        help_text=_(
+            "Cómo se detecta que los datos cambiaron, para reutilizar resultados en caché. "
+            "La versión de filas recorre la tabla completa, úsela solo en tablas pequeñas."
+        ),
+    )
+    watermark_column = models.CharField(
+        max_length=255,
+        blank=True,
+        default="",
+        verbose_name=_("Columna de fecha para cambios"),
+        help_text=_("Columna (idealmente indexada) que crece con cada cambio, para la detección por columna de fecha."),
+    )
 
     class Meta:
         verbose_name = _("Tabla")
         verbose_name_plural = _("Tablas")
         ordering = ["schema_name", "table_name"]
         unique_together = [["database", "schema_name", "table_name"]]
+        # Catalog search (icontains/istartswith compare UPPER(name)), see config_report_tables_view
+        indexes = [
+            GinIndex(OpClass(Upper("table_name"), name="gin_trgm_ops"), name="core_table_name_trgm"),
+            GinIndex(OpClass(Upper("schema_name"), name="gin_trgm_ops"), name="core_table_schema_trgm"),
+        ]
 
     def __str__(self):
         return self.table_name
 
+    def clean(self):
+        if self.watermark_strategy == self.WatermarkStrategy.TIMESTAMP and not self.watermark_column:
+            raise ValidationError({"watermark_column": _("Indique la columna de fecha para detectar cambios.")})
+
+
+NUMERIC_TYPES = {"smallint", "integer", "bigint", "numeric", "decimal", "real", "double precision"}
+TEXT_TYPES = {"text", "character varying", "character", "citext"}
+
 
 class Column(BaseModel):
     """Represents a column in a table"""
@@ -81,6 +123,11 @@ class Column(BaseModel):
     is_primary_key = models.BooleanField(default=False, verbose_name=_("Es llave primaria"))
     is_foreign_key = models.BooleanField(default=False, verbose_name=_("Es llave foránea"))
     foreign_table = models.CharField(max_length=255, null=True, blank=True, verbose_name=_("Tabla referenciada"))
+    foreign_schema = models.CharField(max_length=255, null=True, blank=True, verbose_name=_("Esquema referenciado"))
+    foreign_column = models.CharField(max_length=255, null=True, blank=True, verbose_name=_("Columna referenciada"))
+    is_indexed = models.BooleanField(
+        default=False, verbose_name=_("Indexada"), help_text=_("Es la primera columna de algún índice.")
+    )
     description = models.TextField(blank=True, null=True, verbose_name=_("Descripción"))
 
     class Meta:
@@ -88,6 +135,7 @@ class Column(BaseModel):
         verbose_name_plural = _("Columnas")
         ordering = ["table", "ordinal_position"]
         unique_together = [["table", "column_name"]]
+        indexes = [GinIndex(OpClass(Upper("column_name"), name="gin_trgm_ops"), name="core_column_name_trgm")]
 
     def __str__(self):
         return f"{self.table}.{self.column_name}"
@@ -96,6 +144,132 @@ class Column(BaseModel):
     def slug(self):
         return f"{self.table.schema_name}_{self.table.table_name}_{self.column_name}".lower()
 
+    def get_statistics(self):
+        """Returns the collected statistics of the column, None when they were not collected"""
+        try:
+            return self.statistics
+        except ColumnStatistics.DoesNotExist:
+            return None
+
+    @property
+    def is_searchable(self):
+        """Text columns are matched by the search of report results (see advise_report_indexes)"""
+        return self.data_type.lower() in TEXT_TYPES
+
+    @property
+    def default_format(self):
+        """Format suggested for the column from its type and, when collected, its statistics"""
+        data_type = self.data_type.lower()
+        if data_type.startswith("timestamp"):
+            return ReportColumn.FormatColumn.DATETIME
+        if data_type == "date":
+            return ReportColumn.FormatColumn.DATE
+        if data_type == "boolean":
+            return ReportColumn.FormatColumn.BOOLEAN
+        if data_type in NUMERIC_TYPES:
+            statistics = self.get_statistics()
+            # Integer flags stored as 0/1
+            if statistics and statistics.is_flag:
+                return ReportColumn.FormatColumn.BOOLEAN
+            if data_type == "numeric" and self.numeric_scale == 2:
+                return ReportColumn.FormatColumn.CURRENCY
+            return ReportColumn.FormatColumn.NUMBER
+        return ReportColumn.FormatColumn.TEXT
+
+
+class ColumnStatistics(models.Model):
+    """Planner statistics of a column (pg_stats), collected by sync_database_metadata --stats"""
+
+    # Stored values are capped, the record stays small whatever the statistics target
+    MAX_VALUES = 10
+    MAX_VALUE_LENGTH = 100
+    LOW_CARDINALITY = 50
+
+    column = models.OneToOneField(Column, on_delete=models.CASCADE, related_name="statistics", verbose_name=_("Columna"))
+    null_frac = models.FloatField(verbose_name=_("Fracción de nulos"))
+    n_distinct = models.FloatField(
+        verbose_name=_("Valores distintos"),
+        help_text=_("Negativo: fracción de las filas (-1 es único). Positivo: número estimado de valores."),
+    )
+    avg_width = models.IntegerField(verbose_name=_("Ancho promedio (bytes)"))
+    correlation = models.FloatField(
+        null=True,
+        blank=True,
+        verbose_name=_("Correlación"),
+        help_text=_("Orden físico frente al orden de los valores, cercano a 1 o -1 si la columna es monótona."),
+    )
+    most_common_values = models.JSONField(default=list, blank=True, verbose_name=_("Valores más comunes"))
+    most_common_freqs = models.JSONField(default=list, blank=True, verbose_name=_("Frecuencias más comunes"))
+    histogram_bounds = models.JSONField(default=list, blank=True, verbose_name=_("Límites del histograma"))
+    collected_at = models.DateTimeField(auto_now=True, verbose_name=_("Recolectado el"))
+
+    class Meta:
+        verbose_name = _("Estadísticas de columna")
+        verbose_name_plural = _("Estadísticas de columnas")
+
+    def __str__(self):
+        return str(self.column)
+
+    def get_distinct_count(self, row_count=None):
+        """Estimated number of distinct values, None when it depends on an unknown row count"""
+        if self.n_distinct >= 0:
+            return round(self.n_distinct)
+        if row_count is None:
+            return None
+        return round(-self.n_distinct * row_count)
+
+    @property
+    def is_unique(self):
+        return self.n_distinct == -1
+
+    @property
+    def is_low_cardinality(self):
+        """A few repeated values, good for filters, grouping and pickers"""
+        return 0 < self.n_distinct <= self.LOW_CARDINALITY
+
+    @property
+    def is_mostly_null(self):
+        return self.null_frac >= 0.5
+
+    @property
+    def is_monotonic(self):
+        """Values follow the physical order of the rows, range scans and sorting on it are cheap"""
+        return self.correlation is not None and abs(self.correlation) >= 0.9
+
+    @property
+    def is_keyset_candidate(self):
+        """Unique and never null, it can be the key of keyset pagination"""
+        return self.is_unique and self.null_frac == 0
+
+    @property
+    def is_flag(self):
+        return self.n_distinct == 2 and {str(value) for value in self.most_common_values} <= {"0", "1"}
+
+
+WORK_MEM_PATTERN = re.compile(r"(\d+)(kB|MB|GB)")
+WORK_MEM_UNITS = {"kB": 1, "MB": 1024, "GB": 1024 * 1024}
+# Smallest work_mem PostgreSQL accepts
+MIN_WORK_MEM_KB = 64
+
+
+def parse_work_mem(value):
+    """Returns a work_mem value (e.g. 64MB) in kB, or None if PostgreSQL would reject its format"""
+    match = WORK_MEM_PATTERN.fullmatch(value or "")
+    if match is None:
+        return None
+    return int(match[1]) * WORK_MEM_UNITS[match[2]]
+
+
+def validate_work_mem(value):
+    """Validates a work_mem value before it reaches set_config, capped by REPORT_MAX_WORK_MEM"""
+    kilobytes = parse_work_mem(value)
+    if kilobytes is None:
+        raise ValidationError(_("Use un número seguido de kB, MB o GB, sin espacios. Por ejemplo 64MB."))
+    if kilobytes < MIN_WORK_MEM_KB:
+        raise ValidationError(_("El mínimo permitido es 64kB."))
+    if kilobytes > parse_work_mem(settings.REPORT_MAX_WORK_MEM):
+        raise ValidationError(_("El máximo permitido es %(maximum)s."), params={"maximum": settings.REPORT_MAX_WORK_MEM})
+
 
 class Report(BaseModel):
     """Represents a report configuration"""
@@ -108,6 +282,11 @@ class Report(BaseModel):
         ASC = "asc", _("Ascendente")
         DESC = "desc", _("Descendente")
 
+    class Totals(models.TextChoices):
+        NONE = "none", _("Sin totales")
+        TOTAL = "total", _("Total general")
+        SUBTOTALS = "subtotals", _("Subtotales por intervalo y total general")
+
     class Interval(models.TextChoices):
         ALL = "all", _("Todos")
         FIVE = "5", _("5 minutos")
@@ -128,6 +307,59 @@ class Report(BaseModel):
     interval = models.CharField(
         max_length=10, choices=Interval.choices, default=Interval.ALL, verbose_name=_("Intervalo")
     )
+    totals = models.CharField(
+        max_length=10,
+        choices=Totals.choices,
+        default=Totals.NONE,
+        verbose_name=_("Totales"),
+        help_text=_(
+            "Filas de totales de las columnas con función de agregación, calculadas en la misma consulta. "
+            "Los subtotales aplican a reportes por intervalo."
+        ),
+    )
+    replica_max_lag = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        verbose_name=_("Tolerancia de réplica (segundos)"),
+        help_text=_(
+            "Retraso máximo de replicación aceptado para leer desde una réplica. "
+            "Si se deja vacío, se usa el valor global."
+        ),
+    )
+    statement_timeout = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        verbose_name=_("Tiempo máximo de consulta (segundos)"),
+        help_text=_("Si se deja vacío, se usa el valor global."),
+    )
+    work_mem = models.CharField(
+        max_length=20,
+        blank=True,
+        default="",
+        validators=[validate_work_mem],
+        verbose_name=_("Memoria de trabajo (work_mem)"),
+        help_text=_("Por ejemplo 64MB. Si se deja vacío, se usa el valor global."),
+    )
+    max_export_rows = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        verbose_name=_("Máximo de filas a exportar"),
+        help_text=_("Si se deja vacío, se usa el valor global."),
+    )
+    max_concurrency = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        verbose_name=_("Ejecuciones simultáneas"),
+        help_text=_("Máximo de ejecuciones simultáneas de este reporte. Si se deja vacío, no hay límite propio."),
+    )
+    pivot_top = models.PositiveSmallIntegerField(
+        default=10,
+        verbose_name=_("Columnas de la tabla dinámica"),
+        help_text=_(
+            "Valores más frecuentes de la dimensión de columnas que se muestran como columnas. "
+            "El reporte es una tabla dinámica cuando tiene columnas con los roles fila, columna y valor."
+        ),
+    )
 
     class Meta:
         verbose_name = _("Reporte")
@@ -141,172 +373,11 @@ class Report(BaseModel):
         """Returns ordered columns for this report"""
         return self.report_columns.filter(is_visible=True).select_related("column").order_by("order")
 
-    def get_query(self):
-        """Generates the SQL SELECT query for this report"""
-        columns = self.get_columns()
-        if not columns.exists():
-            return None
-
-        # Build column list with aliases
-        column_list = []
-        for rc in columns:
-            col_name = rc.column.column_name
-            display_name = rc.get_display_name()
-            if col_name != display_name:
-                column_list.append(f'"{col_name}" AS "{display_name}"')
-            else:
-                column_list.append(f'"{col_name}"')
+    def get_plan(self):
+        """Returns the compiled (and cached) plan of this report"""
+        from apps.core.plans import get_report_plan
 
-        columns_str = ", ".join(column_list)
-        schema_table = f'"{self.table.schema_name}"."{self.table.table_name}"'
-
-        return f"SELECT {columns_str} FROM {schema_table}"
-
-    def execute_query(self, limit=None, offset=None, start_date=None, end_date=None):
-        """
-        Executes the report query and returns results
-
-        Args:
-            limit: Number of rows to return
-            offset: Number of rows to skip
-            start_date: Start date filter (string YYYY-MM-DD)
-            end_date: End date filter (string YYYY-MM-DD)
-
-        Returns:
-            tuple: (columns, rows, total_count)
-        """
-        from django.db import connections
-
-        # Get database connection
-        db_alias = self.table.database.alias
-        connection = connections[db_alias]
-
-        # Find interval and order_by columns
-        order_by_column = self.report_columns.filter(order_by=True).first()
-        interval_column = self.report_columns.filter(column__data_type__istartswith="timestamp").first()
-        date_column = self.report_columns.filter(column__data_type__istartswith="timestamp").first()
-
-        # Build WHERE clause for date filters
-        where_conditions = []
-        if date_column:
-            if start_date:
-                where_conditions.append(f"\"{date_column.column.column_name}\" >= '{start_date}'")
-            if end_date:
-                where_conditions.append(f"\"{date_column.column.column_name}\" < '{end_date}'::date + INTERVAL '1 day'")
-
-        # Check if we need interval grouping
-        use_interval = interval_column and self.interval != self.Interval.ALL
-
-        if use_interval:
-            # Build query with interval grouping
-            interval_minutes = int(self.interval)
-            date_col = interval_column.column.column_name
-
-            # PostgreSQL interval grouping
-            interval_select = f'''DATE_TRUNC('hour', "{date_col}") + 
-                INTERVAL '{interval_minutes} min' * 
-                FLOOR(EXTRACT(MINUTE FROM "{date_col}")::int / {interval_minutes})'''
-
-            columns = self.get_columns()
-            select_parts = [f'{interval_select} AS "{interval_column.get_display_name()}"']
-            group_by_parts = ["1"]  # GROUP BY position 1 (Intervalo)
-            current_position = 2
-
-            for rc in columns:
-                col_name = rc.column.column_name
-                display_name = rc.get_display_name()
-
-                if rc == interval_column:
-                    # Skip the interval column, already added
-                    continue
-                elif rc.aggregate != ReportColumn.AggregateFunction.NONE:
-                    # Apply aggregate function
-                    agg_func = rc.aggregate.upper()
-                    select_parts.append(f'{agg_func}("{col_name}") AS "{display_name}"')
-                    current_position += 1
-                else:
-                    # Group by other columns (first value)
-                    select_parts.append(f'"{col_name}" AS "{display_name}"')
-                    group_by_parts.append(str(current_position))
-                    current_position += 1
-
-            columns_str = ", ".join(select_parts)
-            schema_table = f'"{self.table.schema_name}"."{self.table.table_name}"'
-            query = f"SELECT {columns_str} FROM {schema_table}"
-
-            # Add WHERE clause
-            if where_conditions:
-                query += f" WHERE {' AND '.join(where_conditions)}"
-
-            # Add GROUP BY
-            query += f" GROUP BY {', '.join(group_by_parts)}"
-
-            # Add ORDER BY
-            if self.order:
-                query += f' ORDER BY "{interval_column.get_display_name()}" {self.order.upper()}'
-
-            # For interval queries, we need to count grouped results
-            with connection.cursor() as cursor:
-                # Build count query - count distinct groups
-                count_query = f"SELECT COUNT(*) FROM ({query}) AS grouped_results"
-                cursor.execute(count_query)
-                total_count = cursor.fetchone()[0]
-
-                # Add pagination to main query
-                if limit is not None:
-                    query += f" LIMIT {limit}"
-                if offset is not None:
-                    query += f" OFFSET {offset}"
-
-                logger.debug("Query generated with interval: %s", query)
-                cursor.execute(query)
-
-                # Get column names
-                columns = [col[0] for col in cursor.description]
-
-                # Fetch all rows
-                rows = cursor.fetchall()
-
-            return columns, rows, total_count
-        else:
-            # Regular query without grouping
-            query = self.get_query()
-            if not query:
-                return [], [], 0
-
-            # Add WHERE clause
-            if where_conditions:
-                query += f" WHERE {' AND '.join(where_conditions)}"
-
-            # Add ORDER BY
-            if order_by_column and self.order:
-                query += f' ORDER BY "{order_by_column.column.column_name}" {self.order.upper()}'
-
-        with connection.cursor() as cursor:
-            # Build count query
-            count_query = f'SELECT COUNT(*) FROM "{self.table.schema_name}"."{self.table.table_name}"'
-            if where_conditions:
-                count_query += f" WHERE {' AND '.join(where_conditions)}"
-
-            cursor.execute(count_query)
-            total_count = cursor.fetchone()[0]
-
-            # Execute main query with pagination
-            if limit is not None:
-                query += f" LIMIT {limit}"
-            if offset is not None:
-                query += f" OFFSET {offset}"
-
-            logger.debug("Query generated without interval: %s", query)
-            cursor.execute(query)
-
-            # Get column names
-            columns = [col[0] for col in cursor.description]
-
-            # Fetch all rows
-            rows = cursor.fetchall()
-
-        return columns, rows, total_count
+        return get_report_plan(self.pk)
 
 
 class ReportColumn(models.Model):
@@ -328,6 +399,12 @@ class ReportColumn(models.Model):
         MAX = "max", _("Máximo")
         COUNT = "count", _("Contar")
 
+    class PivotRole(models.TextChoices):
+        NONE = "none", _("Ninguno")
+        ROW = "row", _("Fila")
+        COLUMN = "column", _("Columna")
+        VALUE = "value", _("Valor")
+
     report = models.ForeignKey(
         Report, on_delete=models.CASCADE, related_name="report_columns", verbose_name=_("Reporte")
     )
@@ -354,7 +431,14 @@ class ReportColumn(models.Model):
         choices=AggregateFunction.choices,
         default=AggregateFunction.NONE,
         verbose_name=_("Función de agregación"),
-        help_text=_("Función a aplicar cuando se agrupa por intervalos"),
+        help_text=_("Función a aplicar cuando se agrupa por intervalos y en los totales"),
+    )
+    pivot_role = models.CharField(
+        max_length=10,
+        choices=PivotRole.choices,
+        default=PivotRole.NONE,
+        verbose_name=_("Rol en la tabla dinámica"),
+        help_text=_("Fila: agrupa las filas. Columna: sus valores son las columnas. Valor: se agrega con su función."),
     )
 
     class Meta:
@@ -369,3 +453,159 @@ class ReportColumn(models.Model):
     def get_display_name(self):
         """Returns the display name or the column name if not set"""
         return self.display_name or self.column.column_name
+
+
+class ReportPack(BaseModel):
+    """Represents a named set of reports generated together for one date range"""
+
+    name = models.CharField(max_length=255, unique=True, verbose_name=_("Nombre del paquete"))
+    description = models.TextField(blank=True, null=True, verbose_name=_("Descripción"))
+    reports = models.ManyToManyField(Report, through="ReportPackItem", related_name="packs", verbose_name=_("Reportes"))
+
+    class Meta:
+        verbose_name = _("Paquete de reportes")
+        verbose_name_plural = _("Paquetes de reportes")
+        ordering = ["name"]
+
+    def __str__(self):
+        return self.name
+
+
+class ReportPackItem(models.Model):
+    """Represents a report included in a report pack"""
+
+    pack = models.ForeignKey(ReportPack, on_delete=models.CASCADE, related_name="items", verbose_name=_("Paquete"))
+    report = models.ForeignKey(Report, on_delete=models.CASCADE, related_name="pack_items", verbose_name=_("Reporte"))
+    order = models.PositiveIntegerField(verbose_name=_("Orden"), default=0)
+
+    class Meta:
+        verbose_name = _("Reporte del paquete")
+        verbose_name_plural = _("Reportes del paquete")
+        ordering = ["pack", "order"]
+        unique_together = [["pack", "report"]]
+
+    def __str__(self):
+        return f"{self.pack.name} - {self.report.name}"
+
+
+class ReportSchedule(BaseModel):
+    """Represents a recurring, off-peak pre-generation of a report"""
+
+    class DateRange(models.TextChoices):
+        YESTERDAY = "yesterday", _("Ayer")
+        LAST_7_DAYS = "last_7_days", _("Últimos 7 días (hasta ayer)")
+        LAST_30_DAYS = "last_30_days", _("Últimos 30 días (hasta ayer)")
+        PREVIOUS_MONTH = "previous_month", _("Mes anterior")
+
+    report = models.ForeignKey(Report, on_delete=models.CASCADE, related_name="schedules", verbose_name=_("Reporte"))
+    date_range = models.CharField(
+        max_length=20, choices=DateRange.choices, default=DateRange.YESTERDAY, verbose_name=_("Rango de fechas")
+    )
+    crontab = models.ForeignKey(
+        "django_celery_beat.CrontabSchedule",
+        on_delete=models.PROTECT,
+        verbose_name=_("Horario"),
+        help_text=_("Cuándo se genera, por ejemplo todos los días a las 02:00."),
+    )
+    generate_pdf = models.BooleanField(default=True, verbose_name=_("Generar PDF"))
+    generate_csv = models.BooleanField(default=False, verbose_name=_("Generar CSV"))
+    retention_days = models.PositiveIntegerField(default=7, verbose_name=_("Días de retención"))
+    periodic_task = models.OneToOneField(
+        "django_celery_beat.PeriodicTask",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        editable=False,
+        related_name="report_schedule",
+        verbose_name=_("Tarea periódica"),
+    )
+
+    class Meta:
+        verbose_name = _("Programación de reporte")
+        verbose_name_plural = _("Programaciones de reportes")
+        ordering = ["report", "crontab"]
+
+    def __str__(self):
+        return f"{self.report.name} - {self.get_date_range_display()}"
+
+    def get_date_range(self, today=None):
+        """
+        Returns the closed date range covered by a run
+
+        Returns:
+            tuple: (start_date, end_date) as date objects
+        """
+        today = today or date.today()
+        yesterday = today - timedelta(days=1)
+        if self.date_range == self.DateRange.LAST_7_DAYS:
+            return yesterday - timedelta(days=6), yesterday
+        if self.date_range == self.DateRange.LAST_30_DAYS:
+            return yesterday - timedelta(days=29), yesterday
+        if self.date_range == self.DateRange.PREVIOUS_MONTH:
+            end_date = today.replace(day=1) - timedelta(days=1)
+            return end_date.replace(day=1), end_date
+        return yesterday, yesterday
+
+    def sync_periodic_task(self):
+        """Creates or updates the celery beat task that runs this schedule"""
+        from django_celery_beat.models import PeriodicTask
+
+        values = {
+            "name": f"report-schedule-{self.pk}",
+            "task": "apps.core.tasks.generate_scheduled_report",
+            "crontab": self.crontab,
+            "args": json.dumps([self.pk]),
+            "enabled": self.is_active,
+        }
+        task = self.periodic_task or PeriodicTask()
+        for field, value in values.items():
+            setattr(task, field, value)
+        task.save()
+
+        if self.periodic_task_id != task.pk:
+            self.periodic_task = task
+            ReportSchedule.objects.filter(pk=self.pk).update(periodic_task=task)
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self.sync_periodic_task()
+
+
+class ReportArtifact(models.Model):
+    """Represents a pre-generated report file, served instead of executing the report again"""
+
+    class Format(models.TextChoices):
+        PDF = "pdf", _("PDF")
+        CSV = "csv", _("CSV")
+
+    report = models.ForeignKey(Report, on_delete=models.CASCADE, related_name="artifacts", verbose_name=_("Reporte"))
+    schedule = models.ForeignKey(
+        ReportSchedule,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="artifacts",
+        verbose_name=_("Programación"),
+    )
+    format = models.CharField(max_length=10, choices=Format.choices, verbose_name=_("Formato"))
+    start_date = models.DateField(verbose_name=_("Fecha inicial"))
+    end_date = models.DateField(verbose_name=_("Fecha final"))
+    plan_fingerprint = models.CharField(
+        max_length=64,
+        verbose_name=_("Huella del plan"),
+        help_text=_("Configuración del reporte con la que se generó, si cambia el archivo deja de servirse."),
+    )
+    file = models.FileField(upload_to="report_artifacts/%Y/%m/%d", verbose_name=_("Archivo"))
+    filename = models.CharField(max_length=255, verbose_name=_("Nombre del archivo"))
+    total_count = models.PositiveIntegerField(default=0, verbose_name=_("Número de registros"))
+    created_at = models.DateTimeField(editable=False, auto_now_add=True, verbose_name=_("Creado el"))
+    expires_at = models.DateTimeField(verbose_name=_("Expira el"))
+
+    class Meta:
+        verbose_name = _("Archivo pregenerado")
+        verbose_name_plural = _("Archivos pregenerados")
+        ordering = ["-created_at"]
+        indexes = [models.Index(fields=["report", "format", "start_date", "end_date"])]
+
+    def __str__(self):
+        return f"{self.filename} ({self.start_date} - {self.end_date})"
@@ -0,0 +1,1146 @@
+"""
+Compiled report plans.
+
+Building a report query needs the report, its table and database and every
+report column. A ``ReportPlan`` captures everything an execution needs (SQL
+fragments with parameter slots for the date filters and pagination, column
+metadata, formats, connection alias and budgets) in an immutable object that
+is compiled once per report configuration version.
+
+The SQL is composed with ``psycopg.sql`` and every value is bound as a
+parameter, so all the pages and date ranges of a report share the same
+statement text and the server can reuse a prepared plan for them.
+
+Plans are cached in-process and in Redis. The current version of each report
+lives in Redis and is replaced whenever the report, its columns or its table
+change (see ``apps.core.signals``), so a cached plan is validated with a single
+cache read and no database query.
+"""
+
+import hashlib
+import logging
+import threading
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, replace
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from psycopg import sql
+from psycopg.types.numeric import Int8
+
+from apps.core import metrics
+from apps.core.routers import report_router
+from apps.core.watermarks import WatermarkSource, get_table_source
+
+logger = logging.getLogger(__name__)
+
+# Bump when the ReportPlan structure or the generated SQL changes
+PLAN_FORMAT_VERSION = 12
+
+# Kind of the merge_spec entries that are grouping keys, the others are aggregate functions
+MERGE_KEY = "key"
+
+# Label of the pivot column with the aggregate over every value, and of the NULL value
+PIVOT_TOTAL_NAME = "Total"
+PIVOT_NULL_NAME = "(Vacío)"
+
+# PostgreSQL truncates longer names (NAMEDATALEN - 1)
+MAX_NAME_BYTES = 63
+
+# Last column of interval reports with totals: 0 detail row, 1 subtotal, 2 grand total
+TOTALS_MARKER = "__totals__"
+SUBTOTAL_LEVEL = 1
+TOTAL_LEVEL = 2
+
+# Shorter search terms match most rows and have no trigrams to use an index with, they are ignored
+SEARCH_MIN_LENGTH = 3
+
+LOCAL_CACHE_SIZE = 256
+PLAN_CACHE_TIMEOUT = 24 * 60 * 60
+
+_local_plans = OrderedDict()
+_local_lock = threading.Lock()
+
+
+def identifier(*names):
+    """
+    Returns a quoted (optionally qualified) identifier
+
+    '%' is doubled because the statements are executed with parameters.
+    """
+    return sql.Identifier(*(name.replace("%", "%%") for name in names))
+
+
+def as_string(composable):
+    """Renders composed SQL to text, plans are stored as plain strings"""
+    return composable.as_string(None)
+
+
+def truncate_name(name, reserved=0):
+    """Cuts a column name to the bytes PostgreSQL keeps, minus the reserved ones"""
+    return name.encode()[: MAX_NAME_BYTES - reserved].decode(errors="ignore")
+
+
+def get_pivot_labels(row_name, pivot_values):
+    """
+    Returns the names of the pivot value columns
+
+    Values that render to the same name, or to the name of the row or total column,
+    would overwrite each other in the result: the repeated ones get " (2)", " (3)"...
+
+    Args:
+        row_name: Name of the row dimension column
+        pivot_values: Values of the pivot column dimension
+    """
+    taken = {truncate_name(row_name or ""), PIVOT_TOTAL_NAME}
+    labels = []
+    for value in pivot_values:
+        name = PIVOT_NULL_NAME if value is None else str(value)
+        label = truncate_name(name)
+        number = 2
+        while label in taken:
+            suffix = f" ({number})"
+            label = truncate_name(name, len(suffix.encode())) + suffix
+            number += 1
+        taken.add(label)
+        labels.append(label)
+    return labels
+
+
+def get_search_pattern(search):
+    """Returns the ILIKE pattern of a search term, its wildcards match literally"""
+    escaped = search.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+class TotalRow(tuple):
+    """Row of totals in a result, only the aggregate columns have values"""
+
+    __slots__ = ()
+    is_total = True
+    label = "Total"
+
+
+class SubtotalRow(TotalRow):
+    """Row of totals of one interval, after the rows of the interval"""
+
+    __slots__ = ()
+    label = "Subtotal"
+
+
+TOTAL_ROWS = {SUBTOTAL_LEVEL: SubtotalRow, TOTAL_LEVEL: TotalRow}
+
+
+@dataclass(frozen=True)
+class PlanColumn:
+    """Metadata of a report column, in report order"""
+
+    column_name: str
+    display_name: str
+    data_type: str
+    format: str
+    aggregate: str
+    is_visible: bool
+
+
+@dataclass(frozen=True)
+class VolumeCursor:
+    """Where the next volume of an export starts, see ``ReportPlan.aexecute_volume``"""
+
+    offset: int
+    count_row: tuple | None = None
+    pivot_values: tuple | None = None
+    # Key of the last row of the previous volume, for plans with a keyset
+    after: tuple | None = None
+
+
+@dataclass(frozen=True)
+class ReportPlan:
+    """Immutable, compiled form of a report configuration"""
+
+    id: int
+    version: str
+    name: str
+    description: str | None
+    orientation: str
+    interval: str
+    db_alias: str
+    replica_max_lag: int | None
+    statement_timeout: int | None
+    work_mem: str
+    max_export_rows: int | None
+    max_concurrency: int | None
+    columns: tuple
+    select_sql: str | None
+    from_sql: str
+    date_column: str | None
+    start_filter: str | None
+    end_filter: str | None
+    group_sql: str
+    order_sql: str
+    is_interval: bool
+    # Partial aggregates of interval reports, merged in Python when a date range is sharded
+    partial_select_sql: str | None = None
+    partial_group_sql: str = ""
+    merge_spec: tuple = ()
+    # Data watermark of the report table, see apps.core.watermarks
+    watermark: WatermarkSource | None = None
+    # Totals: interval reports end every row with TOTALS_MARKER (GROUPING SETS), plain reports
+    # compute the aggregates of totals_positions in the count query
+    totals: bool = False
+    subtotals: bool = False
+    totals_sql: str = ""
+    totals_positions: tuple = ()
+    descending: bool = False
+    # Pivot reports: select_sql holds the row dimension, the value columns come from the data
+    is_pivot: bool = False
+    pivot_column_sql: str | None = None
+    pivot_aggregate_sql: str | None = None
+    pivot_top: int = 0
+    pivot_row_name: str | None = None
+    # Joins of the tables of related columns, see apps.core.joins. With joins, base_from_sql is
+    # the report table alone when the date filter is on it: counts skip the joins and plain
+    # reports cut the page on it (push_limit) before joining
+    join_sql: str = ""
+    base_from_sql: str | None = None
+    count_from_sql: str | None = None
+    push_limit: bool = False
+    join_watermarks: tuple = ()
+    # Search in the results: the text columns of the report matched with ILIKE, a bound pattern.
+    # Matching columns of joined tables needs the joins before paginating and counting
+    search_filter: str | None = None
+    search_on_base: bool = True
+    # Export volumes of plain reports seek past a unique, not null key (the sort column and the
+    # primary key) instead of skipping the previous rows with OFFSET
+    keyset_select_sql: str = ""
+    keyset_order_sql: str = ""
+    keyset_seek_sql: str | None = None
+    keyset_size: int = 0
+
+    @property
+    def fingerprint(self):
+        """
+        Hash of the compiled content, without the version
+
+        Unlike ``version`` it only changes when the generated SQL or the column
+        metadata change, so it can identify results built from an equivalent plan.
+        """
+        return hashlib.sha256(repr(replace(self, version="")).encode()).hexdigest()
+
+    @property
+    def numeric_columns(self):
+        """Display names of the columns formatted as numbers"""
+        from apps.core.models import ReportColumn
+
+        numeric_formats = [ReportColumn.FormatColumn.NUMBER, ReportColumn.FormatColumn.CURRENCY]
+        return [column.display_name for column in self.columns if column.format in numeric_formats]
+
+    def get_numeric_columns(self, columns):
+        """Names of the result columns formatted as numbers, every value column of a pivot"""
+        if self.is_pivot:
+            return list(columns[1:])
+        return self.numeric_columns
+
+    def get_read_alias(self):
+        """Returns the connection alias (primary or replica) used to read the report data"""
+        return report_router.db_for_report(self.db_alias, self.replica_max_lag)
+
+    def get_budget(self):
+        """Returns the resource budget of the report, falling back to the global settings"""
+        return {
+            "statement_timeout": self.statement_timeout or settings.REPORT_STATEMENT_TIMEOUT,
+            "work_mem": self.work_mem or settings.REPORT_WORK_MEM,
+            "max_export_rows": self.max_export_rows or settings.REPORT_MAX_EXPORT_ROWS,
+            "max_concurrency": self.max_concurrency,
+        }
+
+    @property
+    def supports_keyset(self):
+        return self.select_sql is not None and self.keyset_seek_sql is not None
+
+    @property
+    def supports_search(self):
+        return self.select_sql is not None and self.search_filter is not None
+
+    def build_where(self, start_date=None, end_date=None, search=None):
+        """
+        Assembles the date and search filters of an execution
+
+        Returns:
+            tuple: (where_sql, params)
+        """
+        where_conditions = []
+        params = {}
+        if self.start_filter and start_date:
+            where_conditions.append(self.start_filter)
+            params["start_date"] = start_date
+        if self.end_filter and end_date:
+            where_conditions.append(self.end_filter)
+            params["end_date"] = end_date
+        if self.search_filter and search and len(search) >= SEARCH_MIN_LENGTH:
+            where_conditions.append(self.search_filter)
+            params["search"] = get_search_pattern(search)
+
+        where_sql = f" WHERE {' AND '.join(where_conditions)}" if where_conditions else ""
+        return where_sql, params
+
+    def build(
+        self,
+        start_date=None,
+        end_date=None,
+        limit=None,
+        offset=None,
+        pivot_values=(),
+        search=None,
+        keyset=False,
+        after=None,
+    ):
+        """
+        Assembles the SQL of an execution from the compiled fragments
+
+        Args:
+            start_date: Start date filter (string YYYY-MM-DD)
+            end_date: End date filter (string YYYY-MM-DD)
+            limit: Number of rows to return
+            offset: Number of rows to skip
+            pivot_values: Values of the pivot column dimension, see ``build_pivot_values``
+            search: Text searched in the text columns, see ``SEARCH_MIN_LENGTH``
+            keyset: Order by the keyset and append its values to every row, see ``supports_keyset``
+            after: Keyset values of the last row already read, the rows after it are returned
+
+        Returns:
+            tuple: (query, count_query, params), queries are None when the report has no columns
+        """
+        if self.select_sql is None:
+            return None, None, {}
+
+        where_sql, params = self.build_where(start_date, end_date, search)
+        query = f"{self.select_sql} FROM {self.from_sql}{where_sql}{self.group_sql}"
+        # Searching joined columns filters on the joined rows
+        base_only = not ("search" in params and not self.search_on_base)
+
+        if self.is_interval or self.is_pivot:
+            # For grouped queries, we need to count grouped results
+            count_query = f"SELECT COUNT(*) FROM ({query}) AS grouped_results"
+        else:
+            count_from_sql = (self.count_from_sql if base_only else None) or self.from_sql
+            count_query = f"SELECT COUNT(*){self.totals_sql} FROM {count_from_sql}{where_sql}"
+
+        if self.is_pivot:
+            pivot_sql, pivot_params = self.build_pivot_columns(pivot_values)
+            query = f"{self.select_sql}{pivot_sql} FROM {self.from_sql}{where_sql}{self.group_sql}"
+            params.update(pivot_params)
+
+        select_sql, order_sql = self.select_sql, self.order_sql
+        if keyset:
+            select_sql += self.keyset_select_sql
+            order_sql = self.keyset_order_sql
+            if after is not None:
+                where_sql += f" {'AND' if where_sql else 'WHERE'} {self.keyset_seek_sql}"
+                params.update({f"after_{position}": value for position, value in enumerate(after)})
+            query = f"{select_sql} FROM {self.from_sql}{where_sql}{self.group_sql}"
+
+        # Pagination is bound as int8 so every page reuses the same prepared statement
+        pagination_sql = ""
+        if limit is not None:
+            pagination_sql += " LIMIT %(limit)s"
+            params["limit"] = Int8(limit)
+        if offset is not None:
+            pagination_sql += " OFFSET %(offset)s"
+            params["offset"] = Int8(offset)
+
+        if self.push_limit and base_only and pagination_sql:
+            from apps.core.joins import BASE_ALIAS
+
+            # Joins keep the rows of the report table, only the rows of the page are joined
+            page_sql = f"SELECT * FROM {self.base_from_sql}{where_sql}{order_sql}{pagination_sql}"
+            query = f"{select_sql} FROM ({page_sql}) AS {as_string(identifier(BASE_ALIAS))}{self.join_sql}{order_sql}"
+        else:
+            query += order_sql + pagination_sql
+
+        logger.debug("Query generated for report %s: %s", self.id, query)
+        return query, count_query, params
+
+    def build_pivot_values(self, start_date=None, end_date=None, search=None):
+        """
+        Assembles the SQL of the most frequent values of the pivot column dimension in a date range
+
+        Returns:
+            tuple: (query, params)
+        """
+        where_sql, params = self.build_where(start_date, end_date, search)
+        query = (
+            f"SELECT {self.pivot_column_sql} FROM {self.from_sql}{where_sql} "
+            "GROUP BY 1 ORDER BY COUNT(*) DESC, 1 LIMIT %(pivot_top)s"
+        )
+        params["pivot_top"] = Int8(self.pivot_top)
+        return query, params
+
+    def build_pivot_columns(self, pivot_values):
+        """
+        Assembles one filtered aggregate per pivot value and the total over every value
+
+        Values are bound as parameters, only their labels become part of the SQL.
+
+        Returns:
+            tuple: (sql, params), the sql starts with a comma
+        """
+        parts, params = [], {}
+        labels = get_pivot_labels(self.pivot_row_name, pivot_values)
+        for position, (value, label) in enumerate(zip(pivot_values, labels)):
+            parts.append(
+                f"{self.pivot_aggregate_sql} FILTER (WHERE {self.pivot_column_sql} "
+                f"IS NOT DISTINCT FROM %(pivot_{position})s) AS {as_string(identifier(label))}"
+            )
+            params[f"pivot_{position}"] = value
+        parts.append(f"{self.pivot_aggregate_sql} AS {as_string(identifier(PIVOT_TOTAL_NAME))}")
+        return "".join(f", {part}" for part in parts), params
+
+    def build_partial(self, start_date, end_date, search=None):
+        """
+        Assembles the SQL of the partial aggregates of an interval report for a date range
+
+        Returns:
+            tuple: (query, params)
+        """
+        where_sql, params = self.build_where(start_date, end_date, search)
+        query = f"{self.partial_select_sql} FROM {self.from_sql}{where_sql}{self.partial_group_sql}"
+        return query, params
+
+    def finish_result(self, columns, rows, count_row, limit=None, offset=None):
+        """
+        Turns the fetched page and the count row into the result, with the rows of totals
+
+        Interval reports drop their marker column and mark the rows of totals. Plain
+        reports get their totals row, computed by the count query, after the last
+        row: it is one more row of the result, on the page where it falls.
+
+        Returns:
+            tuple: (columns, rows, total_count)
+        """
+        total_count = count_row[0]
+        if self.is_interval and self.totals:
+            rows = [TOTAL_ROWS[row[-1]](row[:-1]) if row[-1] else row[:-1] for row in rows]
+            return columns[:-1], rows, total_count
+
+        if self.totals_sql:
+            start = offset or 0
+            if start <= total_count and (limit is None or total_count < start + limit):
+                values = [None] * len(columns)
+                for position, value in zip(self.totals_positions, count_row[1:]):
+                    values[position] = value
+                rows = [*rows, TotalRow(values)]
+            total_count += 1
+        return columns, rows, total_count
+
+    @property
+    def supports_live(self):
+        """Live mode streams new rows of plain reports, by their timestamp column"""
+        return (
+            self.select_sql is not None
+            and self.date_column is not None
+            and not (self.is_interval or self.is_pivot or self.totals or self.join_sql)
+        )
+
+    def build_live(self, after, limit):
+        """
+        Assembles the SQL of the rows newer than a watermark, oldest first
+
+        The timestamp column is appended as the last value of every row, it is the
+        watermark of the row and is not part of the report columns.
+
+        Returns:
+            tuple: (query, params)
+        """
+        query = (
+            f"{self.select_sql}, {self.date_column} FROM {self.from_sql} "
+            f"WHERE {self.date_column} > %(after)s ORDER BY {self.date_column} LIMIT %(limit)s"
+        )
+        return query, {"after": after, "limit": Int8(limit)}
+
+    def execute(self, limit=None, offset=None, start_date=None, end_date=None, owner=None, max_rows=None, search=None):
+        """
+        Executes the report query and returns results
+
+        Args:
+            limit: Number of rows to return
+            offset: Number of rows to skip
+            start_date: Start date filter (string YYYY-MM-DD)
+            end_date: End date filter (string YYYY-MM-DD)
+            owner: Identifies the requester (user or session) for fair admission
+            max_rows: Fail before fetching when the result has more rows than this
+            search: Text searched in the text columns of the report
+
+        Raises:
+            ReportBudgetExceeded: If the execution exceeds the report budget
+
+        Returns:
+            tuple: (columns, rows, total_count)
+        """
+        from contextlib import ExitStack
+
+        from django.db import connections, transaction
+        from psycopg.errors import QueryCanceled
+
+        from apps.core import admission, inflight, sharding
+
+        if sharding.should_shard(self, start_date, end_date):
+            return sharding.execute_sharded(self, limit, offset, start_date, end_date, owner, max_rows, search)
+
+        query, count_query, params = self.build(start_date, end_date, limit, offset, search=search)
+        if not query:
+            return [], [], 0
+
+        # Get database connection, a replica when one is fresh enough
+        db_alias = self.get_read_alias()
+        connection = connections[db_alias]
+        budget = self.get_budget()
+
+        with ExitStack() as stack:
+            for slot in admission.get_slots(self, inflight.new_token(), owner or "anonymous"):
+                stack.enter_context(slot)
+
+            with transaction.atomic(using=db_alias), connection.cursor() as cursor:
+                # Budget settings only live until the end of the transaction
+                for name, value in get_budget_settings(budget):
+                    cursor.execute("SELECT set_config(%s, %s, true)", [name, value])
+
+                try:
+                    if self.is_pivot:
+                        values_query, values_params = self.build_pivot_values(start_date, end_date, search)
+                        cursor.execute(values_query, values_params)
+                        pivot_values = [row[0] for row in cursor.fetchall()]
+                        query, count_query, params = self.build(
+                            start_date, end_date, limit, offset, pivot_values, search
+                        )
+
+                    cursor.execute(count_query, params)
+                    count_row = cursor.fetchone()
+                    check_export_rows(count_row[0], max_rows)
+
+                    # Execute main query with pagination
+                    cursor.execute(query, params)
+                except QueryCanceled:
+                    raise statement_timeout_error(budget) from None
+
+                # Get column names
+                columns = [col[0] for col in cursor.description]
+
+                # Fetch all rows
+                rows = cursor.fetchall()
+
+        return self.finish_result(columns, rows, count_row, limit, offset)
+
+    async def aexecute(
+        self,
+        limit=None,
+        offset=None,
+        start_date=None,
+        end_date=None,
+        owner=None,
+        max_rows=None,
+        search=None,
+        cancel_key=None,
+        db_alias=None,
+    ):
+        """
+        Async version of ``execute``
+
+        The queries run on a psycopg async connection (pooled under ASGI) so the event loop is
+        not blocked while the report database works.
+
+        Args:
+            owner: Identifies the requester (user or session) for fair admission
+            cancel_key: Names the interactive view the execution serves (e.g. the results
+                page). A newer execution of the same report, owner and key cancels this
+                one in the database. Exports leave it out so paging never cancels them.
+            db_alias: Connection alias to read from, ``get_read_alias`` by default
+
+        Raises:
+            ReportQueryCancelled: If a newer execution of the same owner and key superseded this one
+            ReportBudgetExceeded: If the execution exceeds the report budget
+
+        Returns:
+            tuple: (columns, rows, total_count)
+        """
+        from apps.core import sharding
+
+        if sharding.should_shard(self, start_date, end_date):
+            return await sharding.aexecute_sharded(
+                self, limit, offset, start_date, end_date, owner, max_rows, search, db_alias
+            )
+
+        result = await self._aexecute(
+            limit, offset, start_date, end_date, owner, max_rows, search, cancel_key, db_alias=db_alias
+        )
+        if result is None:
+            return [], [], 0
+        columns, rows, count_row, _ = result
+        return self.finish_result(columns, rows, count_row, limit, offset)
+
+    async def aexecute_volume(self, limit, start_date=None, end_date=None, owner=None, max_rows=None, cursor=None):
+        """
+        Fetches one volume of an export, see ``apps.core.exports.astream_pdf_volumes``
+
+        The first volume counts the rows; the next ones reuse its count and pivot
+        values. Plain reports with a keyset seek past the last key of the previous
+        volume, so each volume reads only its own rows instead of skipping the
+        previous ones with OFFSET. Volumes are never cancelled by paging.
+
+        Args:
+            limit: Rows per volume
+            cursor: ``VolumeCursor`` returned with the previous volume, None for the first one
+
+        Returns:
+            tuple: (columns, rows, total_count, cursor of the next volume)
+        """
+        from apps.core import sharding
+
+        offset = cursor.offset if cursor else 0
+        next_offset = offset + (limit or 0)
+        if sharding.should_shard(self, start_date, end_date):
+            columns, rows, total_count = await sharding.aexecute_sharded(
+                self, limit, offset, start_date, end_date, owner, max_rows
+            )
+            return columns, rows, total_count, VolumeCursor(next_offset)
+
+        keyset = self.supports_keyset
+        result = await self._aexecute(
+            limit,
+            None if keyset else offset or None,
+            start_date,
+            end_date,
+            owner,
+            max_rows,
+            keyset=keyset,
+            after=cursor.after if cursor else None,
+            count_row=cursor.count_row if cursor else None,
+            pivot_values=cursor.pivot_values if cursor else None,
+        )
+        if result is None:
+            return [], [], 0, None
+        columns, rows, count_row, pivot_values = result
+
+        after = None
+        if keyset:
+            # The keyset values close every row
+            after = tuple(rows[-1][-self.keyset_size :]) if rows else None
+            columns = columns[: -self.keyset_size]
+            rows = [row[: -self.keyset_size] for row in rows]
+
+        next_cursor = VolumeCursor(next_offset, count_row, pivot_values, after)
+        return (*self.finish_result(columns, rows, count_row, limit, offset), next_cursor)
+
+    async def _aexecute(
+        self,
+        limit,
+        offset,
+        start_date,
+        end_date,
+        owner=None,
+        max_rows=None,
+        search=None,
+        cancel_key=None,
+        keyset=False,
+        after=None,
+        count_row=None,
+        pivot_values=None,
+        db_alias=None,
+    ):
+        """
+        Runs an execution on an async connection, see ``aexecute``
+
+        A known count row (and pivot values) skips their queries.
+
+        Returns:
+            tuple: (columns, rows, count_row, pivot_values), None when the report has no columns
+        """
+        import asyncio
+        from contextlib import AsyncExitStack
+
+        from psycopg.errors import QueryCanceled
+
+        from apps.core import admission, inflight, profiling
+        from apps.core.async_db import async_connection
+        from apps.core.exceptions import ReportQueryCancelled
+
+        query, count_query, params = self.build(
+            start_date, end_date, limit, offset, pivot_values or (), search, keyset, after
+        )
+        if not query:
+            return None
+
+        db_alias = db_alias or await sync_to_async(self.get_read_alias)()
+        budget = self.get_budget()
+        token = inflight.new_token()
+        execution_key = f"{owner}:{self.id}:{cancel_key}" if owner and cancel_key else None
+
+        async def check_current():
+            # Between statements the backend is idle and cannot be cancelled, stop before the next one
+            if execution_key and not await inflight.is_current(execution_key, token):
+                raise ReportQueryCancelled()
+
+        async with AsyncExitStack() as stack:
+            for slot in admission.get_slots(self, token, owner or "anonymous"):
+                await stack.enter_async_context(slot)
+
+            connection = await stack.enter_async_context(async_connection(db_alias))
+            cursor = await stack.enter_async_context(connection.cursor())
+
+            await cursor.execute(
+                "SELECT pg_backend_pid(), set_config('application_name', %s, false)",
+                [inflight.application_name(token)],
+            )
+            pid = (await cursor.fetchone())[0]
+            for name, value in get_budget_settings(budget):
+                await cursor.execute("SELECT set_config(%s, %s, false)", [name, value])
+
+            if execution_key:
+                await inflight.register(execution_key, db_alias, pid, token)
+
+            try:
+                if self.is_pivot and pivot_values is None:
+                    # The value columns depend on the data, they are known once the values are read
+                    values_query, values_params = self.build_pivot_values(start_date, end_date, search)
+                    await check_current()
+                    with profiling.timed_query(db_alias, values_query):
+                        await cursor.execute(values_query, values_params, prepare=True)
+                    pivot_values = tuple(row[0] for row in await cursor.fetchall())
+                    query, count_query, params = self.build(
+                        start_date, end_date, limit, offset, pivot_values, search, keyset, after
+                    )
+
+                if count_row is None:
+                    await check_current()
+                    with profiling.timed_query(db_alias, count_query):
+                        await cursor.execute(count_query, params, prepare=True)
+                    count_row = await cursor.fetchone()
+                    check_export_rows(count_row[0], max_rows)
+
+                await check_current()
+                with profiling.timed_query(db_alias, query):
+                    await cursor.execute(query, params, prepare=True)
+                columns = [col.name for col in cursor.description]
+                rows = await cursor.fetchall()
+            except QueryCanceled:
+                if execution_key and not await inflight.is_current(execution_key, token):
+                    raise ReportQueryCancelled() from None
+                raise statement_timeout_error(budget) from None
+            except asyncio.CancelledError:
+                # The client went away, psycopg already cancelled the query in the server
+                await metrics.aincr(metrics.REPORT_CANCELLED_DISCONNECTED)
+                raise
+            finally:
+                if execution_key:
+                    await inflight.unregister(execution_key, token)
+
+        return columns, rows, count_row, pivot_values
+
+
+def get_budget_settings(budget):
+    """Returns the (name, value) session settings that enforce a budget in PostgreSQL"""
+    budget_settings = [("statement_timeout", f"{budget['statement_timeout']}s")]
+    if budget["work_mem"]:
+        budget_settings.append(("work_mem", budget["work_mem"]))
+    return budget_settings
+
+
+def check_export_rows(total_count, max_rows):
+    """Raises ReportBudgetExceeded when a result is too large to be fetched at once"""
+    from apps.core.exceptions import ReportBudgetExceeded
+
+    if max_rows is not None and total_count > max_rows:
+        raise ReportBudgetExceeded(
+            f"El reporte tiene {total_count} registros y el máximo permitido para exportar es {max_rows}. "
+            "Reduzca el rango de fechas."
+        )
+
+
+def statement_timeout_error(budget):
+    from apps.core.exceptions import ReportBudgetExceeded
+
+    return ReportBudgetExceeded(
+        f"El reporte excedió el tiempo máximo de ejecución ({budget['statement_timeout']} segundos). "
+        "Reduzca el rango de fechas."
+    )
+
+
+def compile_plan(report, version):
+    """
+    Compiles the plan of a report
+
+    Args:
+        report: Report instance, ideally with ``table__database`` selected
+        version: Configuration version the plan is compiled for
+
+    Returns:
+        ReportPlan
+    """
+    from apps.core.joins import JoinPlanner
+    from apps.core.models import Column, Report, ReportColumn
+
+    report_columns = list(report.report_columns.select_related("column").order_by("order"))
+
+    # Columns of related tables are read through the joins of their foreign key path
+    joins = JoinPlanner(report.table, [rc.column for rc in report_columns])
+    for rc in report_columns:
+        if not joins.is_reachable(rc.column):
+            logger.warning("Column %s of report %s is not reachable from its table, skipped", rc.column_id, report.pk)
+    report_columns = [rc for rc in report_columns if joins.is_reachable(rc.column)]
+
+    def ref(rc):
+        return joins.ref(rc.column)
+
+    # Find interval and order_by columns, a timestamp of the report table filters before any join
+    order_by_column = next((rc for rc in report_columns if rc.order_by), None)
+    date_column = min(
+        (rc for rc in report_columns if rc.column.data_type.lower().startswith("timestamp")),
+        key=lambda rc: not joins.is_base(rc.column),
+        default=None,
+    )
+    interval_column = date_column
+    visible_columns = [rc for rc in report_columns if rc.is_visible]
+
+    # Date filters, with parameter slots for the dates
+    start_filter = end_filter = date_name = None
+    if date_column:
+        date_name = ref(date_column)
+        start_filter = as_string(sql.SQL("{} >= {}").format(date_name, sql.Placeholder("start_date")))
+        end_filter = as_string(
+            sql.SQL("{} < {}::date + INTERVAL '1 day'").format(date_name, sql.Placeholder("end_date"))
+        )
+
+    group_sql = order_sql = partial_group_sql = ""
+    partial_select_sql = None
+    merge_spec = []
+    direction = sql.SQL("DESC" if report.order == Report.Order.DESC else "ASC")
+
+    # A row, a column and a value role make a pivot, it takes precedence over interval grouping
+    pivot_roles = {}
+    for rc in visible_columns:
+        if rc.pivot_role != ReportColumn.PivotRole.NONE:
+            pivot_roles.setdefault(rc.pivot_role, rc)
+    use_pivot = len(pivot_roles) == 3 and report.pivot_top > 0
+    pivot_column_sql = pivot_aggregate_sql = None
+
+    # Totals of the aggregate columns, subtotals need a grouping column besides the interval
+    use_totals = not use_pivot and report.totals != Report.Totals.NONE
+    use_subtotals = False
+    totals_sql = ""
+    totals_positions = []
+
+    # Check if we need interval grouping
+    use_interval = not use_pivot and bool(interval_column) and report.interval != Report.Interval.ALL
+
+    if use_pivot:
+        row_rc = pivot_roles[ReportColumn.PivotRole.ROW]
+        value_rc = pivot_roles[ReportColumn.PivotRole.VALUE]
+        select_sql = as_string(sql.SQL("SELECT {} AS {}").format(ref(row_rc), identifier(row_rc.get_display_name())))
+        group_sql = " GROUP BY 1"
+        order_sql = as_string(sql.SQL(" ORDER BY 1 {}").format(direction))
+        pivot_column_sql = as_string(ref(pivot_roles[ReportColumn.PivotRole.COLUMN]))
+        # Without an aggregate function the pivot counts the rows of each cell
+        aggregate = value_rc.aggregate
+        if aggregate == ReportColumn.AggregateFunction.NONE:
+            aggregate = ReportColumn.AggregateFunction.COUNT
+        pivot_aggregate_sql = as_string(sql.SQL("{}({})").format(sql.SQL(aggregate.upper()), ref(value_rc)))
+
+    elif use_interval:
+        interval_minutes = int(report.interval)
+        date_col = ref(interval_column)
+
+        # PostgreSQL interval grouping
+        interval_select = sql.SQL(
+            "DATE_TRUNC('hour', {col}) + INTERVAL {interval} * FLOOR(EXTRACT(MINUTE FROM {col})::int / {minutes})"
+        ).format(col=date_col, interval=sql.Literal(f"{interval_minutes} min"), minutes=sql.Literal(interval_minutes))
+
+        interval_name = identifier(interval_column.get_display_name())
+        select_parts = [sql.SQL("{} AS {}").format(interval_select, interval_name)]
+        group_by_parts = [sql.Literal(1)]  # GROUP BY position 1 (Intervalo)
+
+        # Same grouping with mergeable partial aggregates (AVG as SUM and COUNT), see apps.core.sharding
+        partial_parts = [interval_select]
+        partial_group_parts = [sql.Literal(1)]
+        merge_spec = [(interval_column.get_display_name(), MERGE_KEY)]
+        key_columns = []
+
+        for position, rc in enumerate((rc for rc in visible_columns if rc.pk != interval_column.pk), start=2):
+            col_name = ref(rc)
+            display_name = identifier(rc.get_display_name())
+
+            if rc.aggregate != ReportColumn.AggregateFunction.NONE:
+                # Apply aggregate function
+                select_parts.append(
+                    sql.SQL("{}({}) AS {}").format(sql.SQL(rc.aggregate.upper()), col_name, display_name)
+                )
+                if rc.aggregate == ReportColumn.AggregateFunction.AVG:
+                    partial_parts.extend([sql.SQL("SUM({})").format(col_name), sql.SQL("COUNT({})").format(col_name)])
+                else:
+                    partial_parts.append(sql.SQL("{}({})").format(sql.SQL(rc.aggregate.upper()), col_name))
+                merge_spec.append((rc.get_display_name(), rc.aggregate))
+            else:
+                # Group by other columns (first value)
+                select_parts.append(sql.SQL("{} AS {}").format(col_name, display_name))
+                group_by_parts.append(sql.Literal(position))
+                partial_parts.append(col_name)
+                partial_group_parts.append(sql.Literal(len(partial_parts)))
+                merge_spec.append((rc.get_display_name(), MERGE_KEY))
+                key_columns.append(col_name)
+
+        use_totals = use_totals and any(kind != MERGE_KEY for _, kind in merge_spec)
+        if use_totals:
+            # Rows of totals come from the same GROUP BY, the marker tells them apart
+            key_parts = [interval_select, *key_columns]
+            use_subtotals = report.totals == Report.Totals.SUBTOTALS and len(key_parts) > 1
+            grouping_sets = [sql.SQL("({})").format(sql.SQL(", ").join(key_parts))]
+            if use_subtotals:
+                grouping_sets.append(sql.SQL("({})").format(interval_select))
+            grouping_sets.append(sql.SQL("()"))
+            marker = sql.SQL(
+                "CASE WHEN GROUPING({interval}) = 1 THEN {total} WHEN GROUPING({keys}) > 0 THEN {subtotal} ELSE 0 END"
+            ).format(
+                interval=interval_select,
+                keys=sql.SQL(", ").join(key_parts),
+                total=sql.Literal(TOTAL_LEVEL),
+                subtotal=sql.Literal(SUBTOTAL_LEVEL),
+            )
+            select_parts.append(sql.SQL("{} AS {}").format(marker, identifier(TOTALS_MARKER)))
+            group_sql = as_string(sql.SQL(" GROUP BY GROUPING SETS ({})").format(sql.SQL(", ").join(grouping_sets)))
+            # Grand total last, the subtotal of an interval after its rows
+            order_sql = as_string(
+                sql.SQL(" ORDER BY GROUPING({}), {} {}, {}").format(
+                    interval_select, interval_name, direction, identifier(TOTALS_MARKER)
+                )
+            )
+        else:
+            group_sql = as_string(sql.SQL(" GROUP BY {}").format(sql.SQL(", ").join(group_by_parts)))
+            if report.order:
+                order_sql = as_string(sql.SQL(" ORDER BY {} {}").format(interval_name, direction))
+
+        select_sql = as_string(sql.SQL("SELECT {}").format(sql.SQL(", ").join(select_parts)))
+        partial_select_sql = as_string(sql.SQL("SELECT {}").format(sql.SQL(", ").join(partial_parts)))
+        partial_group_sql = as_string(sql.SQL(" GROUP BY {}").format(sql.SQL(", ").join(partial_group_parts)))
+
+    elif visible_columns:
+        # Build column list with aliases
+        column_list = []
+        for rc in visible_columns:
+            display_name = rc.get_display_name()
+            if rc.column.column_name != display_name or joins.qualified:
+                column_list.append(sql.SQL("{} AS {}").format(ref(rc), identifier(display_name)))
+            else:
+                column_list.append(ref(rc))
+
+        select_sql = as_string(sql.SQL("SELECT {}").format(sql.SQL(", ").join(column_list)))
+        if use_totals:
+            # The count query already reads every row, it computes the totals too
+            totals_parts = []
+            for position, rc in enumerate(visible_columns):
+                if rc.aggregate != ReportColumn.AggregateFunction.NONE:
+                    totals_parts.append(sql.SQL("{}({})").format(sql.SQL(rc.aggregate.upper()), ref(rc)))
+                    totals_positions.append(position)
+            if totals_parts:
+                totals_sql = as_string(sql.SQL(", {}").format(sql.SQL(", ").join(totals_parts)))
+            use_totals = bool(totals_parts)
+        if order_by_column and report.order:
+            order_sql = as_string(sql.SQL(" ORDER BY {} {}").format(ref(order_by_column), direction))
+
+    else:
+        select_sql = None
+
+    # Search in the results, in the text columns shown
+    search_columns = [rc for rc in visible_columns if rc.column.is_searchable]
+    search_filter = None
+    if search_columns:
+        search_filter = as_string(
+            sql.SQL("({})").format(
+                sql.SQL(" OR ").join(
+                    sql.SQL("{} ILIKE {}").format(ref(rc), sql.Placeholder("search")) for rc in search_columns
+                )
+            )
+        )
+
+    # Keyset of the export volumes of plain reports: the sort column (the date column without one) and the
+    # primary key of the report table as tie-breaker. NULLs break row comparisons, every key must be a NOT NULL
+    # column of the report table: a LEFT JOINed column is NULL when the key is or has no matching row
+    keyset_select_sql = keyset_order_sql = ""
+    keyset_seek_sql = None
+    keyset_size = 0
+    primary_keys = list(Column.objects.filter(table_id=report.table_id, is_primary_key=True, is_active=True)[:2])
+    if select_sql is not None and not (use_interval or use_pivot) and len(primary_keys) == 1:
+        sort_rc = order_by_column if order_by_column and report.order else date_column
+        key_columns = [primary_keys[0]]
+        if sort_rc and sort_rc.column_id != primary_keys[0].pk:
+            key_columns.insert(0, sort_rc.column)
+        if all(joins.is_base(column) and not column.is_nullable for column in key_columns):
+            key_refs = [joins.ref(column) for column in key_columns]
+            keyset_size = len(key_refs)
+            keyset_select_sql = as_string(sql.SQL(", {}").format(sql.SQL(", ").join(key_refs)))
+            keyset_order_sql = as_string(
+                sql.SQL(" ORDER BY {}").format(
+                    sql.SQL(", ").join(sql.SQL("{} {}").format(ref, direction) for ref in key_refs)
+                )
+            )
+            keyset_seek_sql = as_string(
+                sql.SQL("({}) {} ({})").format(
+                    sql.SQL(", ").join(key_refs),
+                    sql.SQL("<" if report.order == Report.Order.DESC else ">"),
+                    sql.SQL(", ").join(sql.Placeholder(f"after_{position}") for position in range(keyset_size)),
+                )
+            )
+
+    # Every reference is resolved, the joins they need are known
+    from_sql = joins.base_sql + joins.join_sql
+    base_from_sql = count_from_sql = None
+    push_limit = False
+    if joins.joins and (date_column is None or joins.is_base(date_column.column)):
+        base_from_sql = joins.base_sql
+        # Totals of related columns need the joins in the count query
+        totals_on_base = all(joins.is_base(visible_columns[position].column) for position in totals_positions)
+        count_from_sql = base_from_sql if totals_on_base else None
+        push_limit = (
+            not (use_interval or use_pivot)
+            and select_sql is not None
+            and (not order_sql or joins.is_base(order_by_column.column))
+        )
+
+    return ReportPlan(
+        id=report.pk,
+        version=version,
+        name=report.name,
+        description=report.description,
+        orientation=report.orientation,
+        interval=report.interval,
+        db_alias=report.table.database.alias,
+        replica_max_lag=report.replica_max_lag,
+        statement_timeout=report.statement_timeout,
+        work_mem=report.work_mem,
+        max_export_rows=report.max_export_rows,
+        max_concurrency=report.max_concurrency,
+        columns=tuple(
+            PlanColumn(
+                column_name=rc.column.column_name,
+                display_name=rc.get_display_name(),
+                data_type=rc.column.data_type,
+                format=rc.format,
+                aggregate=rc.aggregate,
+                is_visible=rc.is_visible,
+            )
+            for rc in report_columns
+        ),
+        select_sql=select_sql,
+        from_sql=from_sql,
+        date_column=as_string(date_name) if date_column else None,
+        start_filter=start_filter,
+        end_filter=end_filter,
+        group_sql=group_sql,
+        order_sql=order_sql,
+        is_interval=use_interval,
+        partial_select_sql=partial_select_sql,
+        partial_group_sql=partial_group_sql,
+        merge_spec=tuple(merge_spec),
+        watermark=get_table_source(report.table),
+        totals=use_totals and select_sql is not None,
+        subtotals=use_subtotals,
+        totals_sql=totals_sql,
+        totals_positions=tuple(totals_positions),
+        descending=report.order == Report.Order.DESC,
+        is_pivot=use_pivot,
+        pivot_column_sql=pivot_column_sql,
+        pivot_aggregate_sql=pivot_aggregate_sql,
+        pivot_top=report.pivot_top if use_pivot else 0,
+        pivot_row_name=pivot_roles[ReportColumn.PivotRole.ROW].get_display_name() if use_pivot else None,
+        join_sql=joins.join_sql,
+        base_from_sql=base_from_sql,
+        count_from_sql=count_from_sql,
+        push_limit=push_limit,
+        join_watermarks=tuple(get_table_source(table) for table in joins.joined_tables),
+        search_filter=search_filter,
+        search_on_base=all(joins.is_base(rc.column) for rc in search_columns),
+        keyset_select_sql=keyset_select_sql,
+        keyset_order_sql=keyset_order_sql,
+        keyset_seek_sql=keyset_seek_sql,
+        keyset_size=keyset_size,
+    )
+
+
+def _version_key(report_id):
+    return f"report:plan:v{PLAN_FORMAT_VERSION}:version:{report_id}"
+
+
+def _plan_key(report_id):
+    return f"report:plan:v{PLAN_FORMAT_VERSION}:plan:{report_id}"
+
+
+def _get_local(report_id, version):
+    with _local_lock:
+        plan = _local_plans.get(report_id)
+        if plan is None or plan.version != version:
+            return None
+        _local_plans.move_to_end(report_id)
+        return plan
+
+
+def _set_local(plan):
+    with _local_lock:
+        _local_plans[plan.id] = plan
+        _local_plans.move_to_end(plan.id)
+        while len(_local_plans) > LOCAL_CACHE_SIZE:
+            _local_plans.popitem(last=False)
+
+
+def _compile(report_id, version):
+    from apps.core.models import Report
+
+    report = Report.objects.select_related("table__database").get(pk=report_id)
+    if version is None:
+        version = uuid.uuid4().hex
+        # Another process may have published a version meanwhile, keep theirs
+        if not cache.add(_version_key(report_id), version, timeout=None):
+            version = cache.get(_version_key(report_id)) or version
+
+    plan = compile_plan(report, version)
+    cache.set(_plan_key(report_id), plan, PLAN_CACHE_TIMEOUT)
+    metrics.incr(metrics.REPORT_PLAN_COMPILED)
+    return plan
+
+
+def get_report_plan(report_id):
+    """
+    Returns the compiled plan of a report
+
+    A warm in-process plan costs one cache read and no database query.
+
+    Raises:
+        Report.DoesNotExist: If the report does not exist
+    """
+    report_id = int(report_id)
+    version = cache.get(_version_key(report_id))
+    plan = _get_local(report_id, version) if version else None
+    if plan is None:
+        plan = cache.get(_plan_key(report_id)) if version else None
+        if plan is None or plan.version != version:
+            plan = _compile(report_id, version)
+        _set_local(plan)
+    return plan
+
+
+async def aget_report_plan(report_id):
+    """Async version of ``get_report_plan``"""
+    report_id = int(report_id)
+    version = await cache.aget(_version_key(report_id))
+    plan = _get_local(report_id, version) if version else None
+    if plan is None:
+        plan = await cache.aget(_plan_key(report_id)) if version else None
+        if plan is None or plan.version != version:
+            plan = await sync_to_async(_compile)(report_id, version)
+        _set_local(plan)
+    return plan
+
+
+def invalidate_report_plan(report_id):
+    """Publishes a new configuration version for a report, every cached plan becomes stale"""
+    cache.set(_version_key(report_id), uuid.uuid4().hex, timeout=None)
+    cache.delete(_plan_key(report_id))
@@ -0,0 +1,164 @@
+"""
+Per-request profiling.
+
+A profile collects the SQL queries of a request per connection alias (the
+metadata database and the report databases), the time spent rendering
+templates and generating PDFs. It lives in a context variable, so the
+queries of ``sync_to_async`` code and of the async report pool are recorded
+in the profile of the request that started them.
+
+See ``apps.core.middleware.ProfilingMiddleware``.
+"""
+
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+_current = ContextVar("request_profile", default=None)
+
+
+class Profile:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = defaultdict(int)
+        self.db_time = defaultdict(float)
+        self.statements = Counter()
+        self.spans = defaultdict(float)
+        self._depth = Counter()
+
+    @property
+    def query_count(self):
+        return sum(self.queries.values())
+
+    def record_query(self, alias, sql, duration):
+        self.queries[alias] += 1
+        self.db_time[alias] += duration
+        # Parameters are apart from the SQL, the same text is the same statement
+        self.statements[(alias, sql)] += 1
+
+    def duplicates(self, threshold):
+        """Returns the statements executed at least ``threshold`` times, most repeated first"""
+        return [
+            {"alias": alias, "sql": sql, "count": count}
+            for (alias, sql), count in self.statements.most_common()
+            if count >= threshold
+        ]
+
+    def server_timing(self):
+        """Returns the value of the Server-Timing header"""
+        metrics = [f"total;dur={(time.perf_counter() - self.started) * 1000:.1f}"]
+        for alias, duration in self.db_time.items():
+            metrics.append(f'db-{alias};dur={duration * 1000:.1f};desc="{self.queries[alias]} queries"')
+        for name, duration in self.spans.items():
+            metrics.append(f"{name};dur={duration * 1000:.1f}")
+        return ", ".join(metrics)
+
+    def as_dict(self, duplicate_threshold):
+        return {
+            "total_ms": round((time.perf_counter() - self.started) * 1000, 1),
+            "queries": self.query_count,
+            "db": {
+                alias: {"queries": self.queries[alias], "ms": round(duration * 1000, 1)}
+                for alias, duration in self.db_time.items()
+            },
+            "spans": {name: round(duration * 1000, 1) for name, duration in self.spans.items()},
+            "duplicates": self.duplicates(duplicate_threshold),
+        }
+
+
+def get_profile():
+    """Returns the profile of the current request, None when it is not profiled"""
+    return _current.get()
+
+
+@contextmanager
+def activate(profile):
+    token = _current.set(profile)
+    try:
+        yield profile
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def span(name):
+    """Adds the time of the block to a named span of the current profile, nested blocks count once"""
+    profile = _current.get()
+    if profile is None:
+        yield
+        return
+
+    profile._depth[name] += 1
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile._depth[name] -= 1
+        if not profile._depth[name]:
+            profile.spans[name] += time.perf_counter() - started
+
+
+@contextmanager
+def timed_query(alias, sql):
+    """Records a query that does not go through Django's connections (async pool)"""
+    profile = _current.get()
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        if profile is not None:
+            profile.record_query(alias, sql, time.perf_counter() - started)
+
+
+class QueryRecorder:
+    """Execute wrapper that records the queries of an alias in the current profile"""
+
+    def __init__(self, alias):
+        self.alias = alias
+
+    def __call__(self, execute, sql, params, many, context):
+        profile = _current.get()
+        if profile is None:
+            return execute(sql, params, many, context)
+
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            profile.record_query(self.alias, sql, time.perf_counter() - started)
+
+
+def install_query_recorder(connection):
+    """
+    Adds a ``QueryRecorder`` to the execute wrappers of a connection
+
+    Installed on every connection when it connects instead of per request, the
+    connection objects of ``sync_to_async`` threads are not the ones of the
+    request. It does nothing outside a profiled request.
+    """
+    if not any(isinstance(wrapper, QueryRecorder) for wrapper in connection.execute_wrappers):
+        connection.execute_wrappers.append(QueryRecorder(connection.alias))
+
+
+_template_timing_installed = False
+
+
+def install_template_timing():
+    """Times template rendering in the ``template`` span, only the outermost render of a block counts"""
+    global _template_timing_installed
+    if _template_timing_installed:
+        return
+
+    from django.template.backends.django import Template
+
+    render = Template.render
+
+    @wraps(render)
+    def timed_render(self, *args, **kwargs):
+        with span("template"):
+            return render(self, *args, **kwargs)
+
+    Template.render = timed_render
+    _template_timing_installed = True
@@ -0,0 +1,119 @@
+"""
+Database routing for report queries.
+
+Report queries are executed with raw cursors on the report database alias
+(see ``Report.table.database.alias``), so they are routed explicitly through
+``report_router.db_for_report`` instead of the model based Django hooks.
+"""
+
+import logging
+import math
+import threading
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DatabaseError, connections
+
+logger = logging.getLogger(__name__)
+
+# Replication lag in seconds. A replica that already replayed everything it
+# received is not lagging, even if the primary has been idle for a while, but
+# only while its WAL receiver is streaming: a disconnected replica also keeps
+# equal LSNs. The receiver status is only visible with pg_read_all_stats,
+# otherwise a running receiver counts as streaming. NULL when the lag is unknown.
+REPLICATION_LAG_QUERY = """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN NOT EXISTS (
+            SELECT 1 FROM pg_stat_wal_receiver WHERE COALESCE(status, 'streaming') = 'streaming'
+        ) THEN NULL
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())
+    END
+"""
+
+# Cached value for replicas that could not be reached
+UNAVAILABLE = -1
+
+
+class ReportReplicaRouter:
+    """Balances report reads across the replicas of a report database"""
+
+    def __init__(self):
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def get_replicas(self, alias):
+        """Returns the replica aliases configured for a database alias"""
+        return settings.REPORT_DATABASE_REPLICAS.get(alias, [])
+
+    def is_replica(self, alias):
+        return any(alias in replicas for replicas in settings.REPORT_DATABASE_REPLICAS.values())
+
+    def _rotate(self, alias, replicas):
+        """Returns the replicas in round-robin order, starting with the next one in turn"""
+        with self._lock:
+            start = self._counters.get(alias, 0)
+            self._counters[alias] = (start + 1) % len(replicas)
+        return replicas[start:] + replicas[:start]
+
+    def get_replication_lag(self, replica):
+        """
+        Returns the replication lag of a replica in seconds
+
+        The value is cached for ``REPORT_REPLICA_LAG_CACHE_TTL`` seconds so the
+        check costs one query per replica and interval, not one per report.
+
+        Returns:
+            float | None: Lag in seconds (infinite when unknown), or None if the replica is unavailable
+        """
+        cache_key = f"report:replica-lag:{replica}"
+        lag = cache.get(cache_key)
+        if lag is None:
+            try:
+                with connections[replica].cursor() as cursor:
+                    cursor.execute(REPLICATION_LAG_QUERY)
+                    lag = cursor.fetchone()[0]
+                # Not streaming or nothing replayed yet, the replica may be arbitrarily stale
+                lag = math.inf if lag is None else float(lag)
+            except DatabaseError as e:
+                logger.warning("Replica %s unavailable: %s", replica, e)
+                lag = UNAVAILABLE
+            cache.set(cache_key, lag, settings.REPORT_REPLICA_LAG_CACHE_TTL)
+
+        return None if lag == UNAVAILABLE else lag
+
+    def db_for_report(self, alias, max_lag=None):
+        """
+        Returns the connection alias that should serve a report read
+
+        Args:
+            alias: Primary alias of the report database
+            max_lag: Replication lag tolerated in seconds (default REPORT_REPLICA_MAX_LAG)
+
+        Returns:
+            str: A replica alias, or the primary alias when no replica is fresh enough
+        """
+        replicas = self.get_replicas(alias)
+        if not replicas:
+            return alias
+
+        if max_lag is None:
+            max_lag = settings.REPORT_REPLICA_MAX_LAG
+
+        for replica in self._rotate(alias, replicas):
+            lag = self.get_replication_lag(replica)
+            if lag is not None and lag <= max_lag:
+                return replica
+            logger.info("Replica %s skipped (lag: %s, tolerance: %ss)", replica, lag, max_lag)
+
+        return alias
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        """Replicas are read-only copies, never migrate them"""
+        if self.is_replica(db):
+            return False
+        return None
+
+
+report_router = ReportReplicaRouter()
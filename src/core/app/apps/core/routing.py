@@ -0,0 +1,7 @@
+from django.urls import path
+
+from apps.core import consumers
+
+websocket_urlpatterns = [
+    path("ws/reports/<int:report_id>/live/", consumers.ReportLiveConsumer.as_asgi()),
+]
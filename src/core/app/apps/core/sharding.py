@@ -0,0 +1,274 @@
+"""
+Parallel date-range sharding of interval reports.
+
+A long date range of an interval report runs as one GROUP BY on a single
+backend (and a single core). Instead, the range is split in sub-ranges of
+whole days, which are aligned to the interval buckets, and every sub-range
+runs on its own connection at the same time. Each shard returns partial
+aggregates per bucket (AVG as SUM and COUNT) that are merged here, so the
+result is the same as the single query path.
+
+Every shard goes through admission control like any other execution.
+Superseded executions are not cancelled in the database, a disconnected
+client still cancels every running shard.
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from decimal import Decimal
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from apps.core.plans import (
+    MERGE_KEY,
+    SUBTOTAL_LEVEL,
+    TOTAL_LEVEL,
+    TOTAL_ROWS,
+    SubtotalRow,
+    TotalRow,
+    check_export_rows,
+    get_budget_settings,
+    statement_timeout_error,
+)
+
+
+def split_date_range(start_date, end_date, days):
+    """
+    Splits a date range in consecutive sub-ranges of up to ``days`` days
+
+    Args:
+        start_date: Start date (string YYYY-MM-DD)
+        end_date: End date, included (string YYYY-MM-DD)
+        days: Days per sub-range
+
+    Returns:
+        list: (start_date, end_date) string pairs
+    """
+    start, end = date.fromisoformat(start_date), date.fromisoformat(end_date)
+    shards = []
+    while start <= end:
+        shard_end = min(start + timedelta(days=days - 1), end)
+        shards.append((start.isoformat(), shard_end.isoformat()))
+        start = shard_end + timedelta(days=1)
+    return shards
+
+
+def should_shard(plan, start_date, end_date):
+    """Returns True when an execution of the plan runs faster split by date range"""
+    if not plan.is_interval or not plan.partial_select_sql or not (start_date and end_date):
+        return False
+    if settings.REPORT_SHARD_PARALLELISM < 2:
+        return False
+    try:
+        days = (date.fromisoformat(end_date) - date.fromisoformat(start_date)).days + 1
+    except ValueError:
+        return False
+    return days > settings.REPORT_SHARD_DAYS
+
+
+def _sort_key(value):
+    return (value is None, value)
+
+
+def merge_partials(plan, partial_rows, limit=None, offset=None):
+    """
+    Merges the partial aggregates of every shard
+
+    Reports with totals get their subtotal and grand total rows here, merged
+    from the same partials, as the GROUPING SETS of the single query would.
+
+    Returns:
+        tuple: (columns, rows, total_count), rows ordered and paginated like the single query
+    """
+    groups = {}
+    for row in partial_rows:
+        values = iter(row)
+        key, aggregates = [], []
+        for _, kind in plan.merge_spec:
+            if kind == MERGE_KEY:
+                key.append(next(values))
+            elif kind == "avg":
+                aggregates.append((next(values), next(values)))
+            else:
+                aggregates.append(next(values))
+        _merge_group(plan, groups, tuple(key), aggregates)
+
+    rows = [_to_row(plan, key, aggregates) for key, aggregates in groups.items()]
+
+    if plan.totals:
+        # Rolled up keys are NULL, like in a GROUP BY GROUPING SETS
+        levels = [(TOTAL_LEVEL, 0)]
+        if plan.subtotals:
+            levels.append((SUBTOTAL_LEVEL, 1))
+        for level, kept in levels:
+            rollup = {}
+            for key, aggregates in groups.items():
+                rolled_key = key[:kept] + (None,) * (len(key) - kept)
+                _merge_group(plan, rollup, rolled_key, list(aggregates))
+            rows.extend(TOTAL_ROWS[level](_to_row(plan, key, aggregates)) for key, aggregates in rollup.items())
+
+    # The bucket is the first column, ordered like the report (ascending without order). Sorts are
+    # stable: the subtotal of a bucket stays after its rows and the grand total goes last.
+    rows.sort(key=lambda row: isinstance(row, SubtotalRow))
+    rows.sort(key=lambda row: _sort_key(row[0]), reverse=plan.descending)
+    rows.sort(key=lambda row: type(row) is TotalRow)
+
+    total_count = len(rows)
+    start = offset or 0
+    end = start + limit if limit is not None else None
+    return [name for name, _ in plan.merge_spec], rows[start:end], total_count
+
+
+def _merge_group(plan, groups, key, aggregates):
+    merged = groups.get(key)
+    if merged is None:
+        groups[key] = aggregates
+        return
+
+    index = 0
+    for _, kind in plan.merge_spec:
+        if kind == MERGE_KEY:
+            continue
+        current, value = merged[index], aggregates[index]
+        if kind == "avg":
+            merged[index] = (_add(current[0], value[0]), current[1] + value[1])
+        elif kind in ("sum", "count"):
+            merged[index] = _add(current, value)
+        elif kind == "min":
+            merged[index] = value if current is None or (value is not None and value < current) else current
+        elif kind == "max":
+            merged[index] = value if current is None or (value is not None and value > current) else current
+        index += 1
+
+
+def _to_row(plan, key, aggregates):
+    keys, aggregates = iter(key), iter(aggregates)
+    row = []
+    for _, kind in plan.merge_spec:
+        if kind == MERGE_KEY:
+            row.append(next(keys))
+        elif kind == "avg":
+            total, count = next(aggregates)
+            row.append(_average(total, count))
+        else:
+            row.append(next(aggregates))
+    return tuple(row)
+
+
+def _add(current, value):
+    # SUM ignores NULLs and is NULL only when every value is
+    if current is None:
+        return value
+    if value is None:
+        return current
+    return current + value
+
+
+def _average(total, count):
+    if not count:
+        return None
+    # PostgreSQL averages integers as numeric
+    if isinstance(total, int):
+        total = Decimal(total)
+    return total / count
+
+
+def _execute_shard(plan, db_alias, start_date, end_date, owner, search=None):
+    """Runs the partial query of one shard on the connection of the current thread"""
+    from contextlib import ExitStack
+
+    from django.db import connections, transaction
+    from psycopg.errors import QueryCanceled
+
+    from apps.core import admission, inflight
+
+    query, params = plan.build_partial(start_date, end_date, search)
+    budget = plan.get_budget()
+    try:
+        with ExitStack() as stack:
+            for slot in admission.get_slots(plan, inflight.new_token(), owner or "anonymous"):
+                stack.enter_context(slot)
+
+            with transaction.atomic(using=db_alias), connections[db_alias].cursor() as cursor:
+                for name, value in get_budget_settings(budget):
+                    cursor.execute("SELECT set_config(%s, %s, true)", [name, value])
+                try:
+                    cursor.execute(query, params)
+                except QueryCanceled:
+                    raise statement_timeout_error(budget) from None
+                return cursor.fetchall()
+    finally:
+        # Give the thread's connection back before the worker is reused
+        connections[db_alias].close()
+
+
+def execute_sharded(plan, limit, offset, start_date, end_date, owner=None, max_rows=None, search=None):
+    """
+    Executes an interval report split by date range on parallel connections
+
+    See ``ReportPlan.execute``.
+    """
+    db_alias = plan.get_read_alias()
+    shards = split_date_range(start_date, end_date, settings.REPORT_SHARD_DAYS)
+    with ThreadPoolExecutor(max_workers=min(settings.REPORT_SHARD_PARALLELISM, len(shards))) as executor:
+        results = executor.map(lambda shard: _execute_shard(plan, db_alias, *shard, owner, search), shards)
+        partial_rows = [row for rows in results for row in rows]
+
+    columns, rows, total_count = merge_partials(plan, partial_rows, limit, offset)
+    check_export_rows(total_count, max_rows)
+    return columns, rows, total_count
+
+
+async def _aexecute_shard(plan, db_alias, start_date, end_date, owner, semaphore, search=None):
+    from contextlib import AsyncExitStack
+
+    from psycopg.errors import QueryCanceled
+
+    from apps.core import admission, inflight, profiling
+    from apps.core.async_db import async_connection
+
+    query, params = plan.build_partial(start_date, end_date, search)
+    budget = plan.get_budget()
+    async with semaphore, AsyncExitStack() as stack:
+        for slot in admission.get_slots(plan, inflight.new_token(), owner or "anonymous"):
+            await stack.enter_async_context(slot)
+
+        async with async_connection(db_alias) as connection, connection.cursor() as cursor:
+            for name, value in get_budget_settings(budget):
+                await cursor.execute("SELECT set_config(%s, %s, false)", [name, value])
+            try:
+                with profiling.timed_query(db_alias, query):
+                    await cursor.execute(query, params, prepare=True)
+            except QueryCanceled:
+                raise statement_timeout_error(budget) from None
+            return await cursor.fetchall()
+
+
+async def aexecute_sharded(
+    plan, limit, offset, start_date, end_date, owner=None, max_rows=None, search=None, db_alias=None
+):
+    """
+    Async version of ``execute_sharded``
+
+    See ``ReportPlan.aexecute``.
+    """
+    db_alias = db_alias or await sync_to_async(plan.get_read_alias)()
+    shards = split_date_range(start_date, end_date, settings.REPORT_SHARD_DAYS)
+    semaphore = asyncio.Semaphore(settings.REPORT_SHARD_PARALLELISM)
+
+    tasks = [asyncio.create_task(_aexecute_shard(plan, db_alias, *shard, owner, semaphore, search)) for shard in shards]
+    try:
+        results = await asyncio.gather(*tasks)
+    except BaseException:
+        # A failed shard or a disconnected client cancels the others
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+    partial_rows = [row for rows in results for row in rows]
+
+    columns, rows, total_count = merge_partials(plan, partial_rows, limit, offset)
+    check_export_rows(total_count, max_rows)
+    return columns, rows, total_count
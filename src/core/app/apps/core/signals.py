@@ -0,0 +1,106 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import partial
+
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.db.models import Q
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django_celery_beat.models import PeriodicTask
+
+from apps.core import profiling
+from apps.core.models import Column, Report, ReportArtifact, ReportColumn, ReportSchedule, Table
+from apps.core.plans import invalidate_report_plan
+
+# Table ids whose plans are invalidated when the running batch ends, see batch_table_invalidation
+_batched_table_ids = ContextVar("batched_table_ids", default=None)
+
+
+def invalidate_after_commit(report_id):
+    """
+    Invalidates the plan of a report once the transaction commits
+
+    Invalidating before the commit would let a concurrent request compile the
+    plan from the old rows and cache it under the new version.
+    """
+    transaction.on_commit(partial(invalidate_report_plan, report_id))
+
+
+@receiver([post_save, post_delete], sender=Report)
+def report_changed(sender, instance, **kwargs):
+    """Any change of the report configuration invalidates its compiled plan"""
+    invalidate_after_commit(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=ReportColumn)
+def report_column_changed(sender, instance, **kwargs):
+    invalidate_after_commit(instance.report_id)
+
+
+def get_table_report_ids(table_ids):
+    """Reports of the tables or reading columns of them through joins"""
+    return (
+        Report.objects.filter(Q(table_id__in=table_ids) | Q(report_columns__column__table_id__in=table_ids))
+        .values_list("pk", flat=True)
+        .distinct()
+    )
+
+
+def invalidate_table_plans(table_ids):
+    """Invalidates the plans of the reports using the tables"""
+    batched = _batched_table_ids.get()
+    if batched is not None:
+        batched.update(table_ids)
+        return
+    for report_id in get_table_report_ids(table_ids):
+        invalidate_after_commit(report_id)
+
+
+@contextmanager
+def batch_table_invalidation():
+    """
+    Defers the plan invalidations of table and column changes to the end of the block
+
+    A metadata sync saves every column: each report of a table is invalidated once,
+    instead of once per saved column.
+    """
+    table_ids = set()
+    token = _batched_table_ids.set(table_ids)
+    try:
+        yield
+    finally:
+        _batched_table_ids.reset(token)
+        if table_ids:
+            invalidate_table_plans(table_ids)
+
+
+@receiver([post_save, post_delete], sender=Column)
+def column_changed(sender, instance, **kwargs):
+    """Synced column metadata (names, types, foreign keys) is part of the plans of the reports using its table"""
+    invalidate_table_plans([instance.table_id])
+
+
+@receiver([post_save, post_delete], sender=Table)
+def table_changed(sender, instance, **kwargs):
+    invalidate_table_plans([instance.pk])
+
+
+@receiver(post_delete, sender=ReportArtifact)
+def report_artifact_deleted(sender, instance, **kwargs):
+    """Deleting an artifact also deletes its file"""
+    if instance.file:
+        instance.file.delete(save=False)
+
+
+@receiver(post_delete, sender=ReportSchedule)
+def report_schedule_deleted(sender, instance, **kwargs):
+    """The celery beat task of a deleted schedule must not keep running"""
+    if instance.periodic_task_id:
+        PeriodicTask.objects.filter(pk=instance.periodic_task_id).delete()
+
+
+@receiver(connection_created)
+def install_query_recorder(sender, connection, **kwargs):
+    """Queries of every connection can be recorded by the request profiling"""
+    profiling.install_query_recorder(connection)
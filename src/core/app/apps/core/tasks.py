@@ -0,0 +1,56 @@
+import logging
+
+from celery import shared_task
+
+from apps.core.artifacts import purge_expired_artifacts, store_artifact
+from apps.core.exports import get_company_data, render_csv, render_pdf
+from apps.core.models import ReportArtifact, ReportSchedule
+from apps.core.plans import get_report_plan
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(ignore_result=True)
+def generate_scheduled_report(schedule_id):
+    """Executes a scheduled report and stores its PDF/CSV artifacts"""
+    schedule = ReportSchedule.objects.filter(pk=schedule_id, is_active=True, report__is_active=True).first()
+    if schedule is None:
+        logger.info("Report schedule %s is inactive or was deleted, skipping", schedule_id)
+        return
+
+    start_date, end_date = schedule.get_date_range()
+    plan = get_report_plan(schedule.report_id)
+    columns, rows, total_count = plan.execute(
+        start_date=start_date.isoformat(),
+        end_date=end_date.isoformat(),
+        owner=f"schedule-{schedule.pk}",
+        max_rows=plan.get_budget()["max_export_rows"],
+    )
+
+    files = []
+    if schedule.generate_pdf:
+        pdf = render_pdf(
+            plan, columns, rows, total_count, get_company_data(), start_date.isoformat(), end_date.isoformat()
+        )
+        files.append((ReportArtifact.Format.PDF, pdf))
+    if schedule.generate_csv:
+        files.append((ReportArtifact.Format.CSV, render_csv(plan, columns, rows)))
+
+    for format, file in files:
+        store_artifact(plan, format, start_date, end_date, file, total_count, schedule.retention_days, schedule=schedule)
+
+    logger.info(
+        "Report schedule %s generated %s artifacts (%s - %s, %s rows)",
+        schedule.pk,
+        len(files),
+        start_date,
+        end_date,
+        total_count,
+    )
+
+
+@shared_task(ignore_result=True)
+def purge_report_artifacts():
+    """Deletes the pre-generated report files past their retention"""
+    deleted = purge_expired_artifacts()
+    logger.info("Purged %s expired report artifacts", deleted)
@@ -4,24 +4,53 @@ import logging
 from datetime import date, datetime
 from io import StringIO
 
-import pandas as pd
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.contrib import messages
+from django.core.exceptions import ValidationError
 from django.core.management import call_command
 from django.core.paginator import Paginator
-from django.db.models import Count
-from django.http import HttpRequest, HttpResponse
+from django.db.models import Case, Count, Q, Value, When
+from django.http import HttpRequest, HttpResponse, JsonResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
+from django.urls import reverse
+from django.utils.http import content_disposition_header, urlencode
 from django.views.decorators.http import require_GET, require_http_methods
 from django_htmx.middleware import HtmxDetails
 
-from apps.company.models import Company
+from apps.core import metrics
+from apps.core.artifacts import aget_artifact_content
+from apps.core.conditional import (
+    aget_not_modified,
+    conditional_page,
+    get_list_state,
+    make_etag,
+    set_validators,
+)
+from apps.core.exceptions import ReportQueryCancelled
+from apps.core.exports import (
+    astream_pdf_volumes,
+    get_company_data,
+    get_volume_count,
+    render_csv,
+    render_pdf,
+)
+from apps.core.joins import get_reachable_tables
 from apps.core.models import Database
-from apps.utils.pdf_utils import PDFUtils
+from apps.core.packs import run_pack
+from apps.core.plans import SEARCH_MIN_LENGTH, aget_report_plan, get_report_plan, invalidate_report_plan
+from apps.core.watermarks import aget_plan_watermark
 
-from .models import Column, Report, ReportColumn, Table
+from .models import Column, Report, ReportArtifact, ReportColumn, ReportPack, Table
 
 logger = logging.getLogger(__name__)
 
+# Tables per page of the catalog search, and matching column names shown for each
+TABLE_SEARCH_PAGE_SIZE = 20
+TABLE_SEARCH_COLUMNS = 5
+# Columns per page of the column picker, wide tables load while scrolling
+COLUMN_PAGE_SIZE = 50
+
 
 class HtmxHttpRequest(HttpRequest):
     htmx: HtmxDetails
@@ -41,6 +70,12 @@ def favicon(request: HtmxHttpRequest) -> HttpResponse:
     )
 
 
+@require_GET
+def metrics_view(request: HtmxHttpRequest) -> JsonResponse:
+    """Expose the report metrics counters"""
+    return JsonResponse(metrics.get_counters())
+
+
 def index_view(request: HtmxHttpRequest) -> HttpResponse:
     """View for the index page"""
 
@@ -132,6 +167,7 @@ def config_report_sync_view(request: HtmxHttpRequest) -> HttpResponse:
         return response
 
 
+@conditional_page(lambda request: get_list_state(Report.objects.filter(is_active=True), Table.objects.all()))
 def config_report_view(request: HtmxHttpRequest) -> HttpResponse:
     """View to list and paginate reports configuration"""
 
@@ -163,6 +199,89 @@ def config_report_delete_view(request: HtmxHttpRequest, report_id: int) -> HttpR
     return response
 
 
+def get_config_report_detail_state(request):
+    """The report and its configuration version when editing, tables are searched apart"""
+    report_id = request.GET.get("report_id")
+    if not report_id:
+        return None, []
+    report = Report.objects.filter(pk=report_id).values("updated_at").first()
+    if report is None:
+        return None
+    # The configuration version also changes with the columns of the report
+    return report["updated_at"], [get_report_plan(report_id).version]
+
+
+def get_choice(value, choices):
+    """The value when it is one of the choices, the default (first) choice otherwise"""
+    return value if value in choices.values else choices.values[0]
+
+
+def parse_columns_payload(payload):
+    """
+    Parses the columns posted by the column picker
+
+    Args:
+        payload: JSON list of {id, format, aggregate, pivot_role, display_name, order, order_by}
+
+    Returns:
+        dict: {column id: settings}, invalid entries and choices are dropped or take their default
+    """
+    try:
+        items = json.loads(payload or "[]")
+    except ValueError:
+        return {}
+
+    config = {}
+    for item in items if isinstance(items, list) else []:
+        if not isinstance(item, dict):
+            continue
+        try:
+            column_id = int(item.get("id"))
+        except (TypeError, ValueError):
+            continue
+        try:
+            order = int(item.get("order") or 0)
+        except (TypeError, ValueError):
+            order = 0
+        config[column_id] = {
+            "format": get_choice(item.get("format"), ReportColumn.FormatColumn),
+            "aggregate": get_choice(item.get("aggregate"), ReportColumn.AggregateFunction),
+            "pivot_role": get_choice(item.get("pivot_role"), ReportColumn.PivotRole),
+            "display_name": str(item.get("display_name") or "").strip(),
+            "order": order,
+            "order_by": item.get("order_by") is True,
+        }
+    return config
+
+
+def get_column_settings(report_column):
+    """Settings of a report column, as the column picker posts them"""
+    return {
+        "id": report_column.column_id,
+        "format": report_column.format,
+        "aggregate": report_column.aggregate,
+        "pivot_role": report_column.pivot_role,
+        "display_name": report_column.display_name,
+        "order": report_column.order,
+        "order_by": report_column.order_by,
+    }
+
+
+def clean_report_field(name, value):
+    """
+    Converts and validates a posted value with its ``Report`` field
+
+    Raises:
+        ValidationError: With the field name in the message
+    """
+    field = Report._meta.get_field(name)
+    try:
+        return field.clean(value, None)
+    except ValidationError as e:
+        raise ValidationError(f"{field.verbose_name}: {e.messages[0]}") from e
+
+
+@conditional_page(get_config_report_detail_state)
 def config_report_detail_view(request: HtmxHttpRequest) -> HttpResponse:
     """View to create or edit a report configuration"""
 
@@ -174,17 +293,26 @@ def config_report_detail_view(request: HtmxHttpRequest) -> HttpResponse:
         orientation = data.get("orientation")
         order = data.get("order")
         interval = data.get("interval")
-
-        config = {}
-        columns = Column.objects.filter(id__in=data.getlist("columns"), table=table)
-        for column in columns:
-            config[column.slug] = {
-                "format": data.get(f"format_{column.id}", ReportColumn.FormatColumn.TEXT),
-                "display_name": data.get(f"display_name_{column.id}", column.column_name),
-                "order": data.get(f"order_{column.id}", 0),
-                "order_by": data.get(f"order_by_{column.id}", "off") == "on",
-                "aggregate": data.get(f"aggregate_{column.id}", ReportColumn.AggregateFunction.NONE),
-            }
+        totals = data.get("totals") or Report.Totals.NONE
+        replica_max_lag = data.get("replica_max_lag") or None
+        pivot_top = data.get("pivot_top") or Report._meta.get_field("pivot_top").default
+        budget = {
+            "statement_timeout": data.get("statement_timeout") or None,
+            "work_mem": data.get("work_mem", "").strip(),
+            "max_export_rows": data.get("max_export_rows") or None,
+            "max_concurrency": data.get("max_concurrency") or None,
+        }
+        # Numbers and the budget are cleaned by their model fields, bad input is answered instead of failing on save
+        try:
+            replica_max_lag = clean_report_field("replica_max_lag", replica_max_lag)
+            pivot_top = clean_report_field("pivot_top", pivot_top)
+            budget = {field: clean_report_field(field, value) for field, value in budget.items()}
+        except ValidationError as e:
+            return HttpResponse(e.messages[0], status=400)
+
+        # Only the picked columns are posted, as JSON. They belong to the table or to the tables its foreign keys reach
+        config = parse_columns_payload(data.get("columns_json"))
+        columns = Column.objects.filter(id__in=config, table__in=get_reachable_tables(table))
 
         if report_id:
             report = get_object_or_404(Report, pk=report_id)
@@ -193,6 +321,11 @@ def config_report_detail_view(request: HtmxHttpRequest) -> HttpResponse:
             report.orientation = orientation
             report.order = order
             report.interval = interval
+            report.totals = totals
+            report.replica_max_lag = replica_max_lag
+            report.pivot_top = pivot_top
+            for field, value in budget.items():
+                setattr(report, field, value)
             report.save()
             report.report_columns.all().delete()
         else:
@@ -202,18 +335,28 @@ def config_report_detail_view(request: HtmxHttpRequest) -> HttpResponse:
                 orientation=orientation,
                 order=order,
                 interval=interval,
+                totals=totals,
+                replica_max_lag=replica_max_lag,
+                pivot_top=pivot_top,
+                **budget,
             )
 
-        for column in columns:
-            report.report_columns.create(
+        # One insert for every column, and one plan invalidation after it (bulk_create sends no signals)
+        ReportColumn.objects.bulk_create(
+            ReportColumn(
+                report=report,
                 column=column,
-                format=config[column.slug]["format"],
-                order=int(config[column.slug]["order"]),
-                display_name=config[column.slug]["display_name"].strip().capitalize(),
-                order_by=config[column.slug]["order_by"],
-                aggregate=config[column.slug]["aggregate"],
+                format=config[column.pk]["format"],
+                order=config[column.pk]["order"],
+                display_name=(config[column.pk]["display_name"] or column.column_name).capitalize(),
+                order_by=config[column.pk]["order_by"],
+                aggregate=config[column.pk]["aggregate"],
+                pivot_role=config[column.pk]["pivot_role"],
                 is_visible=True,
             )
+            for column in columns
+        )
+        invalidate_report_plan(report.pk)
 
         if not report_id:
             messages.success(request, "Reporte guardado exitosamente.")
@@ -225,7 +368,7 @@ def config_report_detail_view(request: HtmxHttpRequest) -> HttpResponse:
     report_id = request.GET.get("report_id")
     report = None
     if report_id:
-        report = get_object_or_404(Report, pk=report_id)
+        report = get_object_or_404(Report.objects.select_related("table"), pk=report_id)
 
     template_name = "partials/config_report_detail.html"
     if request.htmx:
@@ -233,29 +376,139 @@ def config_report_detail_view(request: HtmxHttpRequest) -> HttpResponse:
     else:
         base_template = "base.html"
 
-    tables = Table.objects.all()
-    ctx = {"base_template": base_template, "tables": tables, "report": report}
+    # The table is picked with the catalog search, the page does not list them
+    ctx = {"base_template": base_template, "report": report}
     return render(request, template_name, context=ctx)
 
 
+def config_report_tables_view(request: HtmxHttpRequest) -> HttpResponse:
+    """
+    Catalog search of the config page, by table, schema or column name
+
+    Every condition compares UPPER(name) and is served by a trigram index, a page
+    costs the same whatever the size of the catalog.
+    """
+    query = request.GET.get("q", "").strip()
+    try:
+        page_number = max(int(request.GET.get("page", 1)), 1)
+    except ValueError:
+        page_number = 1
+
+    tables = Table.objects.filter(is_active=True)
+    matching_columns = Column.objects.filter(is_active=True, column_name__icontains=query)
+    if query:
+        tables = tables.filter(
+            Q(table_name__icontains=query)
+            | Q(schema_name__icontains=query)
+            | Q(pk__in=matching_columns.values("table_id"))
+        ).annotate(
+            # Tables named like the query first, then those containing it, then those with such a column
+            rank=Case(
+                When(table_name__istartswith=query, then=Value(0)),
+                When(table_name__icontains=query, then=Value(1)),
+                default=Value(2),
+            )
+        )
+        tables = tables.order_by("rank", "table_name", "schema_name")
+    else:
+        tables = tables.order_by("table_name", "schema_name")
+
+    # One row more than the page tells whether there is a next one, without counting
+    offset = (page_number - 1) * TABLE_SEARCH_PAGE_SIZE
+    tables = list(tables[offset : offset + TABLE_SEARCH_PAGE_SIZE + 1])
+    has_next = len(tables) > TABLE_SEARCH_PAGE_SIZE
+    tables = tables[:TABLE_SEARCH_PAGE_SIZE]
+
+    if query and tables:
+        names = {}
+        for table_id, column_name in matching_columns.filter(table__in=tables).values_list("table_id", "column_name"):
+            names.setdefault(table_id, []).append(column_name)
+        for table in tables:
+            table.matching_columns = names.get(table.pk, [])[:TABLE_SEARCH_COLUMNS]
+
+    ctx = {
+        "tables": tables,
+        "query": query,
+        "next_page": page_number + 1 if has_next else None,
+        "is_first_page": page_number == 1,
+    }
+    return render(request, "partials/config_report_tables.html", context=ctx)
+
+
 def config_report_column_view(request: HtmxHttpRequest) -> HttpResponse:
+    """
+    Column picker of a report, one page of the columns of its table and of the tables it reaches
+
+    The first page renders the picker with the settings of the report columns; the next
+    pages, and the pages of a name or type filter, only render their rows.
+    """
     report_id = request.GET.get("report_id")
+    report = None
     if report_id:
-        report = get_object_or_404(Report, pk=report_id)
-        report_columns = report.report_columns.select_related("column").order_by("order")
-        table_id = report.table.id
+        report = get_object_or_404(Report.objects.select_related("table"), pk=report_id)
+        table = report.table
     else:
-        report_columns = None
         table_id = request.GET.get("table_id")
+        table = get_object_or_404(Table, pk=table_id) if table_id else None
 
-    columns = []
-    if table_id:
-        columns = Column.objects.filter(table_id=table_id, is_active=True).order_by("ordinal_position")
+    if table is None:
+        return render(request, "partials/config_report_columns.html", context={"table": None})
 
-    ctx = {"columns": columns, "report_columns": report_columns}
-    return render(request, "partials/config_report_columns.html", context=ctx)
+    try:
+        page_number = max(int(request.GET.get("page", 1)), 1)
+    except ValueError:
+        page_number = 1
+    search = request.GET.get("column_search", "").strip()
+    data_type = request.GET.get("data_type", "")
+    rows_only = page_number > 1 or request.htmx.target == "column-rows"
+
+    report_columns = {rc.column_id: rc for rc in report.report_columns.order_by("order")} if report else {}
+    # The columns of the table first, then those of the tables reached through its foreign keys
+    tables = {reachable.pk: position for position, reachable in enumerate(get_reachable_tables(table))}
+    columns = Column.objects.filter(table_id__in=tables, is_active=True)
+    data_types = [] if rows_only else columns.values_list("data_type", flat=True).distinct().order_by("data_type")
+    if search:
+        columns = columns.filter(column_name__icontains=search)
+    if data_type:
+        columns = columns.filter(data_type=data_type)
+
+    # The columns of the report lead the first page
+    columns = columns.annotate(
+        table_rank=Case(*(When(table_id=pk, then=Value(position)) for pk, position in tables.items())),
+        is_picked=Case(When(pk__in=list(report_columns), then=Value(0)), default=Value(1)),
+    ).order_by("is_picked", "table_rank", "ordinal_position")
+
+    # One row more than the page tells whether there is a next one, without counting
+    offset = (page_number - 1) * COLUMN_PAGE_SIZE
+    columns = list(columns.select_related("statistics", "table")[offset : offset + COLUMN_PAGE_SIZE + 1])
+    has_next = len(columns) > COLUMN_PAGE_SIZE
+    columns = columns[:COLUMN_PAGE_SIZE]
+    for column in columns:
+        column.report_column = report_columns.get(column.pk)
+
+    params = {"report_id": report.pk} if report else {"table_id": table.pk}
+    columns_url = reverse("config-report-columns")
+    ctx = {
+        "table": table,
+        "columns": columns,
+        "data_types": data_types,
+        "is_first_page": page_number == 1,
+        "rows_url": f"{columns_url}?{urlencode(params)}",
+        "next_url": f"{columns_url}?"
+        + urlencode({**params, "column_search": search, "data_type": data_type, "page": page_number + 1})
+        if has_next
+        else None,
+        "picked_columns": [get_column_settings(rc) for rc in report_columns.values()],
+    }
+    template_name = "partials/config_report_columns.html"
+    if rows_only:
+        template_name += "#column-rows"
+    return render(request, template_name, context=ctx)
 
 
+@conditional_page(
+    lambda request: get_list_state(Report.objects.filter(is_active=True), ReportPack.objects.filter(is_active=True))
+)
 def report_view(request: HtmxHttpRequest) -> HttpResponse:
     if request.htmx:
         base_template = "partials/base.html"
@@ -263,21 +516,39 @@ def report_view(request: HtmxHttpRequest) -> HttpResponse:
         base_template = "base.html"
 
     reports = Report.objects.filter(is_active=True).order_by("name")
+    packs = ReportPack.objects.filter(is_active=True).order_by("name")
 
-    ctx = {"base_template": base_template, "reports": reports}
+    ctx = {"base_template": base_template, "reports": reports, "packs": packs}
     return render(request, "report.html", context=ctx)
 
 
-def report_execute_view(request):
+async def get_execution_owner(request: HtmxHttpRequest) -> str:
+    """Identifies who runs a report: the user, or the session for anonymous users"""
+    user = await request.auser()
+    if user.is_authenticated:
+        return f"user-{user.pk}"
+    if not request.session.session_key:
+        await request.session.acreate()
+    return f"session-{request.session.session_key}"
+
+
+async def report_execute_view(request):
     """Execute a report and display results with pagination"""
 
+    template_name = "partials/report_execute.html"
+    results_only = False
     if request.htmx:
         base_template = "partials/base.html"
+        # Page, page size and search changes only need the rows and the pager
+        results_only = request.htmx.target == "report-results"
+        if results_only:
+            template_name += "#report-results"
     else:
         base_template = "base.html"
 
     report_id = request.GET.get("report_id")
-    report = Report.objects.prefetch_related("report_columns").get(pk=report_id)
+    # The compiled plan carries everything the page needs, no metadata queries when cached
+    report = await aget_report_plan(report_id)
 
     # Get pagination parameters
     page_number = request.GET.get("page", 1)
@@ -287,6 +558,20 @@ def report_execute_view(request):
     today = date.today().isoformat()
     start_date = request.GET.get("start_date") or today
     end_date = request.GET.get("end_date") or today
+    search = request.GET.get("search", "").strip()
+
+    # Same parameters, configuration and data: the copy the browser has is still good
+    etag = None
+    try:
+        watermark = await aget_plan_watermark(report)
+    except Exception as e:
+        logger.info("Watermark of report %s unavailable: %s", report.id, e)
+        watermark = None
+    if watermark is not None:
+        etag = make_etag(request, report.version, today, start_date, end_date, watermark)
+        not_modified = await aget_not_modified(request, etag)
+        if not_modified is not None:
+            return not_modified
 
     # Calculate limit and offset
     try:
@@ -296,13 +581,22 @@ def report_execute_view(request):
 
     offset = (page_number - 1) * page_size
 
+    # The watermark is read on the primary, rows from a lagging replica may be older than it
+    read_alias = await sync_to_async(report.get_read_alias)()
+    if read_alias != report.db_alias:
+        etag = None
+
     # Execute query
     try:
-        columns, rows, total_count = report.execute_query(
+        columns, rows, total_count = await report.aexecute(
             limit=page_size,
             offset=offset,
             start_date=start_date,
             end_date=end_date,
+            owner=await get_execution_owner(request),
+            search=search,
+            cancel_key="page",
+            db_alias=read_alias,
         )
 
         # Convert dates to date objects for template formatting
@@ -323,7 +617,19 @@ def report_execute_view(request):
             "page_size": page_size,
             "start_date": start_date_obj,
             "end_date": end_date_obj,
+            "results_only": results_only,
+            "search": search,
+            "search_min_length": SEARCH_MIN_LENGTH,
+            "search_url": f"{reverse('report-execute')}?"
+            + urlencode({"report_id": report.id, "start_date": start_date, "end_date": end_date}),
+            "execute_url": f"{reverse('report-execute')}?"
+            + urlencode({"report_id": report.id, "start_date": start_date, "end_date": end_date, "search": search}),
+            # New rows only matter when the range reaches today
+            "live_available": report.supports_live and end_date_obj >= date.today() and not search,
         }
+    except ReportQueryCancelled:
+        # A newer request of the same user replaced this one, nothing to swap
+        return HttpResponse(status=204)
     except Exception as e:
         logger.info("Error executing report: %s", e)
         ctx = {
@@ -332,10 +638,14 @@ def report_execute_view(request):
             "error": str(e),
         }
 
-    return render(request, "partials/report_execute.html", context=ctx)
+    # Rendering may touch the session (CSRF token), keep it out of the event loop
+    response = await sync_to_async(render)(request, template_name, context=ctx)
+    if etag and "error" not in ctx:
+        set_validators(response, etag)
+    return response
 
 
-def report_gen_pdf_view(request):
+async def report_gen_pdf_view(request):
     """Generate a PDF for the report"""
 
     # Get report parameters
@@ -343,57 +653,57 @@ def report_gen_pdf_view(request):
     if not report_id:
         return HttpResponse("Report ID is required", status=400)
 
-    report = Report.objects.prefetch_related("report_columns").get(pk=report_id)
+    report = await aget_report_plan(report_id)
 
     # Get date filters with today as default
     today = date.today().isoformat()
     start_date = request.GET.get("start_date") or today
     end_date = request.GET.get("end_date") or today
 
-    # Execute query to get all data (no pagination for PDF)
+    # Serve the file pre-generated off-peak when there is one for this request
+    artifact = await aget_artifact_content(report, ReportArtifact.Format.PDF, start_date, end_date)
+    if artifact is not None:
+        filename, content = artifact
+        return HttpResponse(
+            json.dumps({"base64_report": base64.b64encode(content).decode("utf-8"), "filename": filename}),
+            content_type="application/json",
+        )
+
+    # Large results are split in volumes: only the first one is fetched here,
+    # the total count tells whether there are more
+    rows_per_volume = settings.REPORT_PDF_ROWS_PER_VOLUME or None
+    owner = await get_execution_owner(request)
     try:
-        columns, rows, total_count = report.execute_query(
-            limit=None,  # No limit for PDF - get all data
-            offset=None,
+        columns, rows, total_count, cursor = await report.aexecute_volume(
+            rows_per_volume,
             start_date=start_date,
             end_date=end_date,
+            owner=owner,
+            max_rows=report.get_budget()["max_export_rows"],
         )
 
-        # Convert to pandas DataFrame
-        df = pd.DataFrame(rows, columns=columns)
-
-        # Determine which columns are numeric for formatting
-        numeric_columns = []
-        for rc in report.report_columns.all():
-            if rc.format in [ReportColumn.FormatColumn.NUMBER, ReportColumn.FormatColumn.CURRENCY]:
-                numeric_columns.append(rc.get_display_name())
-
-        # Company info (you can customize this)
-        if not Company.objects.filter(is_default=True).exists():
-            raise Exception("Debe crear una compañía predeterminada.")
-
-        company = Company.objects.filter(is_default=True).order_by("-updated_at").first()
-        company_data = company.to_dict_for_pdf()
-
-        # Convert dates for display
-        start_date_obj = datetime.fromisoformat(start_date).date()
-        end_date_obj = datetime.fromisoformat(end_date).date()
+        company_data = await sync_to_async(get_company_data)()
+
+        if get_volume_count(total_count, rows_per_volume) > 1:
+            response = StreamingHttpResponse(
+                astream_pdf_volumes(
+                    report,
+                    (columns, rows, total_count, cursor),
+                    company_data,
+                    start_date,
+                    end_date,
+                    owner,
+                    rows_per_volume,
+                ),
+                content_type="application/zip",
+            )
+            filename = f"{report.name.lower().replace(' ', '_')}_{start_date}_{end_date}.zip"
+            response["Content-Disposition"] = content_disposition_header(as_attachment=True, filename=filename)
+            return response
 
-        # Generate PDF
-        report_base64 = PDFUtils(
-            company=company_data,
-            template="report_generic.html",
-            is_landscape=report.orientation == Report.Orientation.HORIZONTAL,
-            context={
-                "title": report.name,
-                "start_date": start_date_obj.strftime("%d/%m/%Y"),
-                "end_date": end_date_obj.strftime("%d/%m/%Y"),
-                "total_regs": total_count,
-            },
-        ).gen_with_df(
-            filename=f"{report.name.lower().replace(' ', '_')}.pdf",
-            df=df,
-            columns_number=numeric_columns,
+        # Generate PDF in a worker thread, wkhtmltopdf is CPU bound
+        report_base64 = await sync_to_async(render_pdf, thread_sensitive=False)(
+            report, columns, rows, total_count, company_data, start_date, end_date
         )
 
         response = HttpResponse(
@@ -407,3 +717,69 @@ def report_gen_pdf_view(request):
     except Exception as e:
         logger.info("Error generating PDF: %s", e)
         return HttpResponse(json.dumps({"error": str(e)}), content_type="application/json", status=400)
+
+
+async def report_gen_csv_view(request):
+    """Download the report data as CSV"""
+
+    report_id = request.GET.get("report_id")
+    if not report_id:
+        return HttpResponse("Report ID is required", status=400)
+
+    report = await aget_report_plan(report_id)
+
+    # Get date filters with today as default
+    today = date.today().isoformat()
+    start_date = request.GET.get("start_date") or today
+    end_date = request.GET.get("end_date") or today
+
+    artifact = await aget_artifact_content(report, ReportArtifact.Format.CSV, start_date, end_date)
+    if artifact is not None:
+        filename, content = artifact
+    else:
+        try:
+            columns, rows, _ = await report.aexecute(
+                start_date=start_date,
+                end_date=end_date,
+                owner=await get_execution_owner(request),
+                max_rows=report.get_budget()["max_export_rows"],
+            )
+        except Exception as e:
+            logger.info("Error generating CSV: %s", e)
+            return HttpResponse(str(e), status=400)
+
+        file = await sync_to_async(render_csv, thread_sensitive=False)(report, columns, rows)
+        filename, content = file.name, file.read()
+
+    response = HttpResponse(content, content_type="text/csv; charset=utf-8")
+    response["Content-Disposition"] = content_disposition_header(as_attachment=True, filename=filename)
+    return response
+
+
+async def report_pack_view(request):
+    """Generate every report of a pack concurrently and download the PDFs as a ZIP"""
+
+    pack_id = request.GET.get("pack_id")
+    if not pack_id:
+        return HttpResponse("Pack ID is required", status=400)
+
+    pack = await ReportPack.objects.filter(is_active=True, pk=pack_id).afirst()
+    if pack is None:
+        return HttpResponse("Pack not found", status=404)
+
+    # Get date filters with today as default
+    today = date.today().isoformat()
+    start_date = request.GET.get("start_date") or today
+    end_date = request.GET.get("end_date") or today
+
+    try:
+        filename, content = await sync_to_async(run_pack, thread_sensitive=False)(
+            pack, start_date, end_date, owner=await get_execution_owner(request)
+        )
+    except Exception as e:
+        logger.info("Error generating report pack: %s", e)
+        return HttpResponse(json.dumps({"error": str(e)}), content_type="application/json", status=400)
+
+    response = HttpResponse(content, content_type="application/zip")
+    response["Content-Disposition"] = content_disposition_header(as_attachment=True, filename=filename)
+    return response
@@ -0,0 +1,144 @@
+"""
+Per-table data watermarks.
+
+A watermark is a short value that changes whenever the rows of a table
+change, so result caches, artifacts and HTTP ETags can key on it without
+reading the data. How it is computed is configured per ``Table``:
+
+- ``stats``: insert/update/delete counters and live rows of
+  ``pg_stat_user_tables``. Reads no table data. The server publishes the
+  counters with a small delay and a statistics reset changes them too (a
+  spurious change, never a missed one). Views have no statistics.
+- ``timestamp``: max of a column that grows with every change (an
+  ``updated_at``, ideally indexed). Deleted rows are not detected.
+- ``xmin``: row count and newest row version. Scans the whole table, only
+  for small tables without such a column.
+
+Watermarks are read on the primary of the table database, statistics of a
+standby do not count replayed changes. Every watermark is cached for
+``REPORT_WATERMARK_TTL`` seconds, a change shows up at most that late.
+
+A watermark of ``None`` means the change cannot be detected, callers must not
+cache in that case. Reports with joins combine the watermarks of every table
+they read (see ``get_plan_watermark``).
+"""
+
+import hashlib
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+
+KEY_PREFIX = "report:watermark:"
+
+STATS_QUERY = (
+    "SELECT n_tup_ins, n_tup_upd, n_tup_del, n_live_tup FROM pg_stat_user_tables WHERE relid = %(table)s::regclass"
+)
+
+
+@dataclass(frozen=True)
+class WatermarkSource:
+    """Where and how the watermark of a table is read"""
+
+    db_alias: str
+    # Quoted schema and table, with '%' doubled like every other compiled fragment
+    table_sql: str
+    strategy: str
+    column_sql: str | None = None
+
+    @property
+    def cache_key(self):
+        source = f"{self.db_alias}|{self.table_sql}|{self.strategy}|{self.column_sql}"
+        return f"{KEY_PREFIX}{hashlib.sha1(source.encode()).hexdigest()}"
+
+    def build(self):
+        """
+        Returns the watermark query of the source
+
+        Returns:
+            tuple: (query, params)
+        """
+        from apps.core.models import Table
+
+        if self.strategy == Table.WatermarkStrategy.TIMESTAMP and self.column_sql:
+            return f"SELECT max({self.column_sql}) FROM {self.table_sql}", {}
+        if self.strategy == Table.WatermarkStrategy.XMIN:
+            return f"SELECT count(*), max(xmin::text::bigint) FROM {self.table_sql}", {}
+        return STATS_QUERY, {"table": self.table_sql.replace("%%", "%")}
+
+
+def get_table_source(table):
+    """Returns the watermark source of a ``Table``"""
+    from apps.core.plans import as_string, identifier
+
+    return WatermarkSource(
+        db_alias=table.database.alias,
+        table_sql=as_string(identifier(table.schema_name, table.table_name)),
+        strategy=table.watermark_strategy,
+        column_sql=as_string(identifier(table.watermark_column)) if table.watermark_column else None,
+    )
+
+
+def _to_watermark(row):
+    # No statistics row (a view) or an empty table for max(): nothing to key on
+    if row is None or all(value is None for value in row):
+        return None
+    return "|".join(str(value) for value in row)
+
+
+def get_watermark(source):
+    """
+    Returns the current watermark of a source, at most ``REPORT_WATERMARK_TTL`` seconds old
+
+    Returns:
+        str | None: The watermark, None when changes cannot be detected
+    """
+    cached = cache.get(source.cache_key)
+    if cached is not None:
+        return cached[0]
+
+    query, params = source.build()
+    with connections[source.db_alias].cursor() as cursor:
+        cursor.execute(query, params)
+        watermark = _to_watermark(cursor.fetchone())
+    # Wrapped, so a None watermark is cached too
+    cache.set(source.cache_key, (watermark,), settings.REPORT_WATERMARK_TTL)
+    return watermark
+
+
+async def aget_watermark(source):
+    """Async version of ``get_watermark``, on an async connection of the alias"""
+    from apps.core.async_db import async_connection
+
+    cached = await cache.aget(source.cache_key)
+    if cached is not None:
+        return cached[0]
+
+    query, params = source.build()
+    async with async_connection(source.db_alias) as connection:
+        cursor = await connection.execute(query, params)
+        watermark = _to_watermark(await cursor.fetchone())
+    await cache.aset(source.cache_key, (watermark,), settings.REPORT_WATERMARK_TTL)
+    return watermark
+
+
+def get_table_watermark(table):
+    """Returns the current watermark of a ``Table``, see ``get_watermark``"""
+    return get_watermark(get_table_source(table))
+
+
+def _combine(watermarks):
+    if any(watermark is None for watermark in watermarks):
+        return None
+    return "|".join(watermarks) if len(watermarks) > 1 else watermarks[0]
+
+
+def get_plan_watermark(plan):
+    """Returns the watermark of the data a report plan reads, its table and the joined tables"""
+    return _combine([get_watermark(source) for source in (plan.watermark, *plan.join_watermarks)])
+
+
+async def aget_plan_watermark(plan):
+    """Async version of ``get_plan_watermark``"""
+    return _combine([await aget_watermark(source) for source in (plan.watermark, *plan.join_watermarks)])
@@ -1,7 +1,6 @@
 import io
 import tempfile
 
-import pdfkit
 from django.core.files import File
 from django.template.loader import render_to_string
 
@@ -24,6 +23,9 @@ class PDFUtils:
         self.footer_template = f"pdf/{footer_template}" if footer_template is not None else None
 
     def gen(self, filename: str):
+        # Imported here, processes that never build a PDF do not load it
+        import pdfkit
+
         ctx = {"company": self.company}
         ctx.update(self.context)
         options = {
@@ -52,22 +54,33 @@ class PDFUtils:
                 pass
 
     def gen_with_df(self, filename: str, df, columns_number=None):
+        return self.gen_with_rows(filename, list(df.columns), df.itertuples(index=False, name=None), columns_number)
+
+    def gen_with_rows(self, filename: str, columns, rows, columns_number=None, first_index=1):
+        """Same table as ``gen_with_df`` from plain rows, without building a DataFrame"""
         if columns_number is None:
             columns_number = []
-        dict_data = [df.to_dict(), df.to_dict("index")]
+        numeric = [column in columns_number for column in columns]
 
         html = ['<table class="dataframe"><tr><th>#</th>']
-        [html.append(f'<th class="header">{key}</th>') for key in dict_data[0].keys()]
+        [html.append(f'<th class="header">{column}</th>') for column in columns]
         html.append("</tr>")
 
-        for key in dict_data[1].keys():
-            html.append(f'<tr><td class="index">{key + 1}</td>')
-            for subkey in dict_data[1][key]:
-                if subkey in columns_number:
-                    value = number_format(dict_data[1][key][subkey])
-                    html.append(f'<td style="text-align: end">{value}</td>')
+        for index, row in enumerate(rows, start=first_index):
+            is_total = getattr(row, "is_total", False)
+            html.append(
+                '<tr class="total"><td class="index"></td>' if is_total else f'<tr><td class="index">{index}</td>'
+            )
+            for position, (is_number, value) in enumerate(zip(numeric, row)):
+                if is_total and position == 0:
+                    # The label of a row of totals goes in its first cell
+                    html.append(f"<td>{row.label if value is None else f'{value} - {row.label}'}</td>")
+                elif is_number and value is not None:
+                    html.append(f'<td style="text-align: end">{number_format(value)}</td>')
+                elif is_number or (is_total and value is None):
+                    html.append('<td style="text-align: end"></td>')
                 else:
-                    html.append(f"<td>{dict_data[1][key][subkey]}</td>")
+                    html.append(f"<td>{value}</td>")
 
         html.append("</tr></table>")
         ctx = {"body": "".join(html)}
@@ -1,6 +1,7 @@
 import os
 
 from celery import Celery
+from celery.schedules import crontab
 
 # Set the default Django settings module for the 'celery' program.
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "report.settings")
@@ -13,5 +14,12 @@ app = Celery("report")
 #   should have a `CELERY_` prefix.
 app.config_from_object("django.conf:settings", namespace="CELERY")
 
+app.conf.beat_schedule = {
+    "purge-report-artifacts": {
+        "task": "apps.core.tasks.purge_report_artifacts",
+        "schedule": crontab(hour=10, minute=0),  # 04:00 America/Costa_Rica, CELERY_TIMEZONE is UTC
+    },
+}
+
 # Load task modules from all registered Django apps.
 app.autodiscover_tasks()
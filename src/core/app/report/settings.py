@@ -54,6 +54,7 @@ INSTALLED_APPS = [
     "corsheaders",
     "django_extensions",
     "django_celery_results",
+    "django_celery_beat",
     "channels",
     "template_partials",
     "django_htmx",
@@ -73,6 +74,7 @@ MIDDLEWARE = [
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
     "django_htmx.middleware.HtmxMiddleware",
+    "apps.core.middleware.ProfilingMiddleware",
 ]
 
 ROOT_URLCONF = "report.urls"
@@ -137,9 +139,92 @@ DATABASES = {
         "PASSWORD": env("DB_REPORT_PASSWORD"),
         "HOST": env("DB_REPORT_HOST"),
         "PORT": "5432",
+        # Report queries are parameterized: bind values on the server and keep
+        # pooled connections so their prepared statements are reused across pages
+        "OPTIONS": {
+            "server_side_binding": True,
+            "prepare_threshold": env.int("DB_REPORT_PREPARE_THRESHOLD", default=1),
+            "pool": {
+                "min_size": env.int("DB_REPORT_POOL_MIN_SIZE", default=1),
+                "max_size": env.int("DB_REPORT_POOL_MAX_SIZE", default=10),
+            },
+        },
     },
 }
 
+# Read replicas of the report database. Every host gets its own connection alias
+# (report_replica_1, report_replica_2, ...) with the same credentials as "report".
+DB_REPORT_REPLICA_HOSTS = env.list("DB_REPORT_REPLICA_HOSTS", default=[])
+for index, replica_host in enumerate(DB_REPORT_REPLICA_HOSTS, start=1):
+    DATABASES[f"report_replica_{index}"] = {
+        **DATABASES["report"],
+        "HOST": replica_host,
+        "TEST": {"MIRROR": "report"},
+    }
+
+DATABASE_ROUTERS = ["apps.core.routers.ReportReplicaRouter"]
+
+# Replicas available for each report database alias
+REPORT_DATABASE_REPLICAS = {
+    "report": [f"report_replica_{index}" for index in range(1, len(DB_REPORT_REPLICA_HOSTS) + 1)],
+}
+
+# Default replication lag tolerated (seconds) before falling back to the primary
+REPORT_REPLICA_MAX_LAG = env.int("DB_REPORT_REPLICA_MAX_LAG", default=30)
+
+# How long (seconds) a measured replication lag is reused before checking again
+REPORT_REPLICA_LAG_CACHE_TTL = env.int("DB_REPORT_REPLICA_LAG_CACHE_TTL", default=5)
+
+
+# Async connection pools used by the async report views (per process and alias)
+REPORT_ASYNC_POOL_MIN_SIZE = env.int("REPORT_ASYNC_POOL_MIN_SIZE", default=1)
+REPORT_ASYNC_POOL_MAX_SIZE = env.int("REPORT_ASYNC_POOL_MAX_SIZE", default=10)
+
+
+# Resource budgets of report executions, each report can override them
+REPORT_STATEMENT_TIMEOUT = env.int("REPORT_STATEMENT_TIMEOUT", default=60)  # seconds
+REPORT_WORK_MEM = env("REPORT_WORK_MEM", default="")  # e.g. "64MB", empty keeps the server default
+REPORT_MAX_WORK_MEM = env("REPORT_MAX_WORK_MEM", default="1GB")  # cap of the work_mem of a report
+REPORT_MAX_EXPORT_ROWS = env.int("REPORT_MAX_EXPORT_ROWS", default=100000)
+# PDFs with more rows are split in volumes of this many rows, downloaded as a ZIP (0 disables it)
+REPORT_PDF_ROWS_PER_VOLUME = env.int("REPORT_PDF_ROWS_PER_VOLUME", default=5000)
+
+# Admission control: report queries running at once in the whole system (0 disables the cap)
+REPORT_MAX_CONCURRENT_EXECUTIONS = env.int("REPORT_MAX_CONCURRENT_EXECUTIONS", default=8)
+# Seconds an execution waits in the queue for a free slot before failing
+REPORT_ADMISSION_TIMEOUT = env.int("REPORT_ADMISSION_TIMEOUT", default=30)
+
+# Reports of a pack generated in parallel, each one on its own connection
+REPORT_PACK_MAX_WORKERS = env.int("REPORT_PACK_MAX_WORKERS", default=4)
+
+# Interval reports longer than REPORT_SHARD_DAYS days run split in ranges of that many
+# days, up to REPORT_SHARD_PARALLELISM at the same time (1 disables sharding)
+REPORT_SHARD_DAYS = env.int("REPORT_SHARD_DAYS", default=7)
+REPORT_SHARD_PARALLELISM = env.int("REPORT_SHARD_PARALLELISM", default=4)
+
+# Live mode: seconds between watermark checks of a watched table and rows pushed per check
+REPORT_LIVE_POLL_INTERVAL = env.float("REPORT_LIVE_POLL_INTERVAL", default=2.0)
+REPORT_LIVE_MAX_ROWS = env.int("REPORT_LIVE_MAX_ROWS", default=200)
+# Wake the poller with LISTEN/NOTIFY (needs install_live_notify_trigger on the watched tables)
+REPORT_LIVE_USE_NOTIFY = env.bool("REPORT_LIVE_USE_NOTIFY", default=False)
+REPORT_LIVE_NOTIFY_CHANNEL = "report_live"
+# With notifications, seconds between safety polls when no notification arrives
+REPORT_LIVE_NOTIFY_FALLBACK = env.int("REPORT_LIVE_NOTIFY_FALLBACK", default=30)
+
+# Reports can include columns of tables reached through up to this many foreign keys from their table
+REPORT_JOIN_MAX_DEPTH = env.int("REPORT_JOIN_MAX_DEPTH", default=2)
+
+# Seconds a table data watermark is reused before checking the table again (see apps.core.watermarks)
+REPORT_WATERMARK_TTL = env.int("REPORT_WATERMARK_TTL", default=5)
+
+# Request profiling (Server-Timing header and a log line): requests sending the header
+# when allowed, plus a random sample of all requests (0 disables sampling)
+REQUEST_PROFILING_HEADER = "X-Profile"
+REQUEST_PROFILING_ALLOW_HEADER = env.bool("REQUEST_PROFILING_ALLOW_HEADER", default=DEBUG)
+REQUEST_PROFILING_SAMPLE_RATE = env.float("REQUEST_PROFILING_SAMPLE_RATE", default=0.0)
+# A statement executed this many times in one request is logged as a possible N+1
+REQUEST_PROFILING_DUPLICATE_THRESHOLD = env.int("REQUEST_PROFILING_DUPLICATE_THRESHOLD", default=3)
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -249,4 +334,6 @@ CELERY_ACCEPT_CONTENT = ["json"]
 CELERY_TASK_SERIALIZER = "json"
 CELERY_RESULT_EXPIRES = 3600
 
-CELERY_BEAT_SCHEDULE = {}
+CELERY_BEAT_SCHEDULER = "django_celery_beat.schedulers:DatabaseScheduler"
+# Report schedules add their own tasks to the database scheduler (see ReportSchedule),
+# the fixed entries are in report/celery.py so processes without celery do not import it
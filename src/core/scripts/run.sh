@@ -37,6 +37,10 @@ elif [ "$RUN_MODE" == "local" ]; then
     echo "Starting in Local Mode"
     python manage.py runserver 0.0.0.0:8000
 
+elif [ "$RUN_MODE" == "asgi" ]; then
+    echo "Starting in ASGI Mode"
+    daphne -b 0.0.0.0 -p 8000 report.asgi:application
+
 else
     echo "Starting in Production mode"
     python manage.py migrate